@@ -47,7 +47,8 @@ use input_module,        only: indir, set_fnm_materials, &
                          &     set_fnm_nodes, set_fnm_edges, &
                          &     set_fnm_elems, set_fnm_predelam, &
                          &     set_fnm_matrix_crack
-use output_module,       only: outdir, output
+use output_module,       only: outdir, set_output_settings, set_output_format, &
+                         &     output_due, output, end_output
 
   implicit none
 
@@ -58,19 +59,14 @@ use output_module,       only: outdir, output
   ! local variables
   character(len=DIRLENGTH)    :: workdir
   integer                     :: lenworkdir
-  integer                     :: freq
   !~integer                     :: istat
   !~character(len=MSGLENGTH)    :: emsg
 
   workdir    = ''
   lenworkdir = 0
-  freq       = 0
   !~istat      = STAT_SUCCESS
   !~emsg       = ''
 
-  ! output frequency x: once every x increments
-  freq = 1
-  
   select case (lop)
   
   ! start of the analysis
@@ -85,6 +81,11 @@ use output_module,       only: outdir, output
       end if
       outdir = trim(workdir)//'/outputs/'
       indir  = trim(workdir)//'/inputs/'
+      
+      ! read the output format, frequency, fields, elems and writer set in the
+      ! job file of the preprocessor (and their environment overrides)
+      call set_output_settings(indir)
+      call set_output_format
 
       
       ! initialize global clock and list of nodes, edges, elems and materials
@@ -108,8 +109,9 @@ use output_module,       only: outdir, output
     
   ! end of increment
   case (2)
-      ! print element outputs after certain increment         
-      if ( kinc==1 .or. mod(kinc,freq)==0 ) then
+      ! print element outputs after certain increment (see output_due);
+      ! time(2) is the total time at the end of the increment
+      if ( output_due(kinc, time(2)) ) then
         call output(kstep,kinc,outdir)
         !~if(istat == STAT_FAILURE)
         !~  write(MSG_FILE,*) emsg
@@ -119,6 +121,7 @@ use output_module,       only: outdir, output
 
   ! end of analysis
   case (3)
+      call end_output
       call cleanup_all
       
   
@@ -141,14 +144,13 @@ subroutine uel(rhs,amatrx,svars,energy,ndofel,nrhs,nsvars, &
 ! load FNM modules
 use parameter_module,     only: NDIM, DP, ZERO, MSG_FILE, MSGLENGTH, STAT_SUCCESS, &
                                 & STAT_FAILURE, EXIT_FUNCTION, JELEM0
-use fnode_module,         only: fnode, update
-use fedge_module,         only: fedge
+use fnode_module,         only: update
 use node_list_module,     only: node_list
 use edge_list_module,     only: edge_list
 use elem_list_module,     only: elem_list, elem_node_connec, elem_edge_connec, layup
 use material_list_module, only: UDSinglePly_material, matrixCrack_material, &
                                 & interface_material
-use predelam_list_module,     only: predelam_elems, predelam_interf
+use predelam_list_module,     only: elem_predelam_interf
 use matrix_crack_list_module, only: lam_crack_list
 use fBrickLam_elem_module,    only: fBrickLam_elem, integrate
 use output_module
@@ -168,11 +170,6 @@ use output_module
   character(len=MSGLENGTH):: msgloc
   real(DP),   allocatable :: Kmat(:,:), Fvec(:)
   real(DP)                :: uj(NDIM,nnode)
-  type(fnode)             :: nodes(nnode)
-  integer                 :: node_cnc(nnode)
-  integer                 :: nedge
-  type(fedge),allocatable :: edges(:)
-  integer,    allocatable :: edge_cnc(:)
   integer                 :: predelam
   integer                 :: j
   integer                 :: ajelem
@@ -184,8 +181,6 @@ use output_module
   emsg      = ''
   msgloc    = ', abaqusUEL_fBrickLam.f'
   uj        = ZERO
-  node_cnc  = 0
-  nedge     = 0
   predelam  = 0
   j         = 0
   write(cjelem,'(i5)') jelem
@@ -252,14 +247,6 @@ use output_module
 !  write(110,'(1X, a)')'reach mark a'//trim(cjelem)
 !  close(110)
  
-  ! extract the node connec of this elem
-  node_cnc(:) = elem_node_connec(:,ajelem)
-  
-  ! extract the edge connec of this elem
-  nedge = size(elem_edge_connec(:,ajelem))
-  allocate(edge_cnc(nedge))
-  edge_cnc(:) = elem_edge_connec(:,ajelem)
-
   ! extract passed-in nodal solutions obtained by Abaqus Solver
   do j=1, nnode
     uj(1:NDIM,j) = u( (j-1)*NDIM+1 : j*NDIM )
@@ -267,13 +254,8 @@ use output_module
   
   ! update the nodal solutions to global_node_list
   do j=1, nnode
-    call update(node_list(node_cnc(j)),u=uj(:,j))
+    call update(node_list(elem_node_connec(j,ajelem)),u=uj(:,j))
   end do
-
-  ! extract nodes and edge status from global node and edge lists
-  nodes = node_list(node_cnc)
-  allocate(edges(nedge))
-  edges = edge_list(edge_cnc)
   
   !~! debug, check the input to elem
   !~call output(kstep,jelem*1000+kinc,outdir)
@@ -284,23 +266,22 @@ use output_module
 !  write(110,'(1X, a)')'reach mark 2'
 !  close(110)
   
-  ! check if this elem belongs to the predelam elem set, predelam_elems
-  ! if so, update variable predelam
+  ! update variable predelam with the predelam interface of this elem,
+  ! looked up in elem_predelam_interf (0 if it is not in a predelam elset)
   ! predelam default value = 0
-  if (allocated(predelam_elems)) then
-    if ( any ( predelam_elems == ajelem ) ) predelam = predelam_interf 
-  end if
+  if (allocated(elem_predelam_interf)) predelam = elem_predelam_interf(ajelem)
 
   ! integrate this element. elem_list(jelem)
-  call integrate (elem_list(ajelem), nodes, edges, lam_crack_list, &
+  ! its nodes and edges are integrated in place in the global node and edge
+  ! lists, through its node and edge connec (no copy of them)
+  call integrate (elem_list(ajelem), node_list, edge_list, lam_crack_list, &
   &  layup, UDSinglePly_material, matrixCrack_material, interface_material,         &
-  &  Kmat, Fvec, istat, emsg, predelam)
+  &  Kmat, Fvec, istat, emsg, predelam,                                             &
+  &  node_cnc=elem_node_connec(:,ajelem), edge_cnc=elem_edge_connec(:,ajelem))
   if (istat == STAT_FAILURE) then
     emsg = trim(emsg)//trim(msgloc)//trim(cjelem)
     write(MSG_FILE,*) emsg
     !** debug **
-    node_list(node_cnc) = nodes
-    edge_list(edge_cnc) = edges
     call output(kstep,ajelem*10000+kinc,outdir)
     !***********
     call cleanup_all
@@ -312,10 +293,8 @@ use output_module
 !  write(110,'(1X, a)')'reach mark 3'
 !  close(110)
 
-  ! update to global lists
-  ! ** NOTE: lam_crack_list is updated directly within the sub-programs.
-  node_list(node_cnc) = nodes
-  edge_list(edge_cnc) = edges
+  ! ** NOTE: the global node and edge lists and lam_crack_list are updated
+  ! directly within the sub-programs.
   
 !  ! open a file 
 !  open(110, file=trim(outdir)//'record.dat', status="replace", action="write")
@@ -0,0 +1,120 @@
+include 'abaqusUEL_fBrickLam.f'
+
+program bench_uel
+! Purpose:
+! to time the uel per element call on a preprocessed model, outside of Abaqus
+! (see bench_uel.py)
+! usage: bench_uel <workdir> <ninc> [<strain>]
+! the fnm input files are read from <workdir>/inputs/; at each increment, the
+! nodal displacements are set to a uniform strain (default 1.e-5) scaled by
+! the increment no., and the uel is called once for every elem
+! the time per uel call and a checksum of the elem matrices and vectors are
+! written; the checksum is the same for two builds of the uel that integrate
+! the elems alike
+!
+use parameter_module, only: DP, DIRLENGTH, NDIM, ZERO
+use fnode_module,     only: extract
+use node_list_module, only: node_list
+use elem_list_module, only: elem_list, elem_node_connec
+
+implicit none
+
+character(len=DIRLENGTH) :: arg
+integer                  :: ninc, kinc, nelem, nnode, ndofel, jelem, j
+integer(kind=8)          :: c0, c1, crate
+real(DP)                 :: strain, tinc, ttot, chksum
+real(DP)                 :: x(NDIM), time(2), dtime, pnewdt, period
+! uel arguments
+real(DP), allocatable    :: rhs(:,:), amatrx(:,:), coords(:,:), u(:), du(:,:), &
+                         &  v(:), a(:), predef(:,:,:)
+real(DP)                 :: svars(1), energy(8), props(1), params(1)
+real(DP)                 :: adlmag(1,1), ddlmag(1,1)
+integer                  :: jdltyp(1,1), lflags(5), jprops(1)
+
+arg    = ''
+ninc   = 1
+strain = 1.e-5_DP
+
+call get_command_argument(2, arg)
+if (len_trim(arg) > 0) read(arg,*) ninc
+call get_command_argument(3, arg)
+if (len_trim(arg) > 0) read(arg,*) strain
+
+time   = ZERO
+dtime  = ZERO
+pnewdt = ZERO
+period = ZERO
+svars  = ZERO
+energy = ZERO
+props  = ZERO
+params = ZERO
+adlmag = ZERO
+ddlmag = ZERO
+jdltyp = 0
+jprops = 0
+! static analysis, normal increment
+lflags = [1, 0, 1, 0, 0]
+
+! start of the analysis: read the fnm input files
+call uexternaldb(0, 0, time, dtime, 0, 0)
+
+nelem  = size(elem_list)
+nnode  = size(elem_node_connec, 1)
+ndofel = NDIM * nnode
+allocate(rhs(ndofel,1), amatrx(ndofel,ndofel), coords(NDIM,nnode), u(ndofel), &
+&        du(ndofel,1), v(ndofel), a(ndofel), predef(2,1,nnode))
+rhs    = ZERO
+amatrx = ZERO
+du     = ZERO
+v      = ZERO
+a      = ZERO
+predef = ZERO
+
+ttot   = ZERO
+chksum = ZERO
+do kinc = 1, ninc
+    call uexternaldb(1, 0, time, dtime, 1, kinc)
+    tinc = ZERO
+    do jelem = 1, nelem
+        ! coords and displacements of the nodes of this elem
+        do j = 1, nnode
+            call extract(node_list(elem_node_connec(j,jelem)), x=x)
+            coords(:,j) = x
+            u((j-1)*NDIM+1 : j*NDIM) = kinc * strain * x
+        end do
+        call system_clock(c0, crate)
+        call uel(rhs, amatrx, svars, energy, ndofel, 1, 1, &
+        &        props, 1, coords, NDIM, nnode, u, du, v, a, 1, time, dtime, &
+        &        1, kinc, jelem, params, 0, jdltyp, adlmag, predef, 1, &
+        &        lflags, ndofel, ddlmag, 1, pnewdt, jprops, 1, period)
+        call system_clock(c1)
+        tinc   = tinc + real(c1-c0,DP)/real(crate,DP)
+        chksum = chksum + sum(abs(amatrx)) + sum(abs(rhs))
+    end do
+    ttot = ttot + tinc
+    write(*,'(a,i6,a,f10.4,a)') 'increment ', kinc, ': ', tinc, ' s'
+end do
+write(*,'(a,i8,a,i6)') 'elems: ', nelem, ', nodes per elem: ', nnode
+write(*,'(a,f12.3,a)') 'uel time per elem call: ', 1.e6_DP*ttot/(nelem*ninc), ' us'
+write(*,'(a,ES24.16)') 'checksum: ', chksum
+
+! end of the analysis
+call uexternaldb(3, 0, time, dtime, 1, ninc)
+
+end program bench_uel
+
+
+subroutine getoutdir(outdir, lenoutdir)
+! working dir. of the analysis, outside of Abaqus: the 1st command argument
+  character(len=*), intent(out) :: outdir
+  integer,          intent(out) :: lenoutdir
+  call get_command_argument(1, outdir)
+  lenoutdir = len_trim(outdir)
+end subroutine getoutdir
+
+
+subroutine xit()
+! exit of EXIT_FUNCTION, outside of Abaqus
+  write(*,*) 'error: see the messages above'
+  stop 1
+end subroutine xit
@@ -0,0 +1,134 @@
+################################################################
+########### Micro-benchmark of the uel per element #############
+################################################################
+##
+##  a synthetic laminate of nx x ny C3D8 elems is written and
+##  preprocessed as in outputs/bench_output.py, and the uel is
+##  called for every elem outside of Abaqus by the driver
+##  bench_uel.f90, which times the uel calls
+##  the driver is compiled with gfortran (or the compiler of the
+##  environment variable FC), with the files of the repository; with
+##  --ref, it is also compiled with the files of another revision
+##  of the repository (e.g. HEAD~1, the uel before a change), and
+##  the two builds are timed alternately on the same model; their
+##  checksums of the elem matrices and vectors must agree
+##  (the revision must read the fnm input files of this one)
+##  e.g.:
+##    python bench_uel.py --nx 40 --ny 40 --ninc 5 --ref HEAD~1
+################################################################
+
+import os, shutil, subprocess, sys, tempfile, time
+
+# root dir. of the repository
+rootdir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(rootdir, 'inputs'))
+sys.path.insert(0, os.path.join(rootdir, 'outputs'))
+
+from preproc_job import new_job
+from preproc_batch import run_job
+from bench_output import write_laminate
+
+
+# Abaqus include file of the uel, outside of Abaqus
+aba_param = '      implicit real*8(a-h,o-z)\n      parameter (nprecd=2)\n'
+
+
+# define the build of the driver in builddir, with the files of srcdir (a copy
+# of the repository); the driver itself is that of this repository
+def build_driver(builddir, srcdir=rootdir):
+    fc  = os.environ.get('FC', 'gfortran')
+    src = os.path.join(builddir, 'bench_uel.f90')
+    shutil.copy(os.path.join(rootdir, 'bench_uel.f90'), src)
+    f = open(os.path.join(builddir, 'aba_param.inc'), 'w')
+    f.write(aba_param)
+    f.close()
+    exe = os.path.join(builddir, 'bench_uel')
+    subprocess.check_call([fc, '-O2', '-ffree-line-length-none', '-I'+srcdir, \
+    '-I'+builddir, '-J', builddir, src, '-o', exe])
+    return exe
+
+
+# define the copy of the files of a revision of the repository in destdir
+def export_revision(rev, destdir):
+    archive = subprocess.Popen(['git', 'archive', rev], cwd=rootdir, stdout=subprocess.PIPE)
+    subprocess.check_call(['tar', '-x', '-C', destdir], stdin=archive.stdout)
+    archive.stdout.close()
+    if archive.wait() != 0:
+        raise RuntimeError('git archive failed for revision '+rev)
+
+
+# define the run of the driver for ninc increments
+# returns the uel time per elem call (us) and the checksum
+def run_driver(exe, workdir, ninc, strain):
+    out = subprocess.check_output([exe, workdir, str(ninc), repr(strain)])
+    if not isinstance(out, str):
+        out = out.decode()
+    tcall  = [ float(l.split(':')[1].split()[0]) for l in out.splitlines() \
+               if l.startswith('uel time per elem call') ][0]
+    chksum = [ l.split(':')[1].strip() for l in out.splitlines() \
+               if l.startswith('checksum') ][0]
+    return tcall, chksum
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Micro-benchmark of the FNM uel per elem '+ \
+    'on a synthetic laminate')
+    parser.add_argument('--nx', type=int, default=40, help='no. of elems along x')
+    parser.add_argument('--ny', type=int, default=40, help='no. of elems along y')
+    parser.add_argument('--layup', default='0,45,-45,90', \
+    help='fibre angles of the plies, e.g. 0,90,90,0')
+    parser.add_argument('--plythick', type=float, default=0.125, help='ply thickness')
+    parser.add_argument('--size', type=float, default=0.5, help='elem size')
+    parser.add_argument('--ninc', type=int, default=5, help='no. of increments')
+    parser.add_argument('--strain', type=float, default=1.e-5, \
+    help='uniform strain of the 1st increment')
+    parser.add_argument('--repeat', type=int, default=3, help='no. of runs of each build')
+    parser.add_argument('--ref', help='revision of the repository to be timed too, e.g. HEAD~1')
+    parser.add_argument('--workdir', help='working dir. (default: a temporary dir., removed '+ \
+    'at the end)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_uel')
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    try:
+        # synthetic laminate, preprocessed in workdir/inputs
+        layup = [ int(a) for a in args.layup.split(',') ]
+        write_laminate(os.path.join(workdir, 'bench.inp'), args.nx, args.ny, args.size, \
+        len(layup)*args.plythick)
+        jb = new_job({ 'jobname': 'bench', 'symmetric': False, 'layup': layup,
+                       'plythick': args.plythick,
+                       'minl': args.size, 'maxl': args.size*1.5 })
+        t0  = time.time()
+        res = run_job(jb, workdir, workdir)
+        if res.error:
+            print('ERROR: preprocessing failed: '+res.error)
+            sys.exit(1)
+        print('laminate: %d x %d elems, %d plies, preprocessed in %.1f s' \
+        % (args.nx, args.ny, len(layup), time.time()-t0))
+        builds = [ ('current', build_driver(tempfile.mkdtemp(dir=workdir))) ]
+        if args.ref:
+            refdir = tempfile.mkdtemp(dir=workdir)
+            export_revision(args.ref, refdir)
+            builds.append( (args.ref, build_driver(tempfile.mkdtemp(dir=workdir), refdir)) )
+        # the builds are run alternately, the best time of each is kept
+        best = dict( (name, None) for name, exe in builds )
+        sums = dict( (name, None) for name, exe in builds )
+        for r in range(args.repeat):
+            for name, exe in builds:
+                tcall, chksum = run_driver(exe, workdir, args.ninc, args.strain)
+                if best[name] is None or tcall < best[name]:
+                    best[name] = tcall
+                sums[name] = chksum
+        print('%-12s %14s %24s' % ('build', 'us/elem call', 'checksum'))
+        for name, exe in builds:
+            print('%-12s %14.2f %24s' % (name, best[name], sums[name]))
+        if args.ref:
+            print('speed-up of the current build: %.2f' % (best[args.ref]/best['current']))
+            if sums[args.ref] != sums['current']:
+                print('ERROR: the checksums differ!')
+                sys.exit(1)
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir)
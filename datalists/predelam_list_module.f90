@@ -7,15 +7,15 @@ module predelam_list_module
 implicit none
 save
 
-integer, allocatable :: predelam_elems(:)
-integer, allocatable :: predelam_interf
+! predelam interface of each elem, indexed as elem_list;
+! 0 if the elem is not in a predelam elset
+integer, allocatable :: elem_predelam_interf(:)
 
 contains
 
   subroutine empty_predelam_list()
   
-    if (allocated(predelam_elems))  deallocate(predelam_elems)
-    if (allocated(predelam_interf)) deallocate(predelam_interf)
+    if (allocated(elem_predelam_interf)) deallocate(elem_predelam_interf)
   
   end subroutine empty_predelam_list
 
@@ -8,6 +8,10 @@ public
 ! define global variable for output directory
 character(len=DIRLENGTH), save :: indir
 
+! version of the binary fnm input files (fnm_*.bin) written by the preprocessor;
+! the binary files are read instead of the text files if they are present
+integer, parameter :: FNM_BIN_VERSION = 1
+
 contains
 
   ! input materials
@@ -21,21 +25,48 @@ contains
     integer  :: nnode
     integer  :: i
     real(DP) :: x(NDIM), u(NDIM)
+    logical  :: isbin
+    integer  :: counts(1)
+    real(DP), allocatable :: xs(:,:)
     
     nnode = 0
     i = 0  
     x = ZERO
     u = ZERO
-  
-    open (unit=111, file=trim(indir)//'fnm_nodes.txt', status='old', action='read')
+    isbin  = .false.
+    counts = 0
     
-    read(111, *) nnode
-    allocate(node_list(nnode)) 
+    inquire(file=trim(indir)//'fnm_nodes.bin', exist=isbin)
     
-    do i = 1, nnode
-      read(111, *) x
-      call update(node_list(i), x=x, u=u)
-    end do
+    if (isbin) then
+    
+      open (unit=111, file=trim(indir)//'fnm_nodes.bin', status='old', action='read', &
+      & access='stream', form='unformatted')
+      
+      call read_bin_header(111, 'FNMN', counts)
+      nnode = counts(1)
+      allocate(node_list(nnode))
+      allocate(xs(NDIM,nnode))
+      
+      read(111) xs
+      
+      do i = 1, nnode
+        call update(node_list(i), x=xs(:,i), u=u)
+      end do
+      
+    else
+  
+      open (unit=111, file=trim(indir)//'fnm_nodes.txt', status='old', action='read')
+      
+      read(111, *) nnode
+      allocate(node_list(nnode)) 
+      
+      do i = 1, nnode
+        read(111, *) x
+        call update(node_list(i), x=x, u=u)
+      end do
+      
+    end if
     
     close(111)
   
@@ -47,20 +78,47 @@ contains
     use edge_list_module, only: edge_list 
                                       
     integer :: nedge, iedge                 
+    logical :: isbin
+    integer :: counts(2)
+    integer, allocatable :: ties(:)
     
     nedge = 0
     iedge = 0
+    isbin  = .false.
+    counts = 0
     
-    open (unit=112, file=trim(indir)//'fnm_edges.txt', status='old', action='read')
+    inquire(file=trim(indir)//'fnm_edges.bin', exist=isbin)
     
-    read(112, *) nedge    
-    allocate(edge_list(nedge))
+    if (isbin) then
     
-    do
-      read(112, *) iedge
-      if (iedge <= 0) exit
-      call update(edge_list(iedge), tie_bcd=.true.)
-    end do
+      open (unit=112, file=trim(indir)//'fnm_edges.bin', status='old', action='read', &
+      & access='stream', form='unformatted')
+      
+      call read_bin_header(112, 'FNMG', counts)
+      nedge = counts(1)
+      allocate(edge_list(nedge))
+      allocate(ties(counts(2)))
+      
+      read(112) ties
+      
+      do iedge = 1, size(ties)
+        call update(edge_list(ties(iedge)), tie_bcd=.true.)
+      end do
+      
+    else
+    
+      open (unit=112, file=trim(indir)//'fnm_edges.txt', status='old', action='read')
+      
+      read(112, *) nedge    
+      allocate(edge_list(nedge))
+      
+      do
+        read(112, *) iedge
+        if (iedge <= 0) exit
+        call update(edge_list(iedge), tie_bcd=.true.)
+      end do
+      
+    end if
     
     close(112)
 
@@ -81,6 +139,10 @@ contains
     integer :: nplies                                   
     integer, allocatable :: nodecnc(:), edgecnc(:)     
     integer :: i   
+    logical :: isbin
+    integer :: counts(4)
+    real(DP),allocatable :: angles(:)
+    integer, allocatable :: npliess(:)
   
                                                            
     nelem   = 0                        
@@ -90,6 +152,46 @@ contains
     angle   = ZERO
     nplies  = 0
     i = 0
+    isbin  = .false.
+    counts = 0
+    
+    inquire(file=trim(indir)//'fnm_elems.bin', exist=isbin)
+    
+    if (isbin) then
+    
+      open (unit=113, file=trim(indir)//'fnm_elems.bin', status='old', action='read', &
+      & access='stream', form='unformatted')
+      
+      call read_bin_header(113, 'FNME', counts)
+      nelem   = counts(1)
+      elnnode = counts(2)
+      elnedge = counts(3)
+      nplyblk = counts(4)
+      
+      allocate(elem_list(nelem))
+      allocate(elem_node_connec(elnnode,nelem))
+      allocate(elem_edge_connec(elnedge,nelem))
+      allocate(layup(nplyblk))
+      allocate(angles(nplyblk), npliess(nplyblk))
+      
+      read(113) angles
+      read(113) npliess
+      read(113) elem_node_connec
+      read(113) elem_edge_connec
+      
+      do i = 1, nplyblk
+        layup(i)=plyblock_layup(angle=angles(i),nplies=npliess(i))
+      end do
+      
+      do i = 1, nelem
+        call set(elem_list(i), NPLYBLKS=nplyblk)
+      end do
+      
+      close(113)
+      
+      return
+      
+    end if
     
     open (unit=113, file=trim(indir)//'fnm_elems.txt', status='old', action='read')
     
@@ -126,15 +228,52 @@ contains
   end subroutine set_fnm_elems
   
   
+  ! read and check the header of a binary fnm input file:
+  ! magic, version, sizes of an integer and a real, and the counts of the file
+  subroutine read_bin_header(unit, magic, counts)
+    use parameter_module, only: DP, MSG_FILE, EXIT_FUNCTION
+    
+    integer,          intent(in)  :: unit
+    character(len=4), intent(in)  :: magic
+    integer,          intent(out) :: counts(:)
+    
+    character(len=4) :: fmagic
+    integer          :: version, isize, rsize
+    
+    fmagic  = ''
+    version = 0
+    isize   = 0
+    rsize   = 0
+    counts  = 0
+    
+    read(unit) fmagic, version, isize, rsize, counts
+    
+    ! the kind no. of a real is its size in bytes with the supported compilers
+    if (fmagic /= magic .or. version /= FNM_BIN_VERSION .or. &
+    &   isize /= bit_size(version)/8 .or. rsize /= DP) then
+      write(MSG_FILE,*) 'unsupported binary fnm input file: ', magic, version, isize, rsize
+      call EXIT_FUNCTION
+    end if
+    
+  end subroutine read_bin_header
+  
+  
   ! predelam
+  ! fnm_predelam.txt: the no. of predelam elems, then one line per predelam
+  ! elem with its index and its predelam interface; the interfaces are stored
+  ! in elem_predelam_interf, indexed as elem_list, for a direct lookup in the
+  ! uel. set_fnm_elems must be called before
   subroutine set_fnm_predelam()         
-    use predelam_list_module, only: predelam_elems, predelam_interf 
+    use parameter_module,     only: MSG_FILE, EXIT_FUNCTION
+    use elem_list_module,     only: elem_list
+    use predelam_list_module, only: elem_predelam_interf
                                       
-    integer :: npdelem, i, iel                  
+    integer :: npdelem, i, iel, interf
                                       
     npdelem = 0
     i = 0
     iel = 0
+    interf = 0
     
     open (unit=114, file=trim(indir)//'fnm_predelam.txt', status='old', action='read')              
 
@@ -142,14 +281,16 @@ contains
     
     if (npdelem > 0) then
     
-      allocate(predelam_elems(npdelem))     
-      allocate(predelam_interf)             
+      allocate(elem_predelam_interf(size(elem_list)))
+      elem_predelam_interf = 0
 
-      read(114, *) predelam_interf
-    
       do i = 1, npdelem
-        read(114, *) iel
-        predelam_elems(i)=iel  
+        read(114, *) iel, interf
+        if (iel < 1 .or. iel > size(elem_list)) then
+          write(MSG_FILE,*) 'predelam elem not in the elem list: ', iel
+          call EXIT_FUNCTION
+        end if
+        elem_predelam_interf(iel) = interf
       end do
       
     end if
@@ -164,11 +305,12 @@ contains
     use parameter_module,         only: MIN_ELEM_SIZE, MAX_ELEM_SIZE
     use matrix_crack_module,      only: set
     use matrix_crack_list_module, only: lam_crack_list 
+    use elem_list_module,         only: layup
                                       
-    integer :: nplyblock, maxncrack, i                 
+    integer :: nplyblock, i                 
+    integer, allocatable :: ncracks(:)
     
     nplyblock = 0
-    maxncrack = 0
     i = 0
     
     open (unit=115, file=trim(indir)//'fnm_matrix_crack.txt', status='old', action='read')              
@@ -176,18 +318,22 @@ contains
     ! read user-input parameters for min and max elem sizes
     read(115, *) MIN_ELEM_SIZE, MAX_ELEM_SIZE
     
-    ! read no. of plyblocks in the laminate, and maximum no. of cracks possible for each plyblock
+    ! read no. of plyblocks in the laminate, and the no. of cracks expected in
+    ! each plyblock (one per line), the initial size of its crack list
     read(115, *) nplyblock
-    read(115, *) maxncrack
-    
-    if (maxncrack > 0) then
-      ! allocate laminate crack list
-      allocate(lam_crack_list(nplyblock))
-      ! allocate each ply crack list
-      do i = 1, nplyblock
-        call set(lam_crack_list(i),maxncrack)
-      end do
-    end if
+    allocate(ncracks(nplyblock))
+    ncracks = 0
+    do i = 1, nplyblock
+      read(115, *) ncracks(i)
+    end do
+    
+    ! allocate laminate crack list
+    allocate(lam_crack_list(nplyblock))
+    ! allocate each ply crack list, with the fibre angle of its plyblock
+    ! (set_fnm_elems must be called before)
+    do i = 1, nplyblock
+      call set(lam_crack_list(i),ncracks(i),layup(i)%angle)
+    end do
     
     close(115)
     
@@ -0,0 +1,156 @@
+################################################################
+############### Batch preprocessing of many jobs ###############
+################################################################
+##
+##  the preprocessing of a list of jobs is run in a pool of
+##  processes (concurrent.futures; in python 2, the 'futures'
+##  backport is needed, otherwise the jobs are run one by one)
+##  each job is written in its own directory outdir/<jobname>,
+##  laid out as an abaqus working directory:
+##  - outdir/<jobname>/inputs : uel & fnm input files, and the log
+##                              of the preprocessing (preproc.log)
+##  - outdir/<jobname>        : copies of the uel input, nodes &
+##                              elems files
+##  the wall time and the failure (if any) of each job are reported
+##  jobs are given as abaqus input files, with the same inputs for
+##  all of them given as options, and/or as job files (see
+##  preproc_job), whose input files are in the job file directory
+##  e.g.:
+##    python preproc_batch.py DCB/DCB-mesh*.inp --layup 0,0,0,0 \
+##           --plythick 0.125 --pdinterf 2 --outdir batch --workers 4
+##    python preproc_batch.py jobs.json --outdir batch
+################################################################
+
+from preproc_classes import jobresult
+from preproc_job import read_job_dicts, add_job_options, job_options, option_jobs
+from preproc_inputfile import preprocess
+from preproc_cache import add_cache_options, cachesize
+import os, sys, time, traceback
+# process pool; in python 2, it needs the 'futures' backport
+try:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+except ImportError:
+    ProcessPoolExecutor = None
+
+
+# define the run of a single job in its directory jobdir
+# the output of the preprocessing is written in the log file of the job,
+# and its failure is returned instead of stopping the batch
+# cachedir, cachesize : preprocessing cache shared by the jobs (see preproc_cache)
+# incremental         : only write the files which are not up to date in jobdir
+def run_job(jb, inpdir, jobdir, cachedir=None, cachesize=cachesize, incremental=False):
+    outdir = os.path.join(jobdir,'inputs')
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+    logfile = os.path.join(outdir,'preproc.log')
+    log = open(logfile,'w')
+    stdout = sys.stdout
+    sys.stdout = log
+    res = jobresult(jobname=jb.jobname, jobdir=jobdir)
+    t0 = time.time()
+    try:
+        res.artifacts = preprocess(jb, inpdir=inpdir, outdir=outdir, copydir=jobdir, \
+        cachedir=cachedir, cachesize=cachesize, incremental=incremental)
+    # errors of the preprocessing are printed, then sys.exit() is called
+    except SystemExit:
+        res.error = 'exit'
+    except Exception:
+        traceback.print_exc(file=log)
+        res.error = traceback.format_exc().strip().split('\n')[-1]
+    finally:
+        res.time = time.time() - t0
+        sys.stdout = stdout
+        log.close()
+    # use the last error message in the log
+    if res.error == 'exit':
+        errs = [ l.strip() for l in open(logfile,'r') if 'ERROR' in l ]
+        res.error = errs[-1] if errs else 'preprocessing stopped'
+    return res
+
+
+# define the report line of a job result
+def report(res):
+    if res.error is None:
+        print('  ok   %-30s %8.2f s   %s' % (res.jobname, res.time, res.jobdir))
+    else:
+        print('  FAIL %-30s %8.2f s   %s' % (res.jobname, res.time, res.error))
+    sys.stdout.flush()
+
+
+# define the run of a batch of jobs
+# tasks   : list of (job, inpdir, jobdir) of the jobs
+# workers : max no. of processes; default: no. of cores; 1 runs the jobs one
+#           by one in this process
+# cachedir, cachesize : preprocessing cache shared by the jobs
+# incremental         : only write the files which are not up to date
+# returns the list of job results, in the order of the tasks
+def run_batch(tasks, workers=None, cachedir=None, cachesize=cachesize, incremental=False):
+    results = [None] * len(tasks)
+    if ProcessPoolExecutor is None or workers == 1:
+        for i, t in enumerate(tasks):
+            results[i] = run_job(*t, cachedir=cachedir, cachesize=cachesize, \
+            incremental=incremental)
+            report(results[i])
+        return results
+    pool = ProcessPoolExecutor(max_workers=workers)
+    futures = {}
+    for i, t in enumerate(tasks):
+        futures[pool.submit(run_job, *t, cachedir=cachedir, cachesize=cachesize, \
+        incremental=incremental)] = i
+    for fut in as_completed(futures):
+        i = futures[fut]
+        try:
+            results[i] = fut.result()
+        # e.g. the worker process was killed
+        except Exception as e:
+            jb, inpdir, jobdir = tasks[i]
+            results[i] = jobresult(jobname=jb.jobname, jobdir=jobdir, error=repr(e))
+        report(results[i])
+    pool.shutdown()
+    return results
+
+
+# define the tasks of the jobs given on the command line
+# jobs of the same name get the directories <jobname>, <jobname>-2, ...
+def batch_tasks(paths, opts, outdir):
+    tasks = []
+    for p in paths:
+        if p.lower().endswith('.inp'):
+            jobs = option_jobs([{'jobname': os.path.basename(p)[:-4]}], opts)
+        else:
+            jobs = option_jobs(read_job_dicts(p), opts)
+        for jb in jobs:
+            tasks.append( (jb, os.path.dirname(p)) )
+    names  = {}
+    result = []
+    for jb, inpdir in tasks:
+        names[jb.jobname] = names.get(jb.jobname,0) + 1
+        dname = jb.jobname
+        if names[jb.jobname] > 1:
+            dname = jb.jobname+'-'+str(names[jb.jobname])
+        result.append( (jb, inpdir, os.path.join(outdir,dname)) )
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Batch preprocessing for the FNM')
+    parser.add_argument('jobs', nargs='+', \
+    help='abaqus input files (.inp) and/or JSON (or YAML) job files')
+    parser.add_argument('--outdir', default='.', \
+    help='directory of the job directories (default: current directory)')
+    parser.add_argument('--workers', type=int, \
+    help='max no. of processes (default: no. of cores)')
+    add_job_options(parser)
+    add_cache_options(parser)
+    args = parser.parse_args()
+    if args.jobname is not None:
+        parser.error('--jobname cannot be used in a batch')
+    tasks = batch_tasks(args.jobs, job_options(parser, args), args.outdir)
+    t0 = time.time()
+    results = run_batch(tasks, args.workers, args.cache, int(args.cache_size*2**20), \
+    args.incremental)
+    nfail = len([ r for r in results if r.error is not None ])
+    print('%d jobs, %d failed, %.2f s' % (len(results), nfail, time.time()-t0))
+    if nfail > 0:
+        sys.exit(1)
@@ -0,0 +1,144 @@
+################################################################
+############# Content-addressed preprocessing cache ############
+################################################################
+##
+##  the FNM-ized files of the fnm part are stored in a cache dir.,
+##  one entry (sub-dir.) per key, so that a job whose fnm part and
+##  layup have not changed (e.g. only materials or steps changed)
+##  skips the FNM-ization and the writing of these files:
+##  - key   : hash of the raw lines of the fnm part block (nodes,
+##            elems, nsets incl. the tie nsets, predelam elset),
+##            the plyblock layup (angles, nplies, thickness) and
+##            the parameters of the uel & fnm files
+##  - entry : uel_nodes.inp, uel_elems.inp, fnm_nodes.txt,
+##            fnm_edges.txt, fnm_elems.txt (& fnm_*.bin), and
+##            cache.json with the fnm part section of the uel input
+##            file and the mesh info needed by the other files
+##  on a hit, the files of the entry are copied to the output dir.,
+##  and only the uel input file and the cheap fnm files (predelam,
+##  matrix crack) are written
+##  the cache size is bounded: the least recently used entries are
+##  removed when the total size of the entries exceeds cachesize
+##  entries are written in a temporary dir. and renamed, so that
+##  jobs of a batch can share the cache
+################################################################
+
+import hashlib, json, os, shutil, tempfile, time
+
+
+# version of the cache entry layout; change it to invalidate all entries
+cacheversion = 3
+# default max. total size of the cache entries, in bytes
+cachesize = 2**30
+# name of the entry info file
+cacheinfo = 'cache.json'
+
+
+# define the key of a list of items (strings, or objects written with str());
+# the items are joined with a separator, so that they cannot run into each other
+def cache_key(items):
+    text = '\0'.join(['fnm cache '+str(cacheversion)] + [ str(t) for t in items ])
+    # str is already bytes in python 2
+    if not isinstance(text, bytes):
+        text = text.encode('utf-8')
+    return hashlib.sha1(text).hexdigest()
+
+
+# define the fetch of a cache entry
+# the files of the entry are copied to outdir; returns the dict of the entry
+# info, or None if there is no valid entry for the key
+def cache_fetch(cachedir, key, outdir):
+    entry = os.path.join(cachedir, key)
+    try:
+        f = open(os.path.join(entry, cacheinfo), 'r')
+        info = json.load(f)
+        f.close()
+        for fname in info['files']:
+            shutil.copyfile(os.path.join(entry, fname), os.path.join(outdir, fname))
+        # mark the entry as recently used
+        os.utime(entry, None)
+    # no entry, or it is being removed by another job
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+    return info
+
+
+# define the store of a cache entry
+# files : list of paths of the files to be stored
+# info  : dict of the entry info; the names of the files are added to it
+def cache_store(cachedir, key, files, info, maxsize=cachesize):
+    if not os.path.isdir(cachedir):
+        try:
+            os.makedirs(cachedir)
+        except OSError:
+            pass
+    entry = os.path.join(cachedir, key)
+    if os.path.isdir(entry):
+        return
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=cachedir)
+    info = dict(info)
+    info['files'] = [ os.path.basename(p) for p in files ]
+    for p in files:
+        shutil.copyfile(p, os.path.join(tmp, os.path.basename(p)))
+    f = open(os.path.join(tmp, cacheinfo), 'w')
+    json.dump(info, f)
+    f.close()
+    try:
+        os.rename(tmp, entry)
+    # the entry has been stored by another job in the meantime
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+    cache_evict(cachedir, maxsize, keep=key)
+
+
+# define the size in bytes of the files in a dir.
+def dir_size(d):
+    size = 0
+    for fname in os.listdir(d):
+        size = size + os.path.getsize(os.path.join(d, fname))
+    return size
+
+
+# define the eviction of the least recently used entries
+# entries are removed, oldest first, until the total size is not more than
+# maxsize; the entry keep is never removed
+def cache_evict(cachedir, maxsize=cachesize, keep=None):
+    entries = []
+    total   = 0
+    for key in os.listdir(cachedir):
+        entry = os.path.join(cachedir, key)
+        if key.startswith('.') or not os.path.isdir(entry):
+            continue
+        try:
+            size = dir_size(entry)
+            entries.append( (os.path.getmtime(entry), key, size) )
+        except OSError:
+            continue
+        total = total + size
+    entries.sort()
+    for mtime, key, size in entries:
+        if total <= maxsize:
+            break
+        if key == keep:
+            continue
+        shutil.rmtree(os.path.join(cachedir, key), ignore_errors=True)
+        total = total - size
+    # temporary dirs. left by jobs which were killed
+    for key in os.listdir(cachedir):
+        entry = os.path.join(cachedir, key)
+        try:
+            if key.startswith('.tmp-') and time.time() - os.path.getmtime(entry) > 3600:
+                shutil.rmtree(entry, ignore_errors=True)
+        except OSError:
+            pass
+
+
+# define the cache options of a command-line parser (argparse), incl. the
+# incremental mode (see preproc_state)
+def add_cache_options(parser):
+    parser.add_argument('--cache', metavar='DIR', \
+    help='directory of the preprocessing cache of the FNM-ized fnm part files')
+    parser.add_argument('--cache-size', type=float, default=cachesize/2.0**20, \
+    metavar='MB', help='max. size of the preprocessing cache, in MB')
+    parser.add_argument('--incremental', action='store_true', \
+    help='only write the files which are not up to date in the output directory')
@@ -79,26 +79,21 @@ class plyblk:
         self.thickness = thickness
 
 
-class node:
-
-    def __init__(self, x, y, z):
-        self.x = x
-        self.y = y
-        self.z = z
-
-
-class edge:
-
-    def __init__(self, nodes):
-        self.nodes = nodes
-
-
-class element:
-
-    def __init__(self, index, nodes, edges):
-        self.index = index
-        self.nodes = nodes
-        self.edges = edges
+class fmesh:
+
+    # array-based mesh of a fnm part; all node, elem and edge no. are 1-based
+    # nodes   : float64 (nnode,3) coords of real and fl. nodes
+    # elabels : int32 (nelem) elem indices in the abaqus input file
+    # elems   : int32 (nelem,elnnode) r+f node connec of elems
+    # eledges : int32 (nelem,elnedge) edge connec of elems; negative if the
+    #           elem edge is in rev. dir. of the saved edge
+    # edges   : int32 (nedge,4) nodes of edges: 2 real, 2 fl.
+    def __init__(self, nodes, elabels, elems, eledges, edges):
+        self.nodes   = nodes
+        self.elabels = elabels
+        self.elems   = elems
+        self.eledges = eledges
+        self.edges   = edges
 
    
 class nset:
@@ -124,13 +119,10 @@ class opart:
         
 class fpart:
 
-    def __init__(self, name, layup, nodes, NtN, edges, elems, toprnds, botrnds, nsets, elsets):
+    def __init__(self, name, layup, mesh, toprnds, botrnds, nsets, elsets):
         self.name    = name
         self.layup   = layup
-        self.nodes   = nodes
-        self.NtN     = NtN
-        self.edges   = edges
-        self.elems   = elems
+        self.mesh    = mesh
         self.toprnds = toprnds
         self.botrnds = botrnds
         self.nsets   = nsets
@@ -170,3 +162,73 @@ class assembly:
         self.constraints = constraints
         
 
+
+
+#***************************************************************
+#****************** Define input file classes ******************
+#***************************************************************
+class kwblock:
+
+    # keyword : keyword of the block, e.g. '*Part'; '**' for a comment line,
+    #           and '' for data lines before the first keyword
+    # params  : dict of keyword parameters, e.g. {'name':'fnm'}; lower-case 
+    #           parameter names, '' as the value of a parameter without '='
+    # line    : the raw keyword (or comment) line
+    # lines   : the raw data lines following the keyword line
+    # jstart  : line no. of the keyword line in the input file
+    # jend    : line no. after the last data line of the block
+    def __init__(self, keyword, params, line, lines, jstart, jend):
+        self.keyword = keyword
+        self.params  = params
+        self.line    = line
+        self.lines   = lines
+        self.jstart  = jstart
+        self.jend    = jend
+
+
+
+
+#***************************************************************
+#****************** Define job classes *************************
+#***************************************************************
+class job:
+
+    # jobname   : abaqus job name; the input file is jobname.inp
+    # symmetric : True if the model is a half-laminate with symmetric mid-plane
+    # layup     : list of fibre angles of all plies in the model, from bottom 
+    #             ply to top or mid ply (if the model is half-laminate)
+    # plythick  : thickness of a single ply
+    # pdinterf  : pre-delamination interface, 1 means the first interface from
+    #             the bottom; only used if the fnm part has a predelam elset
+    # minl      : minimum element size in the mesh; None to use that of the mesh
+    # maxl      : maximum element size in the mesh; None to use that of the mesh
+    # fnmbinary : also write binary fnm node, edge & elem files
+    # output    : dict of the output settings of the analysis (see preproc_job);
+    #             None for the default settings
+    # inputs which are None are asked from the user in interactive mode
+    # (except minl, maxl, fnmbinary and output)
+    def __init__(self, jobname=None, symmetric=None, layup=None, plythick=None, \
+                 pdinterf=None, minl=None, maxl=None, fnmbinary=None, output=None):
+        self.jobname   = jobname
+        self.symmetric = symmetric
+        self.layup     = layup
+        self.plythick  = plythick
+        self.pdinterf  = pdinterf
+        self.minl      = minl
+        self.maxl      = maxl
+        self.fnmbinary = fnmbinary
+        self.output    = output
+
+class jobresult:
+
+    # jobname   : abaqus job name
+    # jobdir    : directory of the job outputs
+    # time      : wall time of the preprocessing of the job, in seconds
+    # artifacts : dict of the paths of the generated files; None if failed
+    # error     : message of the failure; None if succeeded
+    def __init__(self, jobname, jobdir, time=0.0, artifacts=None, error=None):
+        self.jobname   = jobname
+        self.jobdir    = jobdir
+        self.time      = time
+        self.artifacts = artifacts
+        self.error     = error
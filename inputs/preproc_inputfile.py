@@ -28,25 +28,30 @@
 
 # glb objects defined for FNM
 from preproc_classes import*
+# streaming tokenizer of abaqus input files
+from preproc_tokenizer import tokenize, find_blocks, find_comments, \
+                              next_comment, block_lines
+# array-based mesh operations
+from preproc_mesh import read_data, form_fmesh, find_nset_edges, surf_masks, \
+                         replicate, laminate_connec, edge_lengths
+# bulk writers of uel and fnm input files
+from preproc_writer import write_nodes, write_elems, write_list, write_pairs, wrap_groups, \
+                           write_bin_nodes, write_bin_edges, write_bin_elems
+# user inputs of preprocessing jobs
+from preproc_job import job_input, job_output, parse_args
+# cache of the FNM-ized fnm part files
+from preproc_cache import cache_key, cache_fetch, cache_store, cachesize
+# state of the previous run, for incremental regeneration
+from preproc_state import state_read, state_write, state_fetch, state_store
 
 import math
+# numpy arrays for the fnm part mesh
+import numpy as np
 # operating system module
 import os, sys
 # shutil module has functions for different kinds of copying
 import shutil
 
-# define get integer
-def GetInteger2():
-    nnn = None
-    while nnn != 1 and nnn !=2:
-        try:
-            s=sys.stdin.readline()
-            nnn = int(s)
-        except ValueError:
-            print ('Invalid Number. Enter integer. ')
-    return nnn
-
-
 #***************************************************************
 #   define parameters
 #***************************************************************
@@ -57,6 +62,9 @@ def GetInteger2():
 # uellinecount  : max no. of entries in a data line in uel input file (16)
 # uellinelength : line length in writing uel input file (max. =80 in *Element)
 # fnmlinelength : line length in writing fnm input file (max. =132)
+# fnmbinary     : also write binary fnm node, edge & elem files (fnm_*.bin),
+#                 read instead of the text files by input_module if present;
+#                 default of the jobs which do not set it
 ndim    = 3
 nprops  = 1
 nsvars  = 1
@@ -64,896 +72,909 @@ uelcode = 308
 uellinecount  = 14
 uellinelength = 70
 fnmlinelength = 120
+fnmbinary     = False
 
 #***************************************************************
-#   fetch original input file and open uel files
-#***************************************************************
-# ask for job name
-jobname      = raw_input('abaqus job name:')
-# abaqus original input file
-abqinputfile = jobname+'.inp'    
-# uel input file     
-uelinputfile = 'uel_'+jobname+'.inp'  
-# uel nodes and elems files, to be included in uel input file
-uelnodesfile = 'uel_nodes.inp'
-uelelemsfile = 'uel_elems.inp'
-# open files
-abq_input = open(abqinputfile,'r')
-uel_input = open(uelinputfile,'w')
-uel_nodes = open(uelnodesfile,'w')
-uel_elems = open(uelelemsfile,'w')
-
-#***************************************************************
-#   Open fnm input files to be written during pre-processing
-#***************************************************************
-fnm_nodes = open('fnm_nodes.txt','w')  # list of all nodes
-fnm_edges = open('fnm_edges.txt','w')  # list of all nodes
-fnm_elems = open('fnm_elems.txt','w')  # list of all elems
-fnm_predelam = open('fnm_predelam.txt','w') # list of all predelam elems and the predelam interf
-fnm_matrix_crack = open('fnm_matrix_crack.txt','w') # matrix crack info
-
-
-
-#***************************************************************
-#       Read Abaqus input file
+#   preprocessing of a job
 #***************************************************************
-
-# Store all lines first
-All_lines = abq_input.readlines()
-
-# Find the length of all lines
-lenAll = len(All_lines)
-
-
-#==================================================
-# READ HEADER SECTION:
-#==================================================
-header  = []    # list of header lines
-header.extend(All_lines[0:5])
-
-
-#==================================================
-# READ PARTS SECTION: 
-# stores all lines of ordinary parts
-# reads info of the fnm part and preprocess the following:
-# - store part's real nodes, elems & its real nodes
-# - find all breakable edges & create fl. nodes for each edge 
-# - add fl. nodes to part's node list & elem's node list
-# - add edges to part's edge list & elem's edge list
-# - store nsets and the associated edges
-# - store elsets
-# ** NOTE **: 
-# - only ONE fnm part is read
-# - only a SINGLE-layer mesh is supported for the fnm part
-# - only ONE type of elem is supported in the fnm part (all elems will be FNM-ized)
-# - only *Node, *Element, *Nset, *Elset sections are supported in the fnm part
-#==================================================
-fnmparts = []    # list of all fnm parts in the model
-ordparts = []    # list of all ordinary parts in the model
-predelam = []    # predelam elset (only one) in the model
-
-# find the line no. of *Part and store in jparts
-jparts = [j for j,line in enumerate(All_lines) if '*Part' in line]
-
-for jp in jparts:
-
-    # read Part name
-    pname = All_lines[jp][12:].rstrip()
+# jb          : the job (see preproc_classes); its inputs which are None are
+#               asked from the user in interactive mode, and are an error
+#               otherwise, so that the job can run unattended (e.g. in a
+#               pool of processes); the used inputs are stored in jb
+# interactive : ask the user for the missing inputs of the job
+# inpdir      : directory of the abaqus input file (default: current dir.)
+# outdir      : directory where the uel & fnm input files are written
+#               (default: current dir.); it is created if it does not exist
+# copydir     : directory where the uel input, nodes & elems files are also 
+#               copied, i.e. the abaqus working dir. (default: no copy)
+# cachedir    : directory of the preprocessing cache (see preproc_cache);
+#               default: no cache
+# cachesize   : max. size of the cache in bytes
+# incremental : do not write again the files of the previous run in outdir
+#               which are up to date (see preproc_state)
+# returns the dict of the absolute paths of the generated files
+def preprocess(jb, interactive=False, inpdir='', outdir='', copydir=None, \
+               cachedir=None, cachesize=cachesize, incremental=False):
+
+    # use the default fnmbinary if it is not set for the job
+    if jb.fnmbinary is None:
+        jb.fnmbinary = fnmbinary
     
-    # if fnm is not a keyword, then this part is an ordinary part, store everything
-    if not ('fnm' in pname):
-        ordparts.append( opart(lines=[]) )
-        for j in range(jp,lenAll):
-            jline = All_lines[j]
-            ordparts[-1].lines.append(jline)
-            # break out of for loop if end of part is reached
-            if('*End Part' in jline):
-                break        
-    
-    # proceed to preprocessing if it is a fnm part
+    # create the output directory
+    if outdir and not os.path.isdir(outdir):
+        os.makedirs(outdir)
+
+    # state of the previous run (only used in incremental mode) and of this run
+    oldstate = {}
+    if incremental:
+        oldstate = state_read(outdir)
+    newstate = {}
+    # files written in this run
+    written  = []
+
+    #***************************************************************
+    #   fetch original input file and open uel files
+    #***************************************************************
+    # job name
+    jobname      = job_input(jb, 'jobname', interactive)
+    # abaqus original input file
+    abqinputfile = os.path.join(inpdir,jobname+'.inp')
+    # uel input file     
+    uelinputfile = os.path.join(outdir,'uel_'+jobname+'.inp')
+    # uel nodes and elems files, to be included in uel input file
+    uelnodesfile = os.path.join(outdir,'uel_nodes.inp')
+    uelelemsfile = os.path.join(outdir,'uel_elems.inp')
+    # open files; the line ends of the abaqus input file are kept as they are
+    # (python 3 would translate them in text mode)
+    if sys.version_info[0] < 3:
+        abq_input = open(abqinputfile,'r')
     else:
-        # check if fnmparts is not more than one
-        if (len(fnmparts) > 1):
-            print("ERROR: more than one fnm part is not yet supported!")
-            sys.exit()
-            
-        # ask for layup from user for this fpart
-        # isSymLam: yes if the laminate layup is symmetric 
-        # rawlayup: layup of the laminate in a list of all plies
-        # blklayup: layup of the laminate in a list of plyblocks
-        rawlayup = []
-        blklayup = []
-
-        # ask if the lamiante layup is symmetric
-        print (" Is the model a half-laminate with symmetric mid-plane:  1=yes  2=no ")
-        isSymLam = GetInteger2()
-
-        # ask for a list of ply angles
-        rawlayup = \
-        input('Enter fibre angles (int/float) of all plies in the model, \
-        from bottom ply to top or mid ply (if the model is half-laminate); \
-        separate each ply by a comma; in case of a single ply, end with a comma:')
-        # check if it is a list and if all elements in the list are numbers
-        while ( (not isinstance(rawlayup, (list,tuple))) or \
-         (not all(isinstance(item, (int,float)) for item in rawlayup)) ):
-            rawlayup = \
-            input('Enter fibre angles (int/float) of all plies in the model, \
-            from bottom ply to top or mid ply (if the model is half-laminate); \
-            separate each ply by a comma; in case of a single ply, end with a comma:')  
-
-        # ask for the thickness of a single ply
-        plythick = \
-        input('Enter the thickness of a single ply (positive real number):')
-        while ( not ( isinstance(plythick, float) and plythick > 0 ) ):
-            plythick = \
-            input('Enter the thickness of a single ply (positive real number):')
-           
-        # find blocked plies and update blklayup
-        # initiate blklayup
-        blklayup.append( plyblk(angle=rawlayup[0], nplies=0, thickness=0.0) )
-        for plyangle in rawlayup:
-            if (plyangle == blklayup[-1].angle):
-                blklayup[-1].nplies += 1
-                blklayup[-1].thickness += plythick
-            else:
-                blklayup.append( plyblk(angle=plyangle, nplies=1, thickness=plythick) )
+        abq_input = open(abqinputfile,'r',newline='')
+
+    #***************************************************************
+    #   Open fnm input files to be written during pre-processing
+    #***************************************************************
+    fnmnodesfile = os.path.join(outdir,'fnm_nodes.txt')
+    fnmedgesfile = os.path.join(outdir,'fnm_edges.txt')
+    fnmelemsfile = os.path.join(outdir,'fnm_elems.txt')
+    fnmpredelamfile = os.path.join(outdir,'fnm_predelam.txt')
+    fnmmatrixcrackfile = os.path.join(outdir,'fnm_matrix_crack.txt')
+    fnmoutputfile = os.path.join(outdir,'fnm_output.txt')
+    # (the files are opened when they are written)
+    # binary fnm input files, written at the end if fnmbinary is set for the job
+    fnm_nodes_bin = os.path.join(outdir,'fnm_nodes.bin')
+    fnm_edges_bin = os.path.join(outdir,'fnm_edges.bin')
+    fnm_elems_bin = os.path.join(outdir,'fnm_elems.bin')
+    # files of the fnm part mesh
+    meshfiles = [uelnodesfile, uelelemsfile, fnmnodesfile, fnmedgesfile, fnmelemsfile]
+    if jb.fnmbinary:
+        meshfiles.extend([fnm_nodes_bin, fnm_edges_bin, fnm_elems_bin])
+
+
+
+    #***************************************************************
+    #       Read Abaqus input file
+    #***************************************************************
+
+    # Read the file in a single pass into an index of keyword blocks;
+    # all sections below are located in this index
+    blocks = tokenize(abq_input)
+
+    # Find the no. of blocks
+    nblocks = len(blocks)
+
+
+    #==================================================
+    # READ HEADER SECTION:
+    #==================================================
+    header  = []    # list of header lines
+    header.extend(block_lines(blocks,0,5)[0:5])
+
+
+    #==================================================
+    # READ PARTS SECTION: 
+    # stores all lines of ordinary parts
+    # reads info of the fnm part and preprocess the following:
+    # - store part's real nodes, elems & its real nodes
+    # - find all breakable edges & create fl. nodes for each edge 
+    # - add fl. nodes to part's node list & elem's node list
+    # - add edges to part's edge list & elem's edge list
+    # - store nsets and the associated edges
+    # - store elsets
+    # ** NOTE **: 
+    # - only ONE fnm part is read
+    # - only a SINGLE-layer mesh is supported for the fnm part
+    # - only ONE type of elem is supported in the fnm part (all elems will be FNM-ized)
+    # - only *Node, *Element, *Nset, *Elset sections are supported in the fnm part
+    #==================================================
+    fnmparts = []    # list of all fnm parts in the model
+    ordparts = []    # list of all ordinary parts in the model
+    predelam = []    # predelam elset (only one) in the model
+
+    # find the block no. of *Part and store in bparts
+    bparts = find_blocks(blocks,'*Part')
+
+    for bp in bparts:
+
+        # read Part name
+        pname = blocks[bp].params.get('name','')
+
+        # find the block no. of the end of this part
+        bpend = next( b for b in range(bp,nblocks) if blocks[b].keyword.lower() == '*end part' )
+
+        # if fnm is not a keyword, then this part is an ordinary part, store everything
+        if not ('fnm' in pname):
+            ordparts.append( opart(lines=block_lines(blocks,bp,bpend+1)) )
+
+        # proceed to preprocessing if it is a fnm part
+        else:
+            # check if fnmparts is not more than one
+            if (len(fnmparts) > 1):
+                print("ERROR: more than one fnm part is not yet supported!")
+                sys.exit()
 
-        # if the laminate is symmetric, change the nplies for the last plyblk
-        if (isSymLam == 1):
-            blklayup[-1].nplies = 2 * blklayup[-1].nplies
-    
-        # create a new part in parts list
-        fnmparts.append(fpart(name=pname, layup=blklayup, nodes=[], NtN=[], \
-        edges=[], elems=[], toprnds=[], botrnds=[], nsets=[], elsets=[]))
-        
-        # find the line of *Node, *Element, *Nset, *Elset
-        # ** NOTE: 
-        # only ONE Node section (default)
-        # only ONE type of elem is supported; all elems in this part will be FNM-ized
-        # nset can be multiple
-        # only ONE elset, which is the predelam elset, is supported
-        jpend  = next( j for j in range(jp,lenAll) if '*End Part'in All_lines[j] )
-        jnode  = next( j for j in range(jp,jpend)  if '*Node'    in All_lines[j] )
-        jelems =     [ j for j in range(jp,jpend)  if '*Element' in All_lines[j] ]
-        jnsets =     [ j for j in range(jp,jpend)  if '*Nset'    in All_lines[j] and 'internal' not in All_lines[j] ]
-        jlsets =     [ j for j in range(jp,jpend)  if '*Elset'   in All_lines[j] and 'internal' not in All_lines[j] ]
-        
-        # report error if multiple elem defs exist in this fnm part
-        if (len(jelems) != 1):
-            print("ERROR: exactly ONE type of elem is supported in fnm part!")
-            sys.exit()
-        
-        # report error if multiple elset defs exist in this fnm part
-        if (len(jlsets) > 1):
-            print("ERROR: exactly ONE elset, predelam, is supported in fnm part!")
-            sys.exit()
-        
-        # report error if the elset is not named predelam
-        if (len(jlsets) == 1):
-            if not ('predelam' in All_lines[jlsets[0]]):
-                print("ERROR: only the elset named predelam is supported in fnm part!")
+            # get the layup of this fpart from the job
+            # symmetric: yes if the laminate layup is symmetric 
+            # rawlayup : layup of the laminate in a list of all plies
+            # blklayup : layup of the laminate in a list of plyblocks
+            blklayup  = []
+            symmetric = job_input(jb, 'symmetric', interactive)
+            rawlayup  = job_input(jb, 'layup',     interactive)
+            plythick  = job_input(jb, 'plythick',  interactive)
+
+            # find blocked plies and update blklayup
+            # initiate blklayup
+            blklayup.append( plyblk(angle=rawlayup[0], nplies=0, thickness=0.0) )
+            for plyangle in rawlayup:
+                if (plyangle == blklayup[-1].angle):
+                    blklayup[-1].nplies += 1
+                    blklayup[-1].thickness += plythick
+                else:
+                    blklayup.append( plyblk(angle=plyangle, nplies=1, thickness=plythick) )
+
+            # if the laminate is symmetric, change the nplies for the last plyblk
+            if symmetric:
+                blklayup[-1].nplies = 2 * blklayup[-1].nplies
+
+            # create a new part in parts list
+            fnmparts.append(fpart(name=pname, layup=blklayup, mesh=None, \
+            toprnds=None, botrnds=None, nsets=[], elsets=[]))
+
+            # look up the files of the FNM-ized mesh of this part in the output 
+            # dir. (incremental mode), then in the cache; the key is the hash of 
+            # the raw lines of the part block, the layup and the parameters of 
+            # the uel & fnm files
+            meshkey = cache_key( block_lines(blocks,bp,bpend+1) + \
+            [ (blk.angle, blk.nplies, blk.thickness) for blk in blklayup ] + \
+            [ndim, nprops, nsvars, uelcode, uellinecount, uellinelength, jb.fnmbinary] )
+            cached = state_fetch(oldstate, 'mesh', meshkey, meshfiles)
+            if cached is None and cachedir is not None:
+                cached = cache_fetch(cachedir, meshkey, outdir)
+                if cached is not None:
+                    written.extend(meshfiles)
+
+            # find the line of *Node, *Element, *Nset, *Elset
+            # ** NOTE: 
+            # only ONE Node section (default)
+            # only ONE type of elem is supported; all elems in this part will be FNM-ized
+            # nset can be multiple
+            # only ONE elset, which is the predelam elset, is supported
+            bnode  =       find_blocks(blocks,'*Node',   bp,bpend)[0]
+            belems =       find_blocks(blocks,'*Element',bp,bpend)
+            bnsets = [ b for b in find_blocks(blocks,'*Nset', bp,bpend) if 'internal' not in blocks[b].params ]
+            blsets = [ b for b in find_blocks(blocks,'*Elset',bp,bpend) if 'internal' not in blocks[b].params ]
+
+            # report error if multiple elem defs exist in this fnm part
+            if (len(belems) != 1):
+                print("ERROR: exactly ONE type of elem is supported in fnm part!")
                 sys.exit()
-        
-        # read real(original) nodes of this part 
-        for jn in range(jnode+1,jpend):
-            nline = All_lines[jn]
-            # break out of for loop if end of node section is reached
-            if('*' in nline):
-                break
-            # read the coords of this node into a list of float numbers
-            coords = []
-            for t in nline.split(','):
-                try:
-                    coords.append(float(t))
-                except ValueError:
-                    pass
-            # store the coords in nodes list of this part
-            fnmparts[-1].nodes.append(node(x=coords[1], y=coords[2], z=coords[3]))
-            # update the node-to-node (NtN) matrix row length
-            fnmparts[-1].NtN.append([])
-        ##check node correctness
-        #for nd in fnmparts[-1].nodes:
-        #    print(str(nd.x)+','+str(nd.y)+','+str(nd.z))
-        
-        # append the NtN matrix column to the correct length (nnode)
-        for r in range(len(fnmparts[-1].NtN)):
-            fnmparts[-1].NtN[r] = [0]*len(fnmparts[-1].NtN)
-            
-        # read elems of this part
-        jelem = jelems[0]
-        for je in range(jelem+1,jpend):
-            eline = All_lines[je]
-            # break out of for loop if end of elem section is reached
-            if('*' in eline):
-                break
-            # read the index and real nodes of this elem into a list of int numbers
-            el = []
-            for t in eline.split(','):
-                try:
-                    el.append(int(t))
-                except ValueError:
-                    pass
-            id  = el[0]  # elem index
-            nds = el[1:] # elem real nodes
-            # store the index and real nodes in elem list of this part
-            fnmparts[-1].elems.append(element(index=id, nodes=nds, edges=[]))
-            # update the top and bot surf real nodes lists
-            halfnds = len(nds)/2
-            for j in range(halfnds):
-                # bot surf real nodes
-                if not(nds[j] in fnmparts[-1].botrnds):
-                    fnmparts[-1].botrnds.append(nds[j])
-                # top surf real nodes
-                if not(nds[halfnds+j] in fnmparts[-1].toprnds):
-                    fnmparts[-1].toprnds.append(nds[halfnds+j])
-            # form edges
-            # in 3D FNM for composites, only edges parallel to shell plane are breakable
-            # j = 0: bottom edges; 
-            # j = 1: top edges
-            for j in range(2):
-                # j = 0: loop over real nodes on bot surf
-                # j = 1: loop over real nodes on top surf
-                for i in range(halfnds):
-                    # ith node on surf j
-                    row = nds[ j*halfnds + i ] - 1
-                    # (i+1)th node on surf j; 
-                    # if i is the last node, i+1 is the first node
-                    if i == halfnds-1:
-                        col = nds[ j*halfnds ] - 1
-                    else:
-                        col = nds[ j*halfnds + i + 1 ] - 1
-                    # fill in the NtN matrix:
-                    # fill in the edge index composed of the two end nodes
-                    if fnmparts[-1].NtN[row][col]==0:
-                    # this pair of nodes hasn't formed an edge
-                    # a new edge will be formed
-                        # indices of 2 fl. nodes on this new edge
-                        # they are two new nodes to be added in the part's node list
-                        fn1 = len(fnmparts[-1].nodes)
-                        fn2 = fn1 + 1
-                        fnmparts[-1].nodes.append( node(0.0,0.0,0.0) )
-                        fnmparts[-1].nodes.append( node(0.0,0.0,0.0) )
-                        # form a new edge and append to existing list of edges 
-                        # the new edge has 4 nodes: 2 real, 2 floating
-                        fnmparts[-1].edges.append(edge(nodes=[row+1,col+1,fn1+1,fn2+1]))
-                        # fill the new edge index in the NtN matrix
-                        # nodes in rev. order makes the same edge in rev. dir.
-                        fnmparts[-1].NtN[row][col] =  len(fnmparts[-1].edges)
-                        fnmparts[-1].NtN[col][row] = -len(fnmparts[-1].edges)
-                        # append this edge no. in this elem
-                        fnmparts[-1].elems[-1].edges.append(fnmparts[-1].NtN[row][col]) 
-                        # append the fl. nodes in this elem
-                        fnmparts[-1].elems[-1].nodes.extend([fn1+1,fn2+1])
-                    else:
-                    # this pair of nodes has already formed an edge
-                        eg = fnmparts[-1].NtN[row][col]
-                        # append this edge no. in this elem 
-                        fnmparts[-1].elems[-1].edges.append(eg)
-                        # find the two fl. nodes on this edge
-                        fn1 = fnmparts[-1].edges[abs(eg)-1].nodes[2]
-                        fn2 = fnmparts[-1].edges[abs(eg)-1].nodes[3]
-                        # append the fl. nodes in this elem
-                        # edge is in the same order as saved
-                        if eg > 0:
-                            fnmparts[-1].elems[-1].nodes.extend([fn1,fn2])
-                        # edge is in the rev. order as saved
-                        else:
-                            fnmparts[-1].elems[-1].nodes.extend([fn2,fn1])
-        
-        ##check elem correctness
-        #for el in fnmparts[-1].elems:
-        #    print(str(el.index)+','+str(el.nodes)+','+str(el.edges))
-        ##check NtN
-        #print(str(fnmparts[-1].NtN))
-        
-        # read nsets of this part
-        for jns in jnsets:
-            nline = All_lines[jns].rstrip()
-            # remove 'generate' in the line if present
-            if ('generate' in All_lines[jns]):
-                nline = All_lines[jns].replace(', generate','').rstrip()
-            # add this nset in the list of nsets in this fpart
-            fnmparts[-1].nsets.append( nset( name=nline, rnodes=[], edges=[] ) )
-            # read nodes in the nset
-            # if generate is used, then calculate all nodes;
-            # otherwise, read all nodes directly
-            if ('generate' in All_lines[jns]):
-                nline = All_lines[jns+1]
-                nl = []
-                for t in nline.split(','):
-                    try:
-                        nl.append(int(t))
-                    except ValueError:
-                        pass
-                nds = nl[0] # start node
-                ndf = nl[1] # final node
-                try:
-                    itv = nl[2] # interval
-                except IndexError:
-                    itv = 1
-                for n in range(nds,ndf+1,itv):
-                    fnmparts[-1].nsets[-1].rnodes.append(n)
-            else:
-                # read the lines of nodes in this nset
-                nl = [] # list of node to be filled
-                for n in range(jns+1,jpend):
-                    nline = All_lines[n]
-                    # break out of loop if end of section encountered
-                    if ('*' in nline):
-                        break
-                    for t in nline.split(','):
+
+            # report error if multiple elset defs exist in this fnm part
+            if (len(blsets) > 1):
+                print("ERROR: exactly ONE elset, predelam, is supported in fnm part!")
+                sys.exit()
+
+            # report error if the elset is not named predelam
+            if (len(blsets) == 1):
+                if not ('predelam' in blocks[blsets[0]].line):
+                    print("ERROR: only the elset named predelam is supported in fnm part!")
+                    sys.exit()
+
+            # FNM-ize the mesh of this part, unless its files are in the cache
+            if cached is None:
+
+                # read real(original) nodes of this part; 
+                # node indices are not stored, nodes are assumed to be numbered 1 to nnode
+                coords = read_data(blocks[bnode].lines, float)[:,1:4]
+
+                # read elems of this part: the index and real nodes of each elem
+                el = read_data(blocks[belems[0]].lines, int)
+
+                # form the edges and fl. nodes of all elems in bulk, 
+                # and store the fnm mesh of this part
+                fnmparts[-1].mesh = form_fmesh(elabels=el[:,0], coords=coords, rnodes=el[:,1:])
+
+                # update the top and bot surf real nodes masks
+                halfnds = (el.shape[1]-1)//2
+                fnmparts[-1].botrnds, fnmparts[-1].toprnds = surf_masks(fnmparts[-1].mesh, halfnds)
+
+                # read nsets of this part
+                for bns in bnsets:
+                    nline = blocks[bns].line.rstrip()
+                    # remove 'generate' in the line if present
+                    if ('generate' in blocks[bns].params):
+                        nline = blocks[bns].line.replace(', generate','').rstrip()
+                    # add this nset in the list of nsets in this fpart
+                    fnmparts[-1].nsets.append( nset( name=nline, rnodes=[], edges=[] ) )
+                    # read nodes in the nset
+                    # if generate is used, then calculate all nodes;
+                    # otherwise, read all nodes directly
+                    if ('generate' in blocks[bns].params):
+                        nline = blocks[bns].lines[0]
+                        nl = []
+                        for t in nline.split(','):
+                            try:
+                                nl.append(int(t))
+                            except ValueError:
+                                pass
+                        nds = nl[0] # start node
+                        ndf = nl[1] # final node
                         try:
-                            nl.append(int(t))
-                        except ValueError:
-                            pass
-                fnmparts[-1].nsets[-1].rnodes.extend(nl)
-            # find the edges involved in this nset, 
-            # and include the fl. nodes in the nset
-            # extract this nset from fpart
-            nst = fnmparts[-1].nsets[-1]
-            # loop over all node pairs in this nset
-            for n1 in range(len(nst.rnodes)-1):
-                for n2 in range(n1+1,len(nst.rnodes)):
-                    rnd = nst.rnodes[n1]-1
-                    cnd = nst.rnodes[n2]-1
-                    # if this node pair forms an edge
-                    if (fnmparts[-1].NtN[rnd][cnd]!=0):
-                        # get this edge number
-                        eg = abs(fnmparts[-1].NtN[rnd][cnd])
-                        #print(' node '+str(rnd)+' node '+str(cnd)+' forms edge '+str(eg))
-                        # store this edge in the nset
-                        nst.edges.append(eg)
-            # update this nset in fpart
-            fnmparts[-1].nsets[-1] = nst 
-        
-        # read the predelam elset of the fnm part
-        for jels in jlsets:
-            eline = All_lines[jels].rstrip()
-            # remove 'generate' in the line if present
-            if ('generate' in All_lines[jels]):
-                eline = All_lines[jels].replace(', generate','').rstrip()
-            # add this elset in the list of elsets in this fpart
-            fnmparts[-1].elsets.append( elset( name=eline, elems=[] ) )
-            # read elems in the elset
-            # if generate is used, then calculate all elems;
-            # otherwise, read all elems directly
-            if ('generate' in All_lines[jels]):
-                eline = All_lines[jels+1]
-                el = []
-                for t in eline.split(','):
-                    try:
-                        el.append(int(t))
-                    except ValueError:
-                        pass
-                els = el[0] # start elem
-                elf = el[1] # final elem
-                try:
-                    itv = el[2] # interval
-                except IndexError:
-                    itv = 1
-                for e in range(els,elf+1,itv):
-                    fnmparts[-1].elsets[-1].elems.append(e)
-            else:
-                # read the lines of nodes in this nset
-                el = [] # list of elems to be filled
-                for e in range(jels+1,jpend):
-                    eline = All_lines[e]
-                    # break out of loop if end of section encountered
-                    if ('*' in eline):
-                        break
+                            itv = nl[2] # interval
+                        except IndexError:
+                            itv = 1
+                        for n in range(nds,ndf+1,itv):
+                            fnmparts[-1].nsets[-1].rnodes.append(n)
+                    else:
+                        # read the lines of nodes in this nset
+                        nl = [] # list of node to be filled
+                        for nline in blocks[bns].lines:
+                            for t in nline.split(','):
+                                try:
+                                    nl.append(int(t))
+                                except ValueError:
+                                    pass
+                        fnmparts[-1].nsets[-1].rnodes.extend(nl)
+                    # find the edges involved in this nset, 
+                    # and include the fl. nodes in the nset
+                    fnmparts[-1].nsets[-1].edges = \
+                    find_nset_edges(fnmparts[-1].mesh, fnmparts[-1].nsets[-1].rnodes)
+
+            # read the predelam elset of the fnm part
+            for bels in blsets:
+                eline = blocks[bels].line.rstrip()
+                # remove 'generate' in the line if present
+                if ('generate' in blocks[bels].params):
+                    eline = blocks[bels].line.replace(', generate','').rstrip()
+                # add this elset in the list of elsets in this fpart
+                fnmparts[-1].elsets.append( elset( name=eline, elems=[] ) )
+                # read elems in the elset
+                # if generate is used, then calculate all elems;
+                # otherwise, read all elems directly
+                if ('generate' in blocks[bels].params):
+                    eline = blocks[bels].lines[0]
+                    el = []
                     for t in eline.split(','):
                         try:
                             el.append(int(t))
                         except ValueError:
                             pass
-                fnmparts[-1].elsets[-1].elems.extend(el)
-            # store the elset in the predelam list
-            predelam.append(fnmparts[-1].elsets[-1])
-
-# check if fnmparts is one
-if (len(fnmparts) != 1):
-    print("ERROR: exactly one fnm part is supported!")
-    sys.exit()        
-
-#==================================================
-# read assembly section:
-# - only a single assembly is supported
-#==================================================
-assembly = []
-
-# find the line no. of *Assembly and store in jassemblies
-jassemblies = [j for j,line in enumerate(All_lines) if '*Assembly' in line]
-if (len(jassemblies)!=1):
-    print("ERROR: exactly ONE assembly is supported!")
-    sys.exit()
-
-# copy everything of the assembly
-ja = jassemblies[0]
-for j in range(ja,lenAll):
-    jline = All_lines[j]
-    assembly.append(jline)
-    if '*End Assembly' in jline:
-        break
-#print(assembly)
-
-#==================================================
-# read material section:
-#==================================================
-materials = []
-
-# find the line no. of *Material
-jmaterials = [j for j,line in enumerate(All_lines) if '*Material' in line]
-
-# copy everything of the material after the 1st line starting with '*Material'
-for ij,jmat in enumerate(jmaterials):
-    # break out if it goes to the 2nd *Material line.
-    if ij == 1:
-        break
-    for j in range(jmat,lenAll):
-        jline = All_lines[j]
-        materials.append(jline)
-        if '**' in jline:
-            break
-
-#==================================================
-# read interaction property section:
-#==================================================
-interaction_props = []
-
-# find the line no. of *Surface Interaction and store
-jinteraction_props = [j for j,line in enumerate(All_lines) if '*Surface Interaction' in line]
-
-# copy everything of the section
-for jintp in jinteraction_props:
-    for j in range(jintp,lenAll):
-        jline = All_lines[j]
-        interaction_props.append(jline)
-        if '**' in jline:
-            break
-
-#==================================================
-# read initial boundary conditions and interaction:
-#==================================================
-bcds  = []       # list of all initial boundary conditions
-interaction = [] # the initial interaction
-
-# find the first separation line '** -------------' which separates initial step with the 
-# other steps
-jdash = next(j for j,line in enumerate(All_lines) \
-if '** ----------------------------------------------------------------' in line)
-
-# find the lines with *boundary
-jbcds = [j for j in range(0,jdash) if '*Boundary' in All_lines[j]]
-
-# find the line with ** Interaction:
-jinteraction = [j for j, line in enumerate(All_lines) if '** Interaction:' in line]
-
-# loop over all bcds, store them without modification
-for jb in jbcds:
-    for k in range(jb,jdash):
-        bline = All_lines[k]
-        if ('**' in bline):
-            break
-        bcds.append(bline)
-        
-# store interaction without modification
-if (len(jinteraction) > 0):
-    for k in range(jinteraction[0]+1, jdash):
-        iline = All_lines[k]
-        if ('**' in iline):
-            break
-        interaction.append(iline)
-    
-#print(bcds)
-
-
-#==================================================
-# read steps and
-# add control parameters
-#==================================================
-steps  = []
-jsteps = [j for j, line in enumerate(All_lines) if '*Step' in line]
-for jstep in jsteps:
-    for j in range(jstep,lenAll):
-        jline = All_lines[j]
-        if ('*End Step' in jline):
-            # add control parameters
-            steps.append('*Controls, reset\n')
-            steps.append('*Controls, parameters=time incrementation\n')
-            steps.append('3200, 4000, , 6000, 4800, 50, , 125, , , \n')
-            steps.append('**\n')
-            steps.append(jline)
-            break
-        steps.append(jline)
-#print(step)
-
-   
-
+                    els = el[0] # start elem
+                    elf = el[1] # final elem
+                    try:
+                        itv = el[2] # interval
+                    except IndexError:
+                        itv = 1
+                    for e in range(els,elf+1,itv):
+                        fnmparts[-1].elsets[-1].elems.append(e)
+                else:
+                    # read the lines of nodes in this nset
+                    el = [] # list of elems to be filled
+                    for eline in blocks[bels].lines:
+                        for t in eline.split(','):
+                            try:
+                                el.append(int(t))
+                            except ValueError:
+                                pass
+                    fnmparts[-1].elsets[-1].elems.extend(el)
+                # store the elset in the predelam list
+                predelam.append(fnmparts[-1].elsets[-1])
+
+    # check if fnmparts is one
+    if (len(fnmparts) != 1):
+        print("ERROR: exactly one fnm part is supported!")
+        sys.exit()        
+
+    #==================================================
+    # read assembly section:
+    # - only a single assembly is supported
+    #==================================================
+    assembly = []
+
+    # find the block no. of *Assembly and store in bassemblies
+    bassemblies = find_blocks(blocks,'*Assembly')
+    if (len(bassemblies)!=1):
+        print("ERROR: exactly ONE assembly is supported!")
+        sys.exit()
+
+    # copy everything of the assembly
+    ba    = bassemblies[0]
+    baend = next( (b for b in range(ba,nblocks) if blocks[b].keyword.lower() == '*end assembly'), nblocks-1 )
+    assembly.extend(block_lines(blocks,ba,baend+1))
+    #print(assembly)
+
+    #==================================================
+    # read material section:
+    #==================================================
+    materials = []
+
+    # find the block no. of *Material
+    bmaterials = find_blocks(blocks,'*Material')
+
+    # copy everything of the material after the 1st line starting with '*Material',
+    # up to and including the next comment line
+    for bmat in bmaterials[0:1]:
+        bend = next_comment(blocks,bmat)
+        materials.extend(block_lines(blocks,bmat,bend))
+        materials.extend([blk.line for blk in blocks[bend:bend+1]])
+
+    #==================================================
+    # read interaction property section:
+    #==================================================
+    interaction_props = []
+
+    # find the block no. of *Surface Interaction and store
+    binteraction_props = find_blocks(blocks,'*Surface Interaction')
+
+    # copy everything of the section, up to and including the next comment line
+    for bintp in binteraction_props:
+        bend = next_comment(blocks,bintp)
+        interaction_props.extend(block_lines(blocks,bintp,bend))
+        interaction_props.extend([blk.line for blk in blocks[bend:bend+1]])
+
+    #==================================================
+    # read initial boundary conditions and interaction:
+    #==================================================
+    bcds  = []       # list of all initial boundary conditions
+    interaction = [] # the initial interaction
+
+    # find the first separation line '** -------------' which separates initial step with the 
+    # other steps
+    bdash = find_comments(blocks,'** ----------------------------------------------------------------')[0]
+
+    # find the blocks with *boundary
+    bbcds = find_blocks(blocks,'*Boundary',0,bdash)
+
+    # find the block with ** Interaction:
+    binteraction = find_comments(blocks,'** Interaction:')
+
+    # loop over all bcds, store them without modification
+    for bb in bbcds:
+        bcds.extend(block_lines(blocks,bb,next_comment(blocks,bb,bdash)))
+
+    # store interaction without modification
+    if (len(binteraction) > 0) and (binteraction[0] < bdash):
+        bi = binteraction[0]
+        interaction.extend(block_lines(blocks,bi,next_comment(blocks,bi+1,bdash))[1:])
+
+    #print(bcds)
+
+
+    #==================================================
+    # read steps and
+    # add control parameters
+    #==================================================
+    steps  = []
+    bsteps = find_blocks(blocks,'*Step')
+    for bstep in bsteps:
+        bend = next( b for b in range(bstep,nblocks) if blocks[b].keyword.lower() == '*end step' )
+        steps.extend(block_lines(blocks,bstep,bend))
+        # add control parameters
+        steps.append('*Controls, reset\n')
+        steps.append('*Controls, parameters=time incrementation\n')
+        steps.append('3200, 4000, , 6000, 4800, 50, , 125, , , \n')
+        steps.append('**\n')
+        steps.append(blocks[bend].line)
+    #print(step)
+
+
+
+
+    #***************************************************************
+    #       write uel & fnm files of the fnm part mesh
+    #***************************************************************  
+    # extract layup of the fnm part
+    blklayup = fnmparts[0].layup
+    # find no. of plyblocks
+    nplyblk = len(blklayup)
+
+    # FNM-ize the fnm part mesh and write its files, 
+    # unless they have been found in the preprocessing cache
+    if cached is None:
+
+        # open the uel and fnm files of the fnm part mesh
+        uel_nodes = open(uelnodesfile,'w')
+        uel_elems = open(uelelemsfile,'w')
+        fnm_nodes = open(fnmnodesfile,'w')  # list of all nodes
+        fnm_edges = open(fnmedgesfile,'w')  # list of all nodes
+        fnm_elems = open(fnmelemsfile,'w')  # list of all elems
+
+        # extract the mesh of the fnm part
+        mesh_p  = fnmparts[0].mesh
+        # find no. of nodes and edges in a ply of this mesh
+        nnode_p = mesh_p.nodes.shape[0]
+        nedge_p = mesh_p.edges.shape[0]
+        # find internal nodes for an interface of this mesh
+        nnodein = nedge_p
+        # find the total no. of nodes in this mesh
+        nnodett = nplyblk * nnode_p + (nplyblk-1) * nnodein
+
+        # write fnm_nodes 1st line: nnode
+        fnm_nodes.write(str(nnodett)+' \n')
+
+        # list of node coords arrays of all plyblks, for the binary node file
+        xyz_l = []
+
+        for ipb in range(nplyblk):
+            # calculate the bot and top real node z-coordinate
+            # zbot = 0 if this is the 1st plyblk
+            if (ipb == 0):
+                zbot = 0.0
+            # zbot = thickness of last plyblk
+            else:
+                zbot = zbot + blklayup[ipb-1].thickness
+            # ztop = zbot + thickness of this plyblk
+            ztop = zbot + blklayup[ipb].thickness
+            # z-coords of all nodes in the single ply mesh on this plyblk:
+            # zbot for real nodes on the bot surf, ztop for real nodes on the top surf,
+            # and 0 for fl. nodes; bot/toprnds masks are for nodes in 1st plyblk
+            z_p = np.where(fnmparts[0].botrnds, zbot, \
+                  np.where(fnmparts[0].toprnds, ztop, 0.0))
+            # write all nodes of the single ply mesh on this plyblk in uel_nodes.inp 
+            # and fnm node_list; node ids on the ith plyblk start after ipb * nnode_p
+            xyz_l.append(np.column_stack((mesh_p.nodes[:,0:2], z_p)))
+            write_nodes(uel_nodes, fnm_nodes, xyz_l[-1].tolist(), ipb * nnode_p)
+
+        # write the additional nodes of interfaces if they're present
+        # each edge in the base ply mesh has one additional node on each interface
+        if (nplyblk > 1):
+            xyz_l.append(np.zeros(((nplyblk-1) * nedge_p, 3)))
+            write_nodes(uel_nodes, fnm_nodes, xyz_l[-1].tolist(), nplyblk * nnode_p)
+
+
+        #***************************************************************
+        #       write edges
+        #*************************************************************** 
+        # find the total no. of edges in this mesh
+        nedgett = nplyblk * nedge_p  
+        fnm_edges.write(str(nedgett)+' \n')
+
+        # list of all bcd edges, for the binary edge file
+        ties = []
+
+        # update bcd edges
+        for nst in fnmparts[0].nsets:
+            # only constrain the edges in nst with keyword 'tie'
+            if ('tie' in nst.name):
+                # if all the real nodes in this nst are on the bot surface, then
+                # only store the bot plyblk nodes, DO NOT include the other plies
+                if fnmparts[0].botrnds[np.array(nst.rnodes,dtype=int)-1].all():
+                    pstart = 0
+                    pend   = 1
+                # if all the real nodes in this nst are on the top surface, then
+                # only store the top plyblk nodes, DO NOT include the other plies
+                elif fnmparts[0].toprnds[np.array(nst.rnodes,dtype=int)-1].all():
+                    pstart = nplyblk-1
+                    pend   = nplyblk
+                # otherwise, store corresponding nodes of all plyblks
+                else:
+                    pstart = 0
+                    pend   = nplyblk
+                # find the bcd edges on plyblks pstart to pend-1
+                ties.extend(replicate(nst.edges, nedge_p, pend-pstart, pstart).tolist())
+        write_list(fnm_edges, ties)
+        # mark end of file with -1
+        fnm_edges.write('-1 \n')
+
+        #***************************************************************
+        #       write elems
+        #***************************************************************   
+        # find no. of elems in a ply mesh
+        nelem_p = mesh_p.elems.shape[0]
+        # find total no. of elems in the laminate
+        # it is the same as nelem_p, as a fnm elem contains all plies&interfs
+        nelemtt = nelem_p
+        # find the no. of r+f nodes in an elem of a single plyblk
+        elnndrf_p = mesh_p.elems.shape[1]
+        # find the no. of edges in an elem of a single plyblk
+        elnedge_p = mesh_p.eledges.shape[1]
+        # find the no. of real nodes in an elem of a single plyblk: the r+f
+        # nodes less the 2 fl. nodes of each edge (see form_fmesh)
+        elnndr_p  = elnndrf_p - 2*elnedge_p
+        # find the no. of r+f nodes in an elem of the laminate
+        elnndrf_l = elnndrf_p * nplyblk
+        # find the no. of interface internal nodes in an elem of the laminate
+        elnndin_l = elnedge_p * (nplyblk-1)
+        # find the total no. of nodes in an elem of the laminate
+        elnndtt_l = elnndrf_l + elnndin_l
+        # find the no. of edges in an elem of the laminate
+        elnedge_l = elnedge_p * nplyblk
+
+        fnm_elems.write(str(nelemtt)+' '+str(elnndtt_l)+' '+str(elnedge_l)+' \n')
+
+        # find the extent of the mesh along the crack normal of each plyblock
+        # (see matrix_crack_module), from the coords of the real nodes of the
+        # elems
+        xy_r  = mesh_p.nodes[np.unique(mesh_p.elems[:,0:elnndr_p])-1, 0:2]
+        theta = np.array([ blk.angle for blk in blklayup ], dtype=float) / 180.0 * math.pi
+        offsets  = np.dot(xy_r, np.array([-np.sin(theta), np.cos(theta)]))
+        crackext = (offsets.max(axis=0) - offsets.min(axis=0)).tolist()
+
+        # find the in-plane area of the mesh, the sum of the areas of the
+        # bottom faces of the elems (their first half of real nodes, in order)
+        xb   = mesh_p.nodes[mesh_p.elems[:,0:elnndr_p//2]-1, 0]
+        yb   = mesh_p.nodes[mesh_p.elems[:,0:elnndr_p//2]-1, 1]
+        area = float(np.sum(np.abs(np.sum(xb*np.roll(yb,-1,axis=1) - \
+                                          np.roll(xb,-1,axis=1)*yb, axis=1)))/2.0)
+
+        # find the min. and max. elem sizes of the mesh: the min. and max.
+        # in-plane lengths of the elem edges; report their distribution
+        lengths  = edge_lengths(mesh_p)
+        elemsize = [ float(lengths.min()), float(lengths.max()) ]
+        print('edge lengths of the fnm part mesh: min %g, 5%% %g, median %g, 95%% %g, max %g' \
+        % tuple(np.percentile(lengths, [0, 5, 50, 95, 100])))
+
+        # find the r+f nodes & edges of all elems in the laminate,
+        # incl. the internal nodes of interfs
+        elnds_l_all, elegs_l_all = laminate_connec(mesh_p, nplyblk)
+
+        fnm_elems.write(str(nplyblk)+' \n')
+        # write layup array
+        for jpb in range(nplyblk):
+            angle  = str(blklayup[jpb].angle)
+            nplies = str(blklayup[jpb].nplies)
+            fnm_elems.write(angle+' '+nplies+' \n')
+
+        #**** write elem's nodal and edge connec to uel&fnm_elems ****
+        write_elems(uel_elems, fnm_elems, elnds_l_all.tolist(), elegs_l_all.tolist(), \
+        uellinelength, uellinecount)
+
+
+
+        #***************************************************************
+        #       write binary fnm input files
+        #*************************************************************** 
+        if jb.fnmbinary:
+            write_bin_nodes(fnm_nodes_bin, np.vstack(xyz_l))
+            write_bin_edges(fnm_edges_bin, nedgett, ties)
+            write_bin_elems(fnm_elems_bin, [blk.angle for blk in blklayup], \
+            [blk.nplies for blk in blklayup], elnds_l_all, elegs_l_all)
+
+
+        #***************************************************************
+        #       fnm part section of the uel input file
+        #***************************************************************
+        # the lines of the fnm part section of the uel input file
+        fnmsection = []
+        # part name 
+        fnmsection.append('*Part, name='+fnmparts[0].name+'\n')
+        # part nodes
+        fnmsection.append('*NODE,INPUT=uel_nodes.inp    \n')
+        # user element definition
+        fnmsection.append('*USER ELEMENT, TYPE=U'+str(uelcode)+\
+        ', NODES='+str(elnndtt_l)+', COORDINATES='+str(ndim)+\
+        ', PROPERTIES='+str(nprops)+', VARIABLES='+str(nsvars)+'\n')
+        fnmsection.append('1,2,3\n')
+        # elements and fnm elset
+        fnmsection.append('*ELEMENT, TYPE=U'+str(uelcode)+', ELSET=fnm, INPUT=uel_elems.inp \n')
+        # write the mandatory uel property line (not needed for calculation)
+        fnmsection.append('*UEL PROPERTY, ELSET=fnm\n')
+        fnmsection.append('1\n')
+        # elset (predelam) does not need to be written here in uel input    
+        # nsets
+        nsets  = fnmparts[0].nsets
+        # nodes of all edges in the single ply mesh
+        edges_p = mesh_p.edges.tolist()
+        for nst in nsets:
+            # write the nset name
+            fnmsection.append(nst.name+'\n')
+            # nst entries for uel_input, to be filled
+            nstgroups = []
+            # if all the real nodes in this nst are on the bot surface, then
+            # only store the bot plyblk nodes, DO NOT include the other plies
+            if fnmparts[0].botrnds[np.array(nst.rnodes,dtype=int)-1].all():
+                pstart = 0
+                pend   = 1
+            # if all the real nodes in this nst are on the top surface, then
+            # only store the top plyblk nodes, DO NOT include the other plies
+            elif fnmparts[0].toprnds[np.array(nst.rnodes,dtype=int)-1].all():
+                pstart = nplyblk-1
+                pend   = nplyblk
+            # otherwise, store corresponding nodes of all plyblks
+            else:
+                pstart = 0
+                pend   = nplyblk
+            # find nst nodes in plyblks
+            for jpb in range(pstart,pend):
+                # add the real nodes to the list one by one; 
+                # find the corresponding node on the jpb-th plyblk
+                nstgroups.extend([ (str(n + jpb * nnode_p),) for n in nst.rnodes ])
+                # add the fl. nodes to the list in pairs, if it is not a tie nst;
+                # the two fl. nodes of an edge are kept on the same line
+                if not ('tie' in nst.name):
+                    nstgroups.extend([ (str(edges_p[eg-1][2] + jpb * nnode_p), \
+                                        str(edges_p[eg-1][3] + jpb * nnode_p)) for eg in nst.edges ])
+            # write all original nodes of the nset, wrapped into uel lines
+            for nstl in wrap_groups(nstgroups, '', uellinelength, uellinecount):
+                fnmsection.append(nstl+'\n')
+        # end of the fnm part in uel input
+        fnmsection.append('*End Part\n')
+
+        #   close nodes files
+        fnm_nodes.close()
+        uel_nodes.close()
+        #   close edges file
+        fnm_edges.close()
+        #   close elems files
+        fnm_elems.close()
+        uel_elems.close()
+
+        written.extend(meshfiles)
+
+        # store the files in the cache
+        if cachedir is not None:
+            cache_store(cachedir, meshkey, meshfiles, \
+            {'fnmsection': fnmsection, 'nelem': nelem_p, 'crackext': crackext, \
+             'area': area, 'elemsize': elemsize}, cachesize)
 
-#***************************************************************
-#       write nodes of the fnm part
-#***************************************************************  
-# extract layup of the fnm part
-blklayup = fnmparts[0].layup
-# find no. of plyblocks
-nplyblk = len(blklayup)
-# find no. of nodes and edges in a ply of this mesh
-nnode_p = len(fnmparts[0].nodes)
-nedge_p = len(fnmparts[0].edges)
-# find internal nodes for an interface of this mesh
-nnodein = nedge_p
-# find the total no. of nodes in this mesh
-nnodett = nplyblk * nnode_p + (nplyblk-1) * nnodein
-
-# write fnm_nodes 1st line: nnode
-fnm_nodes.write(str(nnodett)+' \n')
-
-for ipb in range(nplyblk):
-    # calculate the bot and top real node z-coordinate
-    # zbot = 0 if this is the 1st plyblk
-    if (ipb == 0):
-        zbot = 0.0
-    # zbot = thickness of last plyblk
     else:
-        zbot = zbot + blklayup[ipb-1].thickness
-    # ztop = zbot + thickness of this plyblk
-    ztop = zbot + blklayup[ipb].thickness
-    # loop over all nodes in the single ply mesh
-    for cntr0, nd in enumerate(fnmparts[0].nodes):
-        # current node id of the node on the ith plyblk
-        cntr = ipb * nnode_p + (cntr0+1)
-        # check if this node is a real node on the bot/top surf, or a fl. node
-        # must use cntr0+1 as bot/topnds lists are for nodes in 1st plyblk
-        if ((cntr0+1) in fnmparts[0].botrnds):
-            zz = zbot
-        elif ((cntr0+1) in fnmparts[0].toprnds):
-            zz = ztop
+        # the fnm part section and the mesh info stored with the cached files
+        fnmsection = [ str(line) for line in cached['fnmsection'] ]
+        nelem_p    = cached['nelem']
+        crackext   = cached['crackext']
+        area       = cached['area']
+        elemsize   = cached['elemsize']
+
+    state_store(newstate, 'mesh', meshkey, meshfiles, \
+    {'fnmsection': fnmsection, 'nelem': nelem_p, 'crackext': crackext, 'area': area, \
+     'elemsize': elemsize})
+
+
+
+    #***************************************************************
+    #       write predelam
+    #*************************************************************** 
+    # check if there is only ONE predelam
+    if (len(predelam) > 1):
+        print("ERROR: more than one predelam is not yet supported!")
+        sys.exit()
+
+    # get the predelam interface no.
+    pdinterf = 0
+    if (len(predelam) == 1):
+        pdinterf = job_input(jb, 'pdinterf', interactive)
+
+    # (the file layout is part of the key: files of the former layout, with
+    #  a single interf line, are rewritten)
+    pdkey = cache_key(['elem interf', pdinterf] + [ pd.elems for pd in predelam ])
+    if state_fetch(oldstate, 'predelam', pdkey, [fnmpredelamfile]) is None:
+        fnm_predelam = open(fnmpredelamfile,'w') # list of all predelam elems and their interf
+        # if no predelam, write 0 in fnm_predelam
+        if (len(predelam) == 0):
+            fnm_predelam.write('0 \n')
+        # write the elem indices in the predelam elset, each with its interf
+        for pd in predelam:
+            npdelem = len(pd.elems)
+            fnm_predelam.write(str(npdelem)+' \n')
+            write_pairs(fnm_predelam, pd.elems, [pdinterf]*npdelem)
+        fnm_predelam.close()
+        written.append(fnmpredelamfile)
+    state_store(newstate, 'predelam', pdkey, [fnmpredelamfile])
+
+
+    #***************************************************************
+    #       write matrix_crack
+    #*************************************************************** 
+    ## ask for minimum crack spacing
+    #minspacing = \
+    #input('Enter the minimum spacing between two matrix cracks (positive real number):')
+    #while ( not ( isinstance(minspacing, float) and minspacing > 0.0 ) ):
+    #    minspacing = \
+    #    input('Enter the minimum spacing between two matrix cracks (positive real number):')
+
+    # get min and max elem sizes: those of the job, if given, otherwise those
+    # of the mesh
+    minl = jb.minl if jb.minl is not None else elemsize[0]
+    maxl = jb.maxl if jb.maxl is not None else elemsize[1]
+    maxl = max(maxl, minl)
+    print('min. and max. elem sizes: %g, %g' % (minl, maxl))
+
+    # find the no. of cracks expected in each plyblock: the crack list of a
+    # plyblock has an entry for each cracked elem, so that a crack line takes
+    # an entry for each elem along it; it is the no. of crack lines, the
+    # extent of the mesh along the crack normal over the min. spacing of two
+    # cracks, 2*maxl (see newcrack_ok in matrix_crack_module), times the no.
+    # of elems along a crack line, the mean chord of the mesh along the fibre
+    # direction (its area over the extent along the crack normal) over minl,
+    # and at most the no. of elems; it is the initial size of the crack list
+    # of the plyblock, which grows when needed
+    ncracks = [ min(nelem_p, (int(extn/(2.0*maxl)) + 1) * (int(area/extn/minl) + 1)) \
+                if extn > 0 else 1 for extn in crackext ]
+
+    crackkey = cache_key([minl, maxl, nplyblk, ncracks])
+    if state_fetch(oldstate, 'crack', crackkey, [fnmmatrixcrackfile]) is None:
+        fnm_matrix_crack = open(fnmmatrixcrackfile,'w') # matrix crack info
+        #fnm_matrix_crack.write(str(minspacing)+' \n')
+        fnm_matrix_crack.write(repr(float(minl))+' '+repr(float(maxl))+' \n')
+        fnm_matrix_crack.write(str(nplyblk)+' \n')
+        # write the no. of cracks of each plyblock
+        write_list(fnm_matrix_crack, ncracks)
+        fnm_matrix_crack.close()
+        written.append(fnmmatrixcrackfile)
+    state_store(newstate, 'crack', crackkey, [fnmmatrixcrackfile])
+
+
+    #***************************************************************
+    #       write output settings
+    #*************************************************************** 
+    # format of the vtk files and output of their mesh, output frequency and
+    # interval, fields and damage threshold of the elems (-1 for all the
+    # elems), writer of the vtk files, read by output_module
+    output = job_output(jb)
+
+    outputkey = cache_key(sorted(output.items()))
+    if state_fetch(oldstate, 'output', outputkey, [fnmoutputfile]) is None:
+        fnm_output = open(fnmoutputfile,'w') # output settings
+        fnm_output.write(output['format']+' '+output['mesh']+' \n')
+        fnm_output.write(str(output['freq'])+' '+str(float(output['interval']))+' \n')
+        fnm_output.write(str(len(output['fields']))+' \n')
+        for field in output['fields']:
+            fnm_output.write(field+' \n')
+        if output['damage'] is None:
+            fnm_output.write('-1.0 \n')
         else:
-            zz = 0.0
-        # write this node coords in uel_nodes.inp
-        uel_nodes.write\
-        (str(cntr)+', '+str(nd.x)+', '+str(nd.y)+', '+str(zz)+'\n')
-        # write this node coords in fnm node_list
-        fnm_nodes.write\
-        (str(nd.x)+' '+str(nd.y)+' '+str(zz)+' \n')
-
-# write the additional nodes of interfaces if they're present
-if (nplyblk > 1):
-    for jintf in range(nplyblk-1):
-        # loop over all edges in the base ply mesh
-        # each edge has one additional node 
-        for cntr0 in range(nedge_p):
-            cntr = nplyblk * nnode_p + jintf * nedge_p + cntr0 + 1
-            # write this node coords in uel_nodes.inp
-            uel_nodes.write(str(cntr)+', 0.0, 0.0, 0.0\n')
-            # write this node coords in fnm node_list
-            fnm_nodes.write('0.0 0.0 0.0 \n')
-            
-
-#***************************************************************
-#       write edges
-#*************************************************************** 
-# find the total no. of edges in this mesh
-nedgett = nplyblk * nedge_p  
-fnm_edges.write(str(nedgett)+' \n')
-
-# update bcd edges
-for nst in fnmparts[0].nsets:
-    # only constrain the edges in nst with keyword 'tie'
-    if ('tie' in nst.name):
-        # if all the real nodes in this nst are on the bot surface, then
-        # only store the bot plyblk nodes, DO NOT include the other plies
-        if all(n in fnmparts[0].botrnds for n in nst.rnodes):
-            pstart = 0
-            pend   = 1
-        # if all the real nodes in this nst are on the top surface, then
-        # only store the top plyblk nodes, DO NOT include the other plies
-        elif all(n in fnmparts[0].toprnds for n in nst.rnodes):
-            pstart = nplyblk-1
-            pend   = nplyblk
-        # otherwise, store corresponding nodes of all plyblks
-        else:
-            pstart = 0
-            pend   = nplyblk
-        # find the bcd edges
-        for jpb in range(pstart,pend):
-            for jeg in nst.edges:
-                jedge = jeg + jpb * nedge_p 
-                fnm_edges.write(str(jedge)+' \n')
-# mark end of file with -1
-fnm_edges.write('-1 \n')
-
-#***************************************************************
-#       write elems
-#***************************************************************   
-# find no. of elems in a ply mesh
-nelem_p = len(fnmparts[0].elems) 
-# find total no. of elems in the laminate
-# it is the same as nelem_p, as a fnm elem contains all plies&interfs
-nelemtt = nelem_p
-# find the no. of r+f nodes in an elem of a single plyblk
-elnndrf_p = len(fnmparts[0].elems[0].nodes)
-# find the no. of edges in an elem of a single plyblk
-elnedge_p = len(fnmparts[0].elems[0].edges)
-# find the no. of r+f nodes in an elem of the laminate
-elnndrf_l = elnndrf_p * nplyblk
-# find the no. of interface internal nodes in an elem of the laminate
-elnndin_l = elnedge_p * (nplyblk-1)
-# find the total no. of nodes in an elem of the laminate
-elnndtt_l = elnndrf_l + elnndin_l
-# find the no. of edges in an elem of the laminate
-elnedge_l = elnedge_p * nplyblk
-
-fnm_elems.write(str(nelemtt)+' '+str(elnndtt_l)+' '+str(elnedge_l)+' \n')
-
-fnm_elems.write(str(nplyblk)+' \n')
-# write layup array
-for jpb in range(nplyblk):
-    angle  = str(blklayup[jpb].angle)
-    nplies = str(blklayup[jpb].nplies)
-    fnm_elems.write(angle+' '+nplies+' \n')
-
-for jel in range(nelemtt):
-    elnds_p = []
-    elegs_p = []
-    elnds_l = []
-    elegs_l = []
-    # find the r+f nodes in this elem ply
-    elnds_p = fnmparts[0].elems[jel].nodes
-    # find the edges in this elem ply
-    elegs_p = fnmparts[0].elems[jel].edges
-    # find the r+f nodes & edges in this elem laminate; 
-    # abs is needed to remove the negative sign on some of the edge no.
-    for jpb in range(nplyblk):
-        elnds_l.extend( [     x  + nnode_p * jpb  for x in elnds_p ] )
-        elegs_l.extend( [ abs(x) + nedge_p * jpb  for x in elegs_p ] )
-    # find the internal nodes of interfs in this elem laminate
-    # intern. nodes are listed after r and f nodes in the node list
-    # they are assigned to each edges of the interfaces
-    # so the elem's edge connec is used for assignment of intern. nodes
-    if nplyblk > 1:
-        for jit in range(nplyblk-1):
-            elnds_l.extend( [ abs(x) + nnode_p * nplyblk + nedge_p * jit for x in elegs_p ] )
-            
-    #**** write elem's nodal and edge connec to uel&fnm_elems ****
-    
-    #** node cnc 
-    # start the line with elem index jel+1
-    eline = [str(jel+1)+',']  # node cnc dataline for uel_elems
-    fline = ['']              # node cnc dataline for fnm_elems
-    cntr  = 0                 # line entry count  for uel_elems
-    # add the node no. to the line one by one
-    for k in elnds_l:
-        # if the uel line gets too long, continue on next line
-        if (len(eline[-1]+str(k)) >= uellinelength) or \
-        (cntr >= uellinecount):
-            eline.append('')
-            cntr = 0
-        # add the node no. to the line and update line count
-        eline[-1] = eline[-1]+str(k)+','
-        cntr      = cntr + 1
-        # add the node no. to the fnm line 
-        fline[0] = fline[0]+str(k)+' '
-    # remove the last comma from the eline
-    eline[-1] = eline[-1][:-1]
-    
-    #** edge cnc
-    gline = ['']  # edge cnc dataline for fnm_elems
-    # add the node no. to the line one by one
-    for k in elegs_l:
-        # add the node no. to the line
-        gline[0] = gline[0]+str(k)+' '
-    
-    # write the line of elem node connec
-    for l in eline:
-        uel_elems.write(l+'\n')
-        
-    # write this elem in fnm_elems
-    # write nodecnc array
-    fnm_elems.write(fline[0]+' \n')
-    # write edgecnc array
-    fnm_elems.write(gline[0]+' \n')
+            fnm_output.write(str(float(output['damage']))+' \n')
+        fnm_output.write(output['writer']+' '+str(output['slots'])+' '+ \
+                         str(float(output['wait']))+' \n')
+        fnm_output.close()
+        written.append(fnmoutputfile)
+    state_store(newstate, 'output', outputkey, [fnmoutputfile])
+
+
+    # remove the binary files of a previous run, if they are not written,
+    # so that the text files are read
+    if not jb.fnmbinary:
+        for fbin in [fnm_nodes_bin, fnm_edges_bin, fnm_elems_bin]:
+            if os.path.exists(fbin):
+                os.remove(fbin)
+
+
+    #***************************************************************
+    #       write uel input file
+    #*************************************************************** 
+    # keys of the sections of the uel input file
+    uelkeys = [ ('header',            cache_key(header)),
+                ('parts',             cache_key([ line for op in ordparts for line in op.lines ])),
+                ('fnm part',          cache_key(fnmsection)),
+                ('assembly',          cache_key(assembly)),
+                ('materials',         cache_key(materials)),
+                ('interaction props', cache_key(interaction_props)),
+                ('bcds',              cache_key(bcds)),
+                ('interaction',       cache_key(interaction)),
+                ('steps',             cache_key(steps)) ]
+    uelkey  = cache_key([ k for name, k in uelkeys ])
+
+    if state_fetch(oldstate, 'uel', uelkey, [uelinputfile]) is None:
+        uel_input = open(uelinputfile,'w')
+        #**** write HEADER ****
+        for hline in header:
+            uel_input.write(str(hline[0:]))
+
+        #**** write ordinary part ****
+        for op in ordparts:
+            for line in op.lines:
+                uel_input.write(str(line[0:]))
+
+        #**** write FNM PART   ****
+        for line in fnmsection:
+            uel_input.write(line)
+
+        #**** write ASSEMBLY ****
+        for aline in assembly:
+            uel_input.write(str(aline[0:]))
+
+        #**** write Material ****
+        for mline in materials:
+            uel_input.write(str(mline[0:]))
+
+        #**** write interaction property ****
+        for iline in interaction_props:
+            uel_input.write(str(iline[0:]))
+
+        #**** write initial BCDs ****
+        for bline in bcds:
+            uel_input.write(str(bline[0:]))
+
+        #**** write initial interaction ****
+        for iline in interaction:
+            uel_input.write(str(iline[0:]))
+
+        #**** write steps ****
+        for sline in steps:
+            uel_input.write(str(sline[0:]))
+
+        uel_input.close()
+        written.append(uelinputfile)
+    state_store(newstate, 'uel', uelkey, [uelinputfile], {'sections': dict(uelkeys)})
+
+    #*************************************************************** 
+    # close all open files
+    #*************************************************************** 
+    #   close input files
+    abq_input.close()
+
+    # store the state of this run
+    state_write(outdir, newstate)
+
+    # report the files written in incremental mode, and the changed sections
+    # of the uel input file
+    if incremental:
+        oldsections = oldstate.get('groups',{}).get('uel',{}).get('sections',{})
+        changed = [ name for name, k in uelkeys if oldsections.get(name) != k ]
+        print('written files: '+', '.join([ os.path.basename(p) for p in written ]))
+        print('changed sections of the uel input file: '+', '.join(changed))
+
+
+    #*************************************************************** 
+    # copy fnm input file to main directory
+    #*************************************************************** 
+    # (unless they are up to date in incremental mode)
+    if copydir is not None:
+        for p in [uelinputfile, uelnodesfile, uelelemsfile]:
+            if (p in written) or not os.path.exists(os.path.join(copydir,os.path.basename(p))):
+                shutil.copy (p,copydir)
+
+    #*************************************************************** 
+    # list the generated files
+    #*************************************************************** 
+    artifacts = { 'uel_input'       : uelinputfile,
+                  'uel_nodes'       : uelnodesfile,
+                  'uel_elems'       : uelelemsfile,
+                  'fnm_nodes'       : fnmnodesfile,
+                  'fnm_edges'       : fnmedgesfile,
+                  'fnm_elems'       : fnmelemsfile,
+                  'fnm_predelam'    : fnmpredelamfile,
+                  'fnm_matrix_crack': fnmmatrixcrackfile,
+                  'fnm_output'      : fnmoutputfile }
+    if jb.fnmbinary:
+        artifacts['fnm_nodes_bin'] = fnm_nodes_bin
+        artifacts['fnm_edges_bin'] = fnm_edges_bin
+        artifacts['fnm_elems_bin'] = fnm_elems_bin
+    for key in artifacts:
+        artifacts[key] = os.path.abspath(artifacts[key])
+    return artifacts
 
 
 
 #***************************************************************
-#       write predelam
-#*************************************************************** 
-# if no predelam, write 0 in fnm_predelam
-if (len(predelam) == 0):
-    fnm_predelam.write('0 \n')
-    
-# check if there is only ONE predelam
-if (len(predelam) > 1):
-    print("ERROR: more than one predelam is not yet supported!")
-    sys.exit()
-
-# write the elem indices in the predelam elset
-for pd in predelam:
-    npdelem = len(pd.elems)
-    fnm_predelam.write(str(npdelem)+' \n')
-    # ask for the predelam interface no.
-    pdinterf = \
-    input('Enter the pre-delamination interface, \
-    1 means the first interface from the bottom (positive integer number):')
-    while ( not ( isinstance(pdinterf, int) and pdinterf > 0 ) ):
-        pdinterf = \
-        input('Enter the pre-delamination interface, \
-        1 means the first interface from the bottom (positive integer number):')
-    fnm_predelam.write(str(pdinterf)+' \n')
-    # write all elems in the predelam elset
-    for jel in pd.elems:
-        fnm_predelam.write(str(jel)+' \n')
-
-
+#   command-line use
 #***************************************************************
-#       write matrix_crack
-#*************************************************************** 
-## ask for minimum crack spacing
-#minspacing = \
-#input('Enter the minimum spacing between two matrix cracks (positive real number):')
-#while ( not ( isinstance(minspacing, float) and minspacing > 0.0 ) ):
-#    minspacing = \
-#    input('Enter the minimum spacing between two matrix cracks (positive real number):')
-
-# ask for min and max elem sizes
-minl = 0
-while ( not ( isinstance(minl, float) and minl > 0.0 ) ):
-    minl = \
-    input('Enter the minimum element size in the mesh (positive real number):')
-maxl = 0
-while ( not ( isinstance(maxl, float) and maxl >= minl ) ):
-    maxl = \
-    input('Enter the maximum element size in the mesh (real number, >= min_elem_size):')
-    
-maxncrack = int(math.sqrt(nelem_p))
-
-#fnm_matrix_crack.write(str(minspacing)+' \n')
-fnm_matrix_crack.write(str(minl)+' '+str(maxl)+' \n')
-fnm_matrix_crack.write(str(nplyblk)+' \n')
-fnm_matrix_crack.write(str(maxncrack)+' \n')
-
-
-#***************************************************************
-#       write uel input file
-#*************************************************************** 
-#**** write HEADER ****
-for hline in header:
-    uel_input.write(str(hline[0:]))
-
-#**** write ordinary part ****
-for op in ordparts:
-    for line in op.lines:
-        uel_input.write(str(line[0:]))
-
-#**** write FNM PART   ****
-# part name 
-uel_input.write('*Part, name='+fnmparts[0].name+'\n')
-# part nodes
-uel_input.write('*NODE,INPUT=uel_nodes.inp    \n')
-# user element definition
-uel_input.write('*USER ELEMENT, TYPE=U'+str(uelcode)+\
-', NODES='+str(elnndtt_l)+', COORDINATES='+str(ndim)+\
-', PROPERTIES='+str(nprops)+', VARIABLES='+str(nsvars)+'\n')
-uel_input.write('1,2,3\n')
-# elements and fnm elset
-uel_input.write('*ELEMENT, TYPE=U'+str(uelcode)+', ELSET=fnm, INPUT=uel_elems.inp \n')
-# write the mandatory uel property line (not needed for calculation)
-uel_input.write('*UEL PROPERTY, ELSET=fnm\n')
-uel_input.write('1\n')
-# elset (predelam) does not need to be written here in uel input    
-# nsets
-nsets  = fnmparts[0].nsets
-for nst in nsets:
-    # write the nset name
-    uel_input.write(nst.name+'\n')
-    # nst dataline for uel_input, to be filled, and line count initiated
-    nstline = ['']
-    cntr    = 0
-    # if all the real nodes in this nst are on the bot surface, then
-    # only store the bot plyblk nodes, DO NOT include the other plies
-    if all(n in fnmparts[0].botrnds for n in nst.rnodes):
-        pstart = 0
-        pend   = 1
-    # if all the real nodes in this nst are on the top surface, then
-    # only store the top plyblk nodes, DO NOT include the other plies
-    elif all(n in fnmparts[0].toprnds for n in nst.rnodes):
-        pstart = nplyblk-1
-        pend   = nplyblk
-    # otherwise, store corresponding nodes of all plyblks
+# with no arguments, the inputs are asked from the user; otherwise, the job
+# file and/or options define the job(s), e.g.
+#   python preproc_inputfile.py job.json
+#   python preproc_inputfile.py --jobname DCB-mesh1 --layup 0,0,0,0 \
+#          --plythick 0.125 --pdinterf 2
+# the files are written in the current working directory (the preprocessing
+# directory), and the uel files are copied to its parent directory (which is
+# assumed to be the abaqus working directory); see preproc_batch for running
+# many jobs in separate directories
+if __name__ == '__main__':
+    # parent directory of the current working directory
+    pwd = os.path.dirname(os.getcwd())
+    if len(sys.argv) > 1:
+        jobs, args = parse_args(sys.argv[1:])
+        for jb in jobs:
+            preprocess(jb, copydir=pwd, cachedir=args.cache, \
+            cachesize=int(args.cache_size*2**20), incremental=args.incremental)
     else:
-        pstart = 0
-        pend   = nplyblk
-    # find nst nodes in plyblks
-    for jpb in range(pstart,pend):
-        # add the real nodes to the list one by one
-        for n in nst.rnodes:
-            # find the corresponding node on the jpb-th plyblk
-            k = n + jpb * nnode_p
-            # if the uel line gets too long, continue on the next line
-            if (len(nstline[-1]+str(k)) >= uellinelength) or \
-               (cntr >= uellinecount):
-                nstline.append('')
-                cntr = 0
-            # add the node no. to the line and update line count
-            nstline[-1] = nstline[-1]+str(k)+','
-            cntr        = cntr + 1
-        # add the fl. nodes to the list one by one, if it is not a tie nst
-        if not ('tie' in nst.name):
-            for eg in nst.edges:
-                k1 = fnmparts[0].edges[eg-1].nodes[2] + jpb * nnode_p
-                k2 = fnmparts[0].edges[eg-1].nodes[3] + jpb * nnode_p
-                # if the uel line gets too long, continue on the next line
-                if (len(nstline[-1]+str(k1)+str(k2)) >= uellinelength) or \
-                   (cntr >= uellinecount):
-                    nstline.append('')
-                    cntr = 0
-                # add the nodes to the line
-                nstline[-1] = nstline[-1]+str(k1)+','+str(k2)+','
-                cntr        = cntr + 2
-    # remove the last comma from the line
-    nstline[-1] = nstline[-1][:-1]
-    # write all original nodes of the nset
-    for nstl in nstline:
-        uel_input.write(nstl+'\n')
-# end writing fnm part in uel input
-uel_input.write('*End Part\n')
-
-#**** write ASSEMBLY ****
-for aline in assembly:
-    uel_input.write(str(aline[0:]))
-    
-#**** write Material ****
-for mline in materials:
-    uel_input.write(str(mline[0:]))
-    
-#**** write interaction property ****
-for iline in interaction_props:
-    uel_input.write(str(iline[0:]))
-
-#**** write initial BCDs ****
-for bline in bcds:
-    uel_input.write(str(bline[0:]))
-    
-#**** write initial interaction ****
-for iline in interaction:
-    uel_input.write(str(iline[0:]))
-
-#**** write steps ****
-for sline in steps:
-    uel_input.write(str(sline[0:]))
-
-
-
-#*************************************************************** 
-# close all open files
-#*************************************************************** 
-#   close input files
-abq_input.close()
-uel_input.close()
-#   close nodes files
-fnm_nodes.close()
-uel_nodes.close()
-#   close edges file
-fnm_edges.close()
-#   close elems files
-fnm_elems.close()
-uel_elems.close()
-#   close predelam file
-fnm_predelam.close()
-#   close matrix crack file
-fnm_matrix_crack.close()
-
-
-#*************************************************************** 
-# copy fnm input file to main directory
-#*************************************************************** 
-
-# get current working directory
-cwd = os.getcwd()
-# parent directory of cwd
-pwd = os.path.dirname(cwd)
-# copy fnm input file to parent directory of preprocessing directory (which is assumed to be the working directory)
-shutil.copy (uelinputfile,pwd)
-shutil.copy (uelnodesfile,pwd)
-shutil.copy (uelelemsfile,pwd)
+        preprocess(job(), interactive=True, copydir=pwd)
@@ -0,0 +1,388 @@
+################################################################
+############## User inputs of a preprocessing job ##############
+################################################################
+##
+##  the user inputs of a preprocessing job are stored in a job
+##  object (see preproc_classes); they are either:
+##  - given in a job file and/or on the command line, so that the
+##    preprocessing runs unattended (non-interactive mode), or
+##  - asked from the user when they are needed (interactive mode)
+##  job file: JSON (or YAML, if PyYAML is installed) of a single
+##  job, or a list of jobs, with the keys:
+##  - jobname   : abaqus job name; the input file is jobname.inp
+##  - symmetric : true if the model is a half-laminate with
+##                symmetric mid-plane
+##  - layup     : list of fibre angles of all plies in the model,
+##                from bottom ply to top or mid ply
+##  - plythick  : thickness of a single ply
+##  - pdinterf  : pre-delamination interface, 1 means the first
+##                interface from the bottom (only needed if the
+##                fnm part has a predelam elset)
+##  - minl, maxl: minimum and maximum element sizes in the mesh
+##                (optional; never asked): by default, the min. and
+##                max. lengths of the elem edges of the fnm part
+##  - binary    : also write the binary fnm input files
+##  - output    : output settings of the analysis (optional; never
+##                asked), a dict of the keys:
+##                - format   : format of the vtk files, ascii, binary
+##                             or both (default ascii)
+##                - mesh     : output of the mesh in the vtk files, all
+##                             or changed (default all)
+##                - freq     : output every freq increments (0: no
+##                             output by increment no.; default 1)
+##                - interval : output when the total time has grown
+##                             by interval since the last output (0:
+##                             no output by time; default 0)
+##                - fields   : fields of the vtk files (default: all
+##                             of outputfields)
+##                - damage   : only output the elems with a damage
+##                             variable (df, dm or dd) above damage
+##                             (default: all the elems)
+##                - writer   : writer of the vtk files, direct or
+##                             background (default direct)
+##                - slots    : no. of snapshot slots of the background
+##                             writer (default 4)
+##                - wait     : max. wait for a free slot of the
+##                             background writer, in s (default 600)
+##                the first increment of each step is always output
+##                (see output_module; the environment variables
+##                FNM_OUTPUT_* of the analysis override the format,
+##                mesh and writer settings)
+##  e.g. {"jobname": "DCB-mesh1", "symmetric": false,
+##        "layup": [0, 0, 0, 0], "plythick": 0.125,
+##        "pdinterf": 2,
+##        "output": {"format": "binary", "freq": 10,
+##                   "fields": ["displacement", "dd"]}}
+################################################################
+
+from preproc_classes import job
+from preproc_cache import add_cache_options
+import ast, json, os, sys
+# YAML job files are optional
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# raw_input is input in python 3
+try:
+    input_line = raw_input
+except NameError:
+    input_line = input
+
+
+# keys of a job file, and the corresponding attributes of a job object
+jobkeys = { 'jobname'  : 'jobname',
+            'symmetric': 'symmetric',
+            'layup'    : 'layup',
+            'plythick' : 'plythick',
+            'pdinterf' : 'pdinterf',
+            'minl'     : 'minl',
+            'maxl'     : 'maxl',
+            'binary'   : 'fnmbinary',
+            'output'   : 'output' }
+
+# fields of the vtk output files (see output_module), the default output
+# settings of a job, and the allowed values of the settings which are names
+outputfields   = ['displacement', 'stress', 'strain', 'traction', 'separation', \
+                  'df', 'dm', 'dd', 'phi']
+outputdefaults = { 'format': 'ascii', 'mesh': 'all', 'freq': 1, 'interval': 0.0,
+                   'fields': outputfields, 'damage': None, 'writer': 'direct',
+                   'slots': 4, 'wait': 600.0 }
+outputchoices  = { 'format': ['ascii', 'binary', 'both'], 'mesh': ['all', 'changed'],
+                   'writer': ['direct', 'background'] }
+
+
+# define get integer
+def GetInteger2():
+    nnn = None
+    while nnn != 1 and nnn !=2:
+        try:
+            s=sys.stdin.readline()
+            nnn = int(s)
+        except ValueError:
+            print ('Invalid Number. Enter integer. ')
+    return nnn
+
+
+# define the reader of a python literal (number, list, tuple) from the user;
+# returns None if the entry is not a literal
+def GetLiteral(prompt):
+    try:
+        return ast.literal_eval(input_line(prompt))
+    except (ValueError, SyntaxError):
+        return None
+
+
+#***************************************************************
+#   validity checks of the job inputs
+#***************************************************************
+def isnumber(v):
+    return isinstance(v, (int,float)) and not isinstance(v, bool)
+
+def valid_jobname(v, jb):
+    return isinstance(v, str) and len(v) > 0
+
+def valid_symmetric(v, jb):
+    return isinstance(v, bool)
+
+def valid_layup(v, jb):
+    return isinstance(v, (list,tuple)) and len(v) > 0 and all(isnumber(a) for a in v)
+
+def valid_plythick(v, jb):
+    return isnumber(v) and v > 0
+
+def valid_pdinterf(v, jb):
+    return isinstance(v, int) and not isinstance(v, bool) and v > 0
+
+def valid_minl(v, jb):
+    return isnumber(v) and v > 0.0
+
+def valid_maxl(v, jb):
+    return isnumber(v) and ( jb.minl is None or v >= jb.minl )
+
+def valid_fnmbinary(v, jb):
+    return isinstance(v, bool)
+
+def valid_output(v, jb):
+    if not isinstance(v, dict) or not set(v.keys()) <= set(outputdefaults.keys()):
+        return False
+    freq     = v.get('freq', 1)
+    interval = v.get('interval', 0.0)
+    fields   = v.get('fields', outputfields)
+    damage   = v.get('damage')
+    slots    = v.get('slots', 4)
+    wait     = v.get('wait', 600.0)
+    return all(v.get(k, outputdefaults[k]) in outputchoices[k] for k in outputchoices) \
+       and isinstance(freq, int) and not isinstance(freq, bool) and freq >= 0 \
+       and isnumber(interval) and interval >= 0 \
+       and isinstance(fields, (list,tuple)) and len(fields) > 0 \
+       and all(f in outputfields for f in fields) \
+       and ( damage is None or ( isnumber(damage) and 0 <= damage < 1 ) ) \
+       and isinstance(slots, int) and not isinstance(slots, bool) and slots >= 1 \
+       and isnumber(wait) and wait >= 0
+
+
+#***************************************************************
+#   questions of the job inputs in interactive mode
+#***************************************************************
+def ask_jobname(jb):
+    return input_line('abaqus job name:')
+
+def ask_symmetric(jb):
+    # ask if the lamiante layup is symmetric
+    print (" Is the model a half-laminate with symmetric mid-plane:  1=yes  2=no ")
+    return ( GetInteger2() == 1 )
+
+def ask_layup(jb):
+    # ask for a list of ply angles
+    prompt = 'Enter fibre angles (int/float) of all plies in the model, '+ \
+    'from bottom ply to top or mid ply (if the model is half-laminate); '+ \
+    'separate each ply by a comma; in case of a single ply, end with a comma:'
+    v = GetLiteral(prompt)
+    while not valid_layup(v, jb):
+        v = GetLiteral(prompt)
+    return list(v)
+
+def ask_plythick(jb):
+    # ask for the thickness of a single ply
+    prompt = 'Enter the thickness of a single ply (positive real number):'
+    v = GetLiteral(prompt)
+    while not ( isinstance(v, float) and valid_plythick(v, jb) ):
+        v = GetLiteral(prompt)
+    return v
+
+def ask_pdinterf(jb):
+    # ask for the predelam interface no.
+    prompt = 'Enter the pre-delamination interface, '+ \
+    '1 means the first interface from the bottom (positive integer number):'
+    v = GetLiteral(prompt)
+    while not valid_pdinterf(v, jb):
+        v = GetLiteral(prompt)
+    return v
+
+
+# checks and questions of the job attributes
+checks = { 'jobname'  : valid_jobname,   'symmetric': valid_symmetric,
+           'layup'    : valid_layup,     'plythick' : valid_plythick,
+           'pdinterf' : valid_pdinterf,  'minl'     : valid_minl,
+           'maxl'     : valid_maxl,      'fnmbinary': valid_fnmbinary,
+           'output'   : valid_output }
+asks   = { 'jobname'  : ask_jobname,     'symmetric': ask_symmetric,
+           'layup'    : ask_layup,       'plythick' : ask_plythick,
+           'pdinterf' : ask_pdinterf }
+
+
+#***************************************************************
+#   job definitions
+#***************************************************************
+
+# define the getter of a job input
+# if the input is not given in the job, it is asked from the user in
+# interactive mode; otherwise, it is an error
+def job_input(jb, attr, interactive):
+    v = getattr(jb, attr)
+    if v is None:
+        if not interactive:
+            print("ERROR: "+attr+" is not given for job "+str(jb.jobname)+"!")
+            sys.exit()
+        v = asks[attr](jb)
+        setattr(jb, attr, v)
+    return v
+
+
+# define the output settings of a job: the defaults, updated with the settings
+# of the job
+def job_output(jb):
+    out = dict(outputdefaults)
+    out.update(jb.output or {})
+    return out
+
+
+# define the job of a dict of job file keys
+# the given inputs are checked here, so that an invalid job fails before any
+# file is written; reals are stored as floats
+def new_job(d):
+    jb = job()
+    for key in d:
+        if key not in jobkeys:
+            print("ERROR: unknown key "+str(key)+" in job "+str(d.get('jobname'))+"!")
+            sys.exit()
+        v = d[key]
+        # unicode strings of the json reader in python 2
+        if key == 'jobname' and v is not None and not isinstance(v, str):
+            v = str(v)
+        if key == 'output' and isinstance(v, dict):
+            v = dict( (str(k), w) for k, w in v.items() )
+            for k in outputchoices:
+                if k in v and not isinstance(v[k], str):
+                    v[k] = str(v[k])
+            if isinstance(v.get('fields'), (list,tuple)):
+                v['fields'] = [ str(f) for f in v['fields'] ]
+        setattr(jb, jobkeys[key], v)
+    for attr in ['jobname','symmetric','layup','plythick','pdinterf','minl','maxl','fnmbinary', \
+                 'output']:
+        v = getattr(jb, attr)
+        if v is not None and not checks[attr](v, jb):
+            print("ERROR: invalid "+attr+" = "+str(v)+" in job "+str(jb.jobname)+"!")
+            sys.exit()
+    for attr in ['plythick','minl','maxl']:
+        if getattr(jb, attr) is not None:
+            setattr(jb, attr, float(getattr(jb, attr)))
+    if jb.layup is not None:
+        jb.layup = list(jb.layup)
+    return jb
+
+
+# define the reader of the job dicts in a job file
+def read_job_dicts(fname):
+    f = open(fname,'r')
+    if os.path.splitext(fname)[1].lower() in ['.yaml','.yml']:
+        if yaml is None:
+            print("ERROR: PyYAML is needed to read the job file "+fname+"!")
+            sys.exit()
+        data = yaml.safe_load(f)
+    else:
+        data = json.load(f)
+    f.close()
+    if isinstance(data, dict):
+        data = [data]
+    return data
+
+
+# define the reader of a job file
+# returns the list of jobs in the file
+def read_jobs(fname):
+    return [ new_job(d) for d in read_job_dicts(fname) ]
+
+
+# define the job options of a command-line parser (argparse)
+def add_job_options(parser):
+    parser.add_argument('--jobname', help='abaqus job name')
+    parser.add_argument('--symmetric', action='store_const', const=True, \
+    help='the model is a half-laminate with symmetric mid-plane')
+    parser.add_argument('--layup', \
+    help='fibre angles of all plies, from bottom ply to top or mid ply, e.g. 0,45,90')
+    parser.add_argument('--plythick', type=float, help='thickness of a single ply')
+    parser.add_argument('--pdinterf', type=int, help='pre-delamination interface')
+    parser.add_argument('--minl', type=float, help='minimum element size in the mesh '+ \
+    '(default: the min. length of the elem edges of the fnm part)')
+    parser.add_argument('--maxl', type=float, help='maximum element size in the mesh '+ \
+    '(default: the max. length of the elem edges of the fnm part)')
+    parser.add_argument('--binary', action='store_const', const=True, \
+    help='also write the binary fnm input files')
+    parser.add_argument('--output-format', choices=outputchoices['format'], \
+    help='format of the vtk output files')
+    parser.add_argument('--output-mesh', choices=outputchoices['mesh'], \
+    help='output of the mesh in the vtk files: in all of them, or when it has changed')
+    parser.add_argument('--output-freq', type=int, help='output every OUTPUT_FREQ increments')
+    parser.add_argument('--output-interval', type=float, \
+    help='output every OUTPUT_INTERVAL of total time')
+    parser.add_argument('--output-fields', \
+    help='fields of the vtk output files, e.g. displacement,dm,dd')
+    parser.add_argument('--output-damage', type=float, \
+    help='only output the elems with a damage variable above OUTPUT_DAMAGE')
+    parser.add_argument('--output-writer', choices=outputchoices['writer'], \
+    help='writer of the vtk output files: the analysis, or postproc_writer.py')
+    parser.add_argument('--output-slots', type=int, \
+    help='no. of snapshot slots of the background writer')
+    parser.add_argument('--output-wait', type=float, \
+    help='max. wait for a free slot of the background writer, in s')
+
+
+# define the dict of the job options given on the command line
+def job_options(parser, args):
+    opts = {}
+    for key in jobkeys:
+        v = getattr(args, key, None)
+        if v is not None:
+            opts[key] = v
+    # output settings
+    output = {}
+    for key in outputdefaults:
+        v = getattr(args, 'output_'+key)
+        if v is not None:
+            output[key] = v
+    if 'fields' in output:
+        output['fields'] = output['fields'].split(',')
+    if output:
+        opts['output'] = output
+    if 'layup' in opts:
+        try:
+            opts['layup'] = list(ast.literal_eval('['+opts['layup']+']'))
+        except (ValueError, SyntaxError):
+            parser.error('invalid layup '+opts['layup'])
+    return opts
+
+
+# define the jobs of a list of job dicts, updated with the options given on
+# the command line; the laminate is not symmetric unless it is set in the job
+# dict or by --symmetric; the output settings given as options update those
+# of the job dict
+def option_jobs(dicts, opts):
+    for d in dicts:
+        output = dict(d.get('output') or {})
+        output.update(opts.get('output', {}))
+        d.update(opts)
+        if output:
+            d['output'] = output
+        d.setdefault('symmetric', False)
+    return [ new_job(d) for d in dicts ]
+
+
+# define the parser of the command-line arguments of the preprocessing
+# the inputs given as options override those in the job file;
+# returns the list of jobs, and the parsed arguments
+def parse_args(argv):
+    import argparse
+    parser = argparse.ArgumentParser(description='Preprocessing for the FNM; '+ \
+    'inputs which are not given are an error (no interactive questions).')
+    parser.add_argument('jobfile', nargs='?', \
+    help='JSON (or YAML) file of a job or a list of jobs')
+    add_job_options(parser)
+    add_cache_options(parser)
+    args = parser.parse_args(argv)
+    dicts = [{}]
+    if args.jobfile:
+        dicts = read_job_dicts(args.jobfile)
+    return option_jobs(dicts, job_options(parser, args)), args
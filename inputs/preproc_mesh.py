@@ -0,0 +1,143 @@
+################################################################
+############ Array-based mesh operations for the FNM ###########
+################################################################
+##
+##  the fnm part mesh is stored in a single fmesh object of numpy
+##  arrays (see preproc_classes), and all the FNM-ization steps
+##  are done in bulk on these arrays:
+##  - reading of the real nodes and elems of the part
+##  - discovery of the breakable edges and creation of fl. nodes
+##  - discovery of the edges involved in a nset
+##  - replication of the single ply connec over all plyblocks
+##  - lengths of the edges, for the min. and max. elem sizes
+##  ** NOTE **:
+##  - all node, elem and edge no. stored in the arrays are 1-based,
+##    as they are in the abaqus and fnm input files
+################################################################
+
+from preproc_classes import fmesh
+import numpy as np
+
+
+# define the reader of the numbers in a list of data lines
+# tokens which are not numbers (e.g. empty token after a trailing comma) are skipped;
+# all lines must have the same no. of numbers; returns a 2D array of dtype
+def read_data(lines, dtype):
+    data = []
+    for line in lines:
+        row = []
+        for t in line.split(','):
+            try:
+                row.append(dtype(t))
+            except ValueError:
+                pass
+        data.append(row)
+    return np.array(data, dtype=dtype)
+
+
+# define the FNM-ization of a single-layer mesh of brick-type elems
+# coords : float (nnode_r,3) coords of the real nodes
+# rnodes : int (nelem,2*halfnds) real node connec of elems; bot surf nodes
+#          first, then top surf nodes
+# returns the fmesh with real & fl. nodes, elems and edges
+def form_fmesh(elabels, coords, rnodes):
+    nnode_r = coords.shape[0]
+    nelem, elnndr = rnodes.shape
+    halfnds = elnndr // 2
+    # form edges
+    # in 3D FNM for composites, only edges parallel to shell plane are breakable
+    # the edges of an elem are listed in the order: bot surf edges, top surf edges;
+    # edge i on surf j goes from ith node to (i+1)th node on surf j;
+    # if i is the last node, i+1 is the first node
+    nxt = [ j*halfnds + (i+1)%halfnds for j in range(2) for i in range(halfnds) ]
+    rows = rnodes.ravel()
+    cols = rnodes[:,nxt].ravel()
+    # an edge is identified by its sorted pair of end nodes
+    keys = np.minimum(rows,cols).astype(np.int64) * (nnode_r+1) + np.maximum(rows,cols)
+    ukeys, first, inv = np.unique(keys, return_index=True, return_inverse=True)
+    # edges are numbered in the order they are first met in the elem loop, and are
+    # saved in the direction of this first elem edge
+    order = np.argsort(first)
+    rank  = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    first = first[order]
+    egno  = rank[inv.ravel()]
+    nedge = len(first)
+    # each edge has 4 nodes: 2 real, 2 fl.; fl. nodes are added after the real nodes
+    edges = np.empty((nedge,4), dtype=np.int32)
+    edges[:,0] = rows[first]
+    edges[:,1] = cols[first]
+    edges[:,2] = nnode_r + 2*np.arange(nedge) + 1
+    edges[:,3] = nnode_r + 2*np.arange(nedge) + 2
+    # elem edges in rev. dir. of the saved edge have a negative edge no.
+    same = ( rows == edges[egno,0] )
+    eledges = np.where(same, egno+1, -(egno+1)).reshape(nelem,elnndr).astype(np.int32)
+    # fl. nodes of elem edges; swapped if the elem edge is in rev. dir.
+    flnodes = np.where(same[:,None], edges[egno,2:4], edges[egno,3:1:-1])
+    elems   = np.hstack((rnodes, flnodes.reshape(nelem,2*elnndr))).astype(np.int32)
+    # fl. nodes have zero coords
+    nodes = np.vstack((coords, np.zeros((2*nedge,3)))).astype(np.float64)
+    return fmesh(nodes=nodes, elabels=np.asarray(elabels,dtype=np.int32), \
+    elems=elems, eledges=eledges, edges=edges)
+
+
+# define the finder of the edges involved in a nset
+# an edge is involved if both of its real nodes are in the nset; edges are listed
+# in the order of the positions of their end nodes in the nset (first the lower
+# position, then the higher one)
+def find_nset_edges(mesh, rnodes):
+    nnode = mesh.nodes.shape[0]
+    rnodes = np.asarray(rnodes, dtype=np.int64)
+    # position of each node in the nset, -1 if not in the nset
+    pos = np.full(nnode+1, -1, dtype=np.int64)
+    pos[rnodes[::-1]] = np.arange(len(rnodes))[::-1]
+    p1 = pos[mesh.edges[:,0]]
+    p2 = pos[mesh.edges[:,1]]
+    inset = np.nonzero( (p1 >= 0) & (p2 >= 0) )[0]
+    pmin = np.minimum(p1[inset],p2[inset])
+    pmax = np.maximum(p1[inset],p2[inset])
+    return ( inset[np.lexsort((pmax,pmin))] + 1 ).tolist()
+
+
+# define the surface real node masks of a mesh
+# returns bool arrays of bot and top surf real nodes, indexed by 0-based node no.
+def surf_masks(mesh, halfnds):
+    nnode = mesh.nodes.shape[0]
+    botrnds = np.zeros(nnode, dtype=bool)
+    toprnds = np.zeros(nnode, dtype=bool)
+    botrnds[mesh.elems[:,0:halfnds].ravel()-1] = True
+    toprnds[mesh.elems[:,halfnds:2*halfnds].ravel()-1] = True
+    return botrnds, toprnds
+
+
+# define the in-plane lengths of the edges of the mesh, from the coords of their
+# 2 real nodes; returns float (nedge) lengths
+def edge_lengths(mesh):
+    xy = mesh.nodes[:,0:2]
+    d  = xy[mesh.edges[:,1]-1] - xy[mesh.edges[:,0]-1]
+    return np.sqrt((d*d).sum(axis=1))
+
+
+# define the replication of a connec array over ncopy copies
+# copy i (i = start, ..., start+ncopy-1) is the connec shifted by i*offset;
+# the copies are concatenated along the last axis (as an outer sum)
+def replicate(connec, offset, ncopy, start=0):
+    connec = np.asarray(connec, dtype=np.int64)
+    shifts = offset * np.arange(start, start+ncopy, dtype=np.int64)
+    return ( connec[...,None,:] + shifts[:,None] ).reshape(connec.shape[:-1]+(-1,))
+
+
+# define the laminate connec of all elems over nplyblk plyblocks
+# the nodes (edges) of plyblock i are the single ply nodes (edges) shifted by
+# i*nnode_p (i*nedge_p); the internal nodes of interfaces are listed after the
+# r+f nodes of all plyblocks, one per edge of each interface
+# returns int (nelem,elnndtt_l) node connec and int (nelem,elnedge_l) edge connec
+def laminate_connec(mesh, nplyblk):
+    nnode_p = mesh.nodes.shape[0]
+    nedge_p = mesh.edges.shape[0]
+    # abs is needed to remove the negative sign on some of the edge no.
+    eledges = np.abs(mesh.eledges)
+    elnds_l = np.hstack(( replicate(mesh.elems, nnode_p, nplyblk), \
+              replicate(eledges + nnode_p*nplyblk, nedge_p, nplyblk-1) ))
+    elegs_l = replicate(eledges, nedge_p, nplyblk)
+    return elnds_l, elegs_l
@@ -0,0 +1,108 @@
+################################################################
+########## Memory-mapped reader of the uel input files #########
+################################################################
+##
+##  uel_nodes.inp and uel_elems.inp (and any other file of comma-
+##  separated data lines, e.g. the data lines of an abaqus *Node
+##  or *Element include file) are memory-mapped and parsed into
+##  numpy arrays in bulk, without a python string per line:
+##  - a data record is a line, continued on the next line(s) if
+##    the line ends with a comma (as the wrapped elem lines of
+##    uel_elems.inp); blank lines are skipped
+##  - the record ends and the continuation line ends are found on
+##    the whole byte array, and the line ends are replaced by
+##    separators, so that all the numbers are parsed by a single
+##    numpy call
+##  e.g.:
+##    labels, xyz   = read_uel_nodes('uel_nodes.inp')
+##    labels, elnds = read_uel_elems('uel_elems.inp')
+################################################################
+
+import numpy as np
+import os
+
+
+# byte codes of the characters of the data lines
+NL    = ord('\n')
+COMMA = ord(',')
+SPACE = ord(' ')
+
+
+# define the memory map of a file as an array of bytes
+def map_bytes(fname):
+    if os.path.getsize(fname) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(fname, dtype=np.uint8, mode='r')
+
+
+# define the reader of the data records of a file
+# returns the 1D array of all the numbers of the file, in dtype, and the
+# int array of the no. of numbers of each record
+# only arrays of the size of the file in bytes (uint8), or of its no. of
+# lines and numbers are formed
+def read_records(fname, dtype):
+    buf = map_bytes(fname)
+    nbuf = buf.size
+    if nbuf == 0:
+        return np.zeros(0, dtype=dtype), np.zeros(0, dtype=np.int64)
+    # line ends, and a virtual line end after the last line if it has none
+    nls = np.nonzero(buf == NL)[0]
+    if buf[-1] != NL:
+        nls = np.append(nls, nbuf)
+    starts = np.concatenate(([0], nls[:-1]+1))
+    # last significant (not blank) char of each line, stepping back over the
+    # trailing blanks (e.g. '\r'); the line is blank if it is before the start
+    lsig = nls - 1
+    back = np.nonzero(lsig >= starts)[0]
+    back = back[ buf[lsig[back]] <= SPACE ]
+    while back.size > 0:
+        lsig[back] -= 1
+        back = back[ lsig[back] >= starts[back] ]
+        back = back[ buf[lsig[back]] <= SPACE ]
+    blank = ( lsig < starts )
+    cont  = ~blank & ( buf[np.maximum(lsig,0)] == COMMA )
+    ends  = nls[ ~blank & ~cont ]
+    # the record ends become separators, the other line ends become blanks
+    stream = np.array(buf)
+    stream[nls[nls < nbuf]] = SPACE
+    stream[ends[ends < nbuf]] = COMMA
+    # no. of numbers of each record: no. of separators up to the record end,
+    # incl. the virtual separator after the last line
+    commas = np.nonzero(stream == COMMA)[0]
+    ncum   = np.searchsorted(commas, ends, side='right') + (ends >= nbuf)
+    counts = np.diff(np.concatenate(([0], ncum)))
+    # remove the separator after the last record
+    stream = stream[:ends[-1]] if len(ends) else stream[:0]
+    values = np.fromstring(stream.tobytes(), dtype=dtype, sep=',')
+    if values.size != counts.sum():
+        raise ValueError('invalid data lines in '+fname)
+    return values, counts
+
+
+# define the reshape of the records of the same length into a 2D array
+def records_2d(fname, values, counts):
+    if len(counts) == 0:
+        return values.reshape(0, 0)
+    if (counts != counts[0]).any():
+        raise ValueError('records of different lengths in '+fname)
+    return values.reshape(len(counts), counts[0])
+
+
+# define the reader of uel_nodes.inp
+# returns the int array of node labels and the float (nnode,3) array of coords
+def read_uel_nodes(fname):
+    data = records_2d(fname, *read_records(fname, np.float64))
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0,3))
+    return data[:,0].astype(np.int64), data[:,1:]
+
+
+# define the reader of uel_elems.inp
+# the wrapped lines of an elem are joined into a single record
+# returns the int array of elem labels and the int (nelem,nnode) array of the
+# node connec of elems
+def read_uel_elems(fname):
+    data = records_2d(fname, *read_records(fname, np.int64))
+    if data.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros((0,0), dtype=np.int64)
+    return data[:,0], data[:,1:]
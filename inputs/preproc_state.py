@@ -0,0 +1,84 @@
+################################################################
+########### State of the previous preprocessing run ############
+################################################################
+##
+##  each run records in its output dir. (preproc_state.json) the
+##  keys of the groups of files it has written, and the size and
+##  mtime of these files:
+##  - mesh     : uel_nodes.inp, uel_elems.inp, fnm_nodes.txt,
+##               fnm_edges.txt, fnm_elems.txt (& fnm_*.bin); the
+##               key is the one of the preprocessing cache, and the
+##               fnm part section of the uel input file and the mesh
+##               info are stored with it
+##  - predelam : fnm_predelam.txt
+##  - crack    : fnm_matrix_crack.txt
+##  - uel      : uel_<job>.inp; its key is made of the keys of its
+##               sections (header, parts, assembly, materials, ...)
+##  in incremental mode, a group whose key has not changed and
+##  whose files have not been changed since the previous run is
+##  not written again, so that its files keep their mtimes; e.g.
+##  when only the steps change, only uel_<job>.inp is rewritten
+################################################################
+
+import json, os
+
+
+# version of the state file layout
+stateversion = 3
+# name of the state file
+statefile = 'preproc_state.json'
+
+
+# define the reader of the state of the previous run in outdir
+# returns an empty state if there is none (or it is not valid)
+def state_read(outdir):
+    try:
+        f = open(os.path.join(outdir, statefile), 'r')
+        state = json.load(f)
+        f.close()
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(state, dict) or state.get('version') != stateversion:
+        return {}
+    return state
+
+
+# define the writer of the state of this run in outdir
+def state_write(outdir, state):
+    state['version'] = stateversion
+    f = open(os.path.join(outdir, statefile), 'w')
+    json.dump(state, f, indent=1, sort_keys=True)
+    f.close()
+
+
+# define the stamp of a file: its size and mtime
+def file_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime]
+
+
+# define the check of a group of files of the previous run
+# returns the state of the group if its key is the same and its files have
+# not been changed since; otherwise, None
+def state_fetch(state, group, key, paths):
+    g = state.get('groups', {}).get(group)
+    if g is None or g.get('key') != key:
+        return None
+    if sorted(g.get('files', {}).keys()) != sorted(os.path.basename(p) for p in paths):
+        return None
+    for p in paths:
+        try:
+            if file_stamp(p) != g['files'][os.path.basename(p)]:
+                return None
+        except OSError:
+            return None
+    return g
+
+
+# define the record of a group of files in the state of this run
+# info : dict of extra info stored with the group
+def state_store(state, group, key, paths, info=None):
+    g = dict(info or {})
+    g['key']   = key
+    g['files'] = dict( (os.path.basename(p), file_stamp(p)) for p in paths )
+    state.setdefault('groups', {})[group] = g
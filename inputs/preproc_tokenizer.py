@@ -0,0 +1,91 @@
+################################################################
+########### Streaming tokenizer of Abaqus input files ##########
+################################################################
+##
+##  the input file is read in a single pass, line by line, and
+##  split into a list (index) of keyword blocks (kwblock):
+##  - a keyword line (starting with a single '*') opens a block;
+##    the data lines following it are stored in the block
+##  - a comment line (starting with '**') forms a block of its own,
+##    with keyword '**', so that separators like '** ----' can be
+##    found in the index as well
+##  - the raw lines are kept, so that the lines of any range of
+##    blocks can be copied verbatim into the uel input file
+################################################################
+
+from preproc_classes import kwblock
+
+
+# define the keyword parameter parser of a keyword line
+# e.g. '*Nset, nset=top, generate' gives {'nset':'top', 'generate':''}
+def read_params(line):
+    params = {}
+    for t in line.split(',')[1:]:
+        if '=' in t:
+            k, v = t.split('=', 1)
+            params[k.strip().lower()] = v.strip()
+        elif t.strip():
+            params[t.strip().lower()] = ''
+    return params
+
+
+# define the tokenizer of an opened abaqus input file
+# returns the list of keyword blocks of the file
+def tokenize(abq_input):
+    blocks = []
+    j = 0
+    for line in abq_input:
+        # comment line
+        if line.startswith('**'):
+            blocks.append(kwblock(keyword='**', params={}, line=line, \
+            lines=[], jstart=j, jend=j+1))
+        # keyword line
+        elif line.startswith('*'):
+            keyword = line.split(',')[0].strip()
+            blocks.append(kwblock(keyword=keyword, params=read_params(line), \
+            line=line, lines=[], jstart=j, jend=j+1))
+        # data line, stored in the current block
+        else:
+            # data lines before the first keyword
+            if (len(blocks) == 0):
+                blocks.append(kwblock(keyword='', params={}, line='', \
+                lines=[], jstart=j, jend=j))
+            blocks[-1].lines.append(line)
+            blocks[-1].jend = j+1
+        j = j + 1
+    return blocks
+
+
+# define the finder of keyword blocks in the block range [b0, b1)
+# keywords are compared case-insensitively; returns the block indices
+def find_blocks(blocks, keyword, b0=0, b1=None):
+    if b1 is None:
+        b1 = len(blocks)
+    keyword = keyword.lower()
+    return [b for b in range(b0,b1) if blocks[b].keyword.lower() == keyword]
+
+
+# define the finder of comment blocks containing text in the block range [b0, b1)
+def find_comments(blocks, text, b0=0, b1=None):
+    if b1 is None:
+        b1 = len(blocks)
+    return [b for b in range(b0,b1) \
+    if blocks[b].keyword == '**' and text in blocks[b].line]
+
+
+# define the finder of the first comment block in the block range [b0, b1);
+# returns b1 if there is none
+def next_comment(blocks, b0, b1=None):
+    if b1 is None:
+        b1 = len(blocks)
+    return next( (b for b in range(b0,b1) if blocks[b].keyword == '**'), b1 )
+
+
+# define the raw lines of the blocks in the block range [b0, b1)
+def block_lines(blocks, b0, b1):
+    lines = []
+    for blk in blocks[b0:b1]:
+        if blk.line:
+            lines.append(blk.line)
+        lines.extend(blk.lines)
+    return lines
@@ -0,0 +1,177 @@
+################################################################
+########## Bulk writers of the uel and fnm input files #########
+################################################################
+##
+##  all data lines are formatted from whole arrays (or lists) and
+##  written in chunks of lines, with a single write call per chunk:
+##  - uel_nodes.inp & fnm_nodes.txt : node coords
+##  - uel_elems.inp & fnm_elems.txt : elem node and edge connec
+##  - fnm_edges.txt : list of one no. per line
+##  - fnm_predelam.txt : list of pairs of no. (elem, interface)
+##  - nsets in the uel input file
+##  the uel data lines are wrapped with the same rules as before:
+##  a new line is started when the line and the next entries would
+##  reach linelength characters, or when it already has linecount
+##  entries
+################################################################
+
+import numpy as np
+
+
+# max no. of lines formatted in memory before they are written
+chunklines = 10000
+
+
+# define the chunked writer of an iterable of lines (incl. the line end)
+def write_chunks(f, lines):
+    buf = []
+    for line in lines:
+        buf.append(line)
+        if (len(buf) >= chunklines):
+            f.write(''.join(buf))
+            buf = []
+    if buf:
+        f.write(''.join(buf))
+
+
+# define the wrapping of groups of entries into uel data lines
+# groups : list of tuples of entry strings; the entries of a group are always
+#          written on the same line, e.g. the two fl. nodes of an edge
+# head   : the start of the 1st line, e.g. the elem index
+# the line length is tracked as a count, without growing the line string;
+# returns the list of lines, without the last comma and the line ends
+def wrap_groups(groups, head, linelength, linecount):
+    lines  = []
+    line   = [head]
+    length = len(head)
+    cntr   = 0
+    for g in groups:
+        glen = 0
+        for t in g:
+            glen = glen + len(t)
+        # if the uel line gets too long, continue on next line
+        if (length + glen >= linelength) or (cntr >= linecount):
+            lines.append(''.join(line))
+            line   = []
+            length = 0
+            cntr   = 0
+        # add the entries to the line and update line count
+        for t in g:
+            line.append(t+',')
+        length = length + glen + len(g)
+        cntr   = cntr + len(g)
+    # remove the last comma from the line
+    lines.append(''.join(line)[:-1])
+    return lines
+
+
+# define the fnm data line of a list of entry strings
+def fnm_line(entries):
+    return ''.join([t+' ' for t in entries])+' \n'
+
+
+# define the writer of nodes
+# xyz   : list (or array) of node coords; floats are written with str()
+# start : no. of nodes before this group of nodes in the uel node list
+def write_nodes(uel_nodes, fnm_nodes, xyz, start):
+    sxyz = [ (str(x), str(y), str(z)) for x, y, z in xyz ]
+    # write the node coords in uel_nodes.inp
+    write_chunks(uel_nodes, \
+    ( str(start+i+1)+', '+', '.join(s)+'\n' for i, s in enumerate(sxyz) ))
+    # write the node coords in fnm node_list
+    write_chunks(fnm_nodes, ( ' '.join(s)+' \n' for s in sxyz ))
+
+
+# define the writer of elems
+# elnds : list (or array) of node connec of elems, one row per elem
+# elegs : list (or array) of edge connec of elems, one row per elem
+# elem indices in uel_elems.inp start from 1
+def write_elems(uel_elems, fnm_elems, elnds, elegs, linelength, linecount):
+    ulines = []
+    flines = []
+    for jel, (nds, egs) in enumerate(zip(elnds, elegs)):
+        snds = [ str(k) for k in nds ]
+        # write the lines of elem node connec, start the line with elem index
+        ulines.extend([ l+'\n' for l in wrap_groups([ (t,) for t in snds ], \
+        str(jel+1)+',', linelength, linecount) ])
+        # write nodecnc array and edgecnc array in fnm_elems
+        flines.append(fnm_line(snds))
+        flines.append(fnm_line([ str(k) for k in egs ]))
+        if (len(flines) >= chunklines):
+            uel_elems.write(''.join(ulines))
+            fnm_elems.write(''.join(flines))
+            ulines = []
+            flines = []
+    uel_elems.write(''.join(ulines))
+    fnm_elems.write(''.join(flines))
+
+
+# define the writer of a list of no., one per line
+def write_list(f, values):
+    write_chunks(f, ( str(v)+' \n' for v in values ))
+
+
+# define the writer of a list of pairs of no., one pair per line
+def write_pairs(f, values1, values2):
+    write_chunks(f, ( str(v1)+' '+str(v2)+' \n' for v1, v2 in zip(values1, values2) ))
+
+
+#***************************************************************
+#   binary fnm input files
+#***************************************************************
+##  fnm_nodes.bin, fnm_edges.bin and fnm_elems.bin are raw little-
+##  endian streams, read with access='stream' by input_module:
+##  - header : 4-char magic, int32 version, int32 size of an integer,
+##             int32 size of a real, then the int32 counts of the file
+##  - nodes  : 'FNMN', counts nnode; real64 coords(3,nnode)
+##  - edges  : 'FNMG', counts nedge, ntie; int32 tie edges(ntie)
+##  - elems  : 'FNME', counts nelem, elnnode, elnedge, nplyblk;
+##             real64 angle(nplyblk), int32 nplies(nplyblk),
+##             int32 nodecnc(elnnode,nelem), int32 edgecnc(elnedge,nelem)
+##  arrays are written in Fortran (column-major) order
+################################################################
+
+# version of the binary fnm input file layout; must match input_module
+fnmbinversion = 1
+
+
+# define the writer of the header of a binary fnm input file
+def write_bin_header(f, magic, counts):
+    f.write(magic.encode('ascii'))
+    np.array([fnmbinversion, 4, 8]+list(counts), dtype='<i4').tofile(f)
+
+
+# define the writer of the binary node file
+# xyz : (nnode,3) array of node coords
+def write_bin_nodes(fname, xyz):
+    xyz = np.asarray(xyz, dtype='<f8')
+    f = open(fname,'wb')
+    write_bin_header(f, 'FNMN', [xyz.shape[0]])
+    xyz.tofile(f)
+    f.close()
+
+
+# define the writer of the binary edge file
+# ties : list (or array) of the tie edges
+def write_bin_edges(fname, nedge, ties):
+    ties = np.asarray(ties, dtype='<i4')
+    f = open(fname,'wb')
+    write_bin_header(f, 'FNMG', [nedge, ties.size])
+    ties.tofile(f)
+    f.close()
+
+
+# define the writer of the binary elem file
+# angles, nplies : layup of plyblocks
+# elnds, elegs   : (nelem,elnnode) node and (nelem,elnedge) edge connec of elems
+def write_bin_elems(fname, angles, nplies, elnds, elegs):
+    elnds = np.asarray(elnds, dtype='<i4')
+    elegs = np.asarray(elegs, dtype='<i4')
+    f = open(fname,'wb')
+    write_bin_header(f, 'FNME', \
+    [elnds.shape[0], elnds.shape[1], elegs.shape[1], len(angles)])
+    np.asarray(angles, dtype='<f8').tofile(f)
+    np.asarray(nplies, dtype='<i4').tofile(f)
+    elnds.tofile(f)
+    elegs.tofile(f)
+    f.close()
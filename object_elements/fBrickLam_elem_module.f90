@@ -21,6 +21,8 @@ private
 integer, parameter :: NNODE_PLYBLK = 24
 integer, parameter :: NNODE_INTERF = 32
 integer, parameter :: NEDGE = 8, NNDRL = 8, NNDFL = 16, NNDIN_INTERF = 8
+! size of the partition state of a plyblk: its status and its 4 local edge status
+integer, parameter :: NSTAT_PLYBLK = 5
 
 type, public :: plyblock_layup
   real(DP) :: angle  = ZERO
@@ -48,8 +50,12 @@ interface extract
   module procedure extract_fBrickLam_elem
 end interface
 
+interface extract_partition
+  module procedure extract_fBrickLam_partition
+end interface
+
 
-public :: set, integrate, extract
+public :: set, integrate, extract, extract_partition
 
 
 
@@ -183,6 +189,33 @@ end subroutine extract_fBrickLam_elem
 
 
 
+pure subroutine extract_fBrickLam_partition (elem, partition)
+! purpose:
+! extract the partition state of the elem, i.e. the status and the local edge
+! status of all its plyblks; the sub elems of the elem (and the coords of its
+! floating nodes) only change when this state changes
+use fBrickPly_elem_module,  only: extract
+
+  type(fBrickLam_elem), intent(in)  :: elem
+  integer, allocatable, intent(out) :: partition(:)
+  
+  integer :: nplyblk, i, j
+  
+  nplyblk = size(elem%plyblks)
+  
+  allocate(partition(NSTAT_PLYBLK*nplyblk))
+  partition = 0
+  
+  do i = 1, nplyblk
+    j = (i-1) * NSTAT_PLYBLK
+    call extract(elem%plyblks(i), curr_status=partition(j+1), &
+    & edge_status_lcl=partition(j+2:j+NSTAT_PLYBLK))
+  end do
+
+end subroutine extract_fBrickLam_partition
+
+
+
 pure subroutine set_fBrickLam_elem (elem, NPLYBLKS)
 ! purpose:
 ! set the plyblks nodes & edges and interfs nodes & edges w.r.t no. of plyblks
@@ -273,7 +306,14 @@ end subroutine set_fBrickLam_elem
 
 
 pure subroutine integrate_fBrickLam_elem (elem, nodes, edges, matrix_cracks, &
-& layup, plylam_mat, plycoh_mat, interf_mat, K_matrix, F_vector, istat, emsg, predelam_interf)
+& layup, plylam_mat, plycoh_mat, interf_mat, K_matrix, F_vector, istat, emsg, predelam_interf, &
+& node_cnc, edge_cnc)
+! purpose:
+! integrate the elem with its nodes and edges; without node_cnc and edge_cnc,
+! nodes and edges are those of the elem, in its local order. with node_cnc and
+! edge_cnc, nodes and edges are the global lists, and node_cnc and edge_cnc the
+! indices of the elem's nodes and edges in them: the elem's nodes and edges
+! are then read and updated in place, without a copy of them by the caller
 
 use parameter_module, only : DP, MSGLENGTH, STAT_SUCCESS, STAT_FAILURE, NDIM, &
                       & ZERO, NDIM, TRANSITION_ELEM
@@ -298,12 +338,14 @@ use global_toolkit_module,    only : assembleKF
   integer,                  intent(out)   :: istat
   character(len=MSGLENGTH), intent(out)   :: emsg
   integer,     optional,    intent(in)    :: predelam_interf
+  integer,     optional,    intent(in)    :: node_cnc(:), edge_cnc(:)
 
 
   ! local variables
   character(len=MSGLENGTH) :: msgloc
   integer                  :: nplyblks, ninterfs, nnodettl, nedgettl, ndof
   integer                  :: plyblk_edge_array(NEDGE)
+  integer                  :: plyblk_node_array(NNODE_PLYBLK), interf_node_array(NNODE_INTERF)
   type(fnode)              :: plyblknds(NNODE_PLYBLK), interfnds(NNODE_INTERF)
   type(fedge)              :: plyblkegs(NEDGE)
   type(lamina_material)    :: plyblklam_mat
@@ -313,6 +355,9 @@ use global_toolkit_module,    only : assembleKF
   logical                  :: topsurf_set, botsurf_set
   integer                  :: plyblk_status, plyblk_egstatus_lcl(NEDGE/2)
   integer                  :: predelam
+  ! indices of the elem's nodes and edges in the passed-in nodes and edges
+  integer                  :: ndidx(size(layup)*NNODE_PLYBLK+(size(layup)-1)*NNDIN_INTERF)
+  integer                  :: egidx(size(layup)*NEDGE)
   ! loop counters
   integer :: i, j
 
@@ -326,6 +371,8 @@ use global_toolkit_module,    only : assembleKF
   nedgettl    = 0
   ndof        = 0
   plyblk_edge_array = 0
+  plyblk_node_array = 0
+  interf_node_array = 0
   theta1      = ZERO
   theta2      = ZERO
   topsurf_set = .false.
@@ -340,6 +387,8 @@ use global_toolkit_module,    only : assembleKF
   ninterfs = nplyblks - 1
   nnodettl = size(nodes)
   nedgettl = size(edges)
+  if (present(node_cnc)) nnodettl = size(node_cnc)
+  if (present(edge_cnc)) nedgettl = size(edge_cnc)
 
   !**** debug checks (comment after debugging) ****
   ! check if the elem has been set by checking plyblks.
@@ -370,6 +419,22 @@ use global_toolkit_module,    only : assembleKF
   end if
   !**** end debug checks (comment after debugging) ****
   
+  ! indices of the elem's nodes and edges in nodes and edges
+  if (present(node_cnc)) then
+    ndidx = node_cnc
+  else
+    do j = 1, nnodettl
+      ndidx(j) = j
+    end do
+  end if
+  if (present(edge_cnc)) then
+    egidx = edge_cnc
+  else
+    do j = 1, nedgettl
+      egidx(j) = j
+    end do
+  end if
+  
   ! initialize K & F
   ndof = NDIM * nnodettl
   allocate(K_matrix(ndof,ndof),F_vector(ndof))
@@ -382,8 +447,12 @@ use global_toolkit_module,    only : assembleKF
   loop_plyblks: do i = 1, nplyblks
   
       ! extract nodes and edges of this plyblk for integration
-      plyblk_edge_array = [(j, j = (i-1)*NEDGE+1, i*NEDGE)]
-      plyblknds         = nodes(elem%plyblks_nodes(i)%array)
+      ! (elementwise, for no array temporary)
+      do j = 1, NNODE_PLYBLK
+        plyblk_node_array(j) = ndidx(elem%plyblks_nodes(i)%array(j))
+      end do
+      plyblk_edge_array = egidx((i-1)*NEDGE+1 : i*NEDGE)
+      plyblknds         = nodes(plyblk_node_array)
       plyblkegs         = edges(plyblk_edge_array)
       
       ! increase fibre toughness w.r.t no. plies in this plyblock
@@ -400,8 +469,8 @@ use global_toolkit_module,    only : assembleKF
       if (istat == STAT_FAILURE) exit loop_plyblks
       
       ! update nodes and edges
-      nodes(elem%plyblks_nodes(i)%array) = plyblknds
-      edges(plyblk_edge_array)           = plyblkegs
+      nodes(plyblk_node_array) = plyblknds
+      edges(plyblk_edge_array) = plyblkegs
       
   end do loop_plyblks
   
@@ -466,7 +535,10 @@ use global_toolkit_module,    only : assembleKF
       
       !----- integration and assembly -----
       ! extract nodes of this interf for integration
-      interfnds = nodes(elem%interfs_nodes(i)%array)
+      do j = 1, NNODE_INTERF
+        interf_node_array(j) = ndidx(elem%interfs_nodes(i)%array(j))
+      end do
+      interfnds = nodes(interf_node_array)
       ! extract top and bot ply angles of this interf
       theta1 = layup(i  )%angle
       theta2 = layup(i+1)%angle
@@ -480,7 +552,7 @@ use global_toolkit_module,    only : assembleKF
       if (istat == STAT_FAILURE) exit loop_interfs
       
       !---- update nodes ----
-      nodes(elem%interfs_nodes(i)%array) = interfnds
+      nodes(interf_node_array) = interfnds
       
     end do loop_interfs
     
@@ -0,0 +1,172 @@
+################################################################
+##### Prototype & benchmark of the spatial index of cracks #####
+################################################################
+##
+##  prototype of the check of the spacing of a new matrix crack
+##  with the existing cracks of a ply (newcrack_ok and add_newcrack
+##  of matrix_crack_module): the cracks of a ply are indexed by
+##  their offsets along the crack normal, kept in ascending order,
+##  and only the cracks of offsets within the spacing of a new
+##  crack are checked, found by a binary search
+##  the benchmark reads the mesh written by the preprocessor (the
+##  fnm_nodes.txt, fnm_elems.txt and fnm_matrix_crack.txt files of
+##  an inputs dir.) and, for each plyblock, tries a new crack at the
+##  centroid of the bottom surface of every elem, in a random order,
+##  as the uel does when the elems fail; the decisions of the index
+##  must agree with those of the full scan of the cracks; the no.
+##  of cracks found is reported with the no. expected in each
+##  plyblock by the preprocessor (the initial size of its list)
+##  e.g., on the inputs dir. of a job, or on a synthetic laminate:
+##    python bench_crack_index.py <jobdir>/inputs
+##    python ../outputs/bench_output.py --nx 100 --ny 100 --ninc 1 \
+##    --formats binary --workdir lam
+##    python bench_crack_index.py lam/inputs --maxncrack 1000
+##  (the lists of cracks grow without limit, as in matrix_crack_module;
+##  --maxncrack limits them, to bound the time of the full scan)
+################################################################
+
+import numpy as np
+import bisect, math, os, sys, time
+
+
+# no. of nodes of a plyblock in the elem node connec
+nnode_plyblk = 24
+
+
+# define the crack normal of a ply of fibre angle theta (in degrees), as in
+# matrix_crack_module
+def crack_normal(theta):
+    t = theta/180.0 * math.pi
+    return (-math.sin(t), math.cos(t))
+
+
+# define the full scan of the cracks of a ply (the check without the index)
+# maxncrack : max. no. of cracks of the ply; None for no limit
+def scan_ok(cracks, theta, point, minl, maxl, maxncrack=None):
+    if maxncrack is not None and len(cracks) >= maxncrack:
+        return False
+    n = crack_normal(theta)
+    for c in cracks:
+        d = abs(n[0]*(c[0]-point[0]) + n[1]*(c[1]-point[1]))
+        if 0.01*minl < d < 2.0*maxl:
+            return False
+    return True
+
+
+# define the list of the cracks of a ply, indexed by their sorted offsets
+class crack_index(object):
+
+    def __init__(self, theta, minl, maxl, maxncrack=None):
+        self.theta     = theta
+        self.normal    = crack_normal(theta)
+        self.minl      = minl
+        self.maxl      = maxl
+        self.maxncrack = maxncrack
+        self.cracks    = []
+        self.offsets   = []
+        self.order     = []
+
+    def offset(self, point):
+        return self.normal[0]*point[0] + self.normal[1]*point[1]
+
+    def ok(self, point):
+        if self.maxncrack is not None and len(self.cracks) >= self.maxncrack:
+            return False
+        s = self.offset(point)
+        # window widened by a relative margin for the rounding of the offsets
+        w = 2.0*self.maxl + 1.e-8 * (abs(point[0]) + abs(point[1]) + 2.0*self.maxl)
+        k = bisect.bisect_left(self.offsets, s-w)
+        n = self.normal
+        while k < len(self.offsets) and self.offsets[k] <= s+w:
+            c = self.cracks[self.order[k]]
+            d = abs(n[0]*(c[0]-point[0]) + n[1]*(c[1]-point[1]))
+            if 0.01*self.minl < d < 2.0*self.maxl:
+                return False
+            k = k + 1
+        return True
+
+    def add(self, point):
+        s = self.offset(point)
+        k = bisect.bisect_right(self.offsets, s)
+        self.offsets.insert(k, s)
+        self.order.insert(k, len(self.cracks))
+        self.cracks.append(tuple(point))
+
+
+# define the reader of the mesh of an inputs dir.
+# returns the node coords (nnode,3), the elem node connec (nelem,elnnode,
+# numbered from 1), the plyblock angles, minl, maxl and the no. of cracks
+# expected in each plyblock
+def read_mesh(indir):
+    f = open(os.path.join(indir, 'fnm_nodes.txt'))
+    nnode = int(f.readline().split()[0])
+    xyz = np.array(f.read().split(), dtype=float).reshape(nnode, 3)
+    f.close()
+    f = open(os.path.join(indir, 'fnm_elems.txt'))
+    nelem, elnnode, elnedge = [ int(v) for v in f.readline().split() ]
+    nplyblk = int(f.readline().split()[0])
+    angles  = [ float(f.readline().split()[0]) for i in range(nplyblk) ]
+    # node connec and edge connec lines of each elem, in turn
+    lines = f.read().split('\n')
+    f.close()
+    connec = np.array(' '.join(lines[0:2*nelem:2]).split(), dtype=int).reshape(nelem, elnnode)
+    f = open(os.path.join(indir, 'fnm_matrix_crack.txt'))
+    minl, maxl = [ float(v) for v in f.readline().split() ]
+    nplyblk = int(f.readline().split()[0])
+    ncracks = [ int(f.readline().split()[0]) for i in range(nplyblk) ]
+    f.close()
+    return xyz, connec, angles, minl, maxl, ncracks
+
+
+# define the centroids of the bottom surfaces of the elems in a plyblock
+def plyblock_centroids(xyz, connec, iblk):
+    bot = connec[:, iblk*nnode_plyblk : iblk*nnode_plyblk+4] - 1
+    return xyz[bot, 0:2].mean(axis=1)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Prototype and benchmark of the spatial '+ \
+    'index of the matrix cracks of a ply')
+    parser.add_argument('indir', help='inputs dir. written by the preprocessor')
+    parser.add_argument('--maxncrack', type=int, \
+    help='max. no. of cracks of a ply (default: no limit)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the order of the elems')
+    args = parser.parse_args()
+    if not os.path.isfile(os.path.join(args.indir, 'fnm_elems.txt')):
+        print('ERROR: no fnm_elems.txt in '+args.indir)
+        sys.exit(1)
+
+    xyz, connec, angles, minl, maxl, ncracks = read_mesh(args.indir)
+    maxncrack = args.maxncrack
+    print('%d elems, %d plyblocks, minl %g, maxl %g' % (len(connec), len(angles), minl, maxl))
+    print('%-10s %8s %8s %8s %12s %12s' % ('plyblock', 'angle', 'expected', 'cracks', \
+    'scan (s)', 'index (s)'))
+    rng   = np.random.RandomState(args.seed)
+    nfail = 0
+    for iblk, theta in enumerate(angles):
+        points = plyblock_centroids(xyz, connec, iblk)[rng.permutation(len(connec))].tolist()
+        # full scan
+        t0 = time.time()
+        cracks, scan = [], []
+        for p in points:
+            ok = scan_ok(cracks, theta, p, minl, maxl, maxncrack)
+            if ok:
+                cracks.append(tuple(p))
+            scan.append(ok)
+        tscan = time.time() - t0
+        # index
+        t0 = time.time()
+        index, indexed = crack_index(theta, minl, maxl, maxncrack), []
+        for p in points:
+            ok = index.ok(p)
+            if ok:
+                index.add(p)
+            indexed.append(ok)
+        tindex = time.time() - t0
+        if scan != indexed:
+            nfail = nfail + 1
+        print('%-10d %8g %8d %8d %12.3f %12.3f%s' % (iblk+1, theta, ncracks[iblk], len(cracks), \
+        tscan, tindex, '' if scan == indexed else '  ERROR: the decisions differ!'))
+    if nfail > 0:
+        sys.exit(1)
@@ -23,8 +23,22 @@ end type matrix_crack
 
 type :: ply_crack_list
   private
+  ! list of type components:
+  ! - cracks     : the cracks of the ply, in their order of addition; the
+  !                list grows (doubles its size) when it is full
+  ! - num_cracks : no. of cracks in the list
+  ! - theta      : fibre angle of the ply, i.e. the angle of its cracks
+  ! - normal     : unit vector normal to the cracks of the ply
+  ! - offsets    : offsets of the cracks along the normal, in ascending order
+  ! - order      : index in cracks of the crack of each offset
+  ! the sorted offsets index the cracks in space: the cracks close to a point
+  ! are found by a binary search of its offset
   type(matrix_crack), allocatable :: cracks(:)
   integer                         :: num_cracks = 0
+  real(DP)                        :: theta = ZERO
+  real(DP)                        :: normal(2) = ZERO
+  real(DP),           allocatable :: offsets(:)
+  integer,            allocatable :: order(:)
 end type ply_crack_list
 
 interface set
@@ -37,11 +51,22 @@ public :: ply_crack_list, set, add_newcrack, newcrack_ok
 contains
 
 
-  pure subroutine set_ply_crack_list(crack_list, maxncracks)
+  pure subroutine set_ply_crack_list(crack_list, ncracks, theta)
+  ! ncracks : initial size of the list, i.e. the no. of cracks expected in the
+  !           ply; the list grows beyond it when needed
     type(ply_crack_list), intent(inout) :: crack_list
-    integer,              intent(in)    :: maxncracks
+    integer,              intent(in)    :: ncracks
+    real(DP),             intent(in)    :: theta
+    
+    allocate(crack_list%cracks(max(ncracks,1)))
+    allocate(crack_list%offsets(max(ncracks,1)))
+    allocate(crack_list%order(max(ncracks,1)))
+    crack_list%offsets = ZERO
+    crack_list%order   = 0
     
-    allocate(crack_list%cracks(maxncracks))
+    crack_list%theta     = theta
+    crack_list%normal(1) = -sin(theta/HALFCIRC * PI)
+    crack_list%normal(2) =  cos(theta/HALFCIRC * PI)
   
   end subroutine set_ply_crack_list
 
@@ -68,6 +93,34 @@ contains
     if (crack_list%num_cracks == size(crack_list%cracks)) is_full = .true.
   
   end function cracklist_full
+
+
+  pure subroutine grow_cracklist(crack_list)
+  ! double the size of the list, keeping its cracks and their sorted offsets;
+  ! the cost of the copies is amortized over the cracks added since the last
+  ! growth
+    type(ply_crack_list), intent(inout) :: crack_list
+    
+    type(matrix_crack), allocatable :: cracks(:)
+    real(DP),           allocatable :: offsets(:)
+    integer,            allocatable :: order(:)
+    integer :: n, nsize
+    
+    n     = crack_list%num_cracks
+    nsize = max(2 * size(crack_list%cracks), 1)
+    
+    allocate(cracks(nsize), offsets(nsize), order(nsize))
+    offsets = ZERO
+    order   = 0
+    cracks(1:n)  = crack_list%cracks(1:n)
+    offsets(1:n) = crack_list%offsets(1:n)
+    order(1:n)   = crack_list%order(1:n)
+    
+    call move_alloc(cracks,  crack_list%cracks)
+    call move_alloc(offsets, crack_list%offsets)
+    call move_alloc(order,   crack_list%order)
+  
+  end subroutine grow_cracklist
   
   
   pure function newcrack_ok (crack_list, point, theta) result(ok)
@@ -78,18 +131,14 @@ contains
     logical            :: ok
     type(matrix_crack) :: crackj
     real(DP)           :: unit_vect(2), distance
-    integer            :: j
+    real(DP)           :: offset, window
+    integer            :: j, k
     
     if (.not. cracklist_set(crack_list)) then
       ok = .false.
       return
     end if
     
-    if (cracklist_full(crack_list)) then
-      ok = .false.
-      return
-    end if
-    
     if (crack_list%num_cracks == 0) then
       ok = .true.
       return
@@ -98,13 +147,40 @@ contains
     ok = .true.
     unit_vect = ZERO
     distance  = ZERO
+    offset    = ZERO
+    window    = ZERO
     j = 0
+    k = 0
     
     unit_vect(1) = -sin(theta/HALFCIRC * PI)
     unit_vect(2) =  cos(theta/HALFCIRC * PI)
     
-    do j = 1, crack_list%num_cracks
-      crackj   = crack_list%cracks(j)
+    ! for a point of another angle than that of the ply, check all the cracks
+    if (theta /= crack_list%theta) then
+      do j = 1, crack_list%num_cracks
+        crackj   = crack_list%cracks(j)
+        distance = abs(dot_product(unit_vect, crackj%coords-point))
+        if ( 0.01*MIN_ELEM_SIZE < distance .and. distance < 2.0*MAX_ELEM_SIZE ) then
+          ok = .false.
+          exit
+        end if
+      end do
+      return
+    end if
+    
+    ! only the cracks of offsets within the spacing of that of the point are
+    ! checked; the window is widened by a relative margin, which covers the
+    ! rounding of the offsets, so that the distances of the cracks outside
+    ! are surely beyond the spacing
+    offset = dot_product(crack_list%normal, point)
+    window = 2.0*MAX_ELEM_SIZE + 1.e-8_DP * (sum(abs(point)) + 2.0*MAX_ELEM_SIZE)
+    
+    ! first crack of offset in the window
+    k = lower_bound(crack_list%offsets, crack_list%num_cracks, offset-window)
+    
+    do while (k <= crack_list%num_cracks)
+      if (crack_list%offsets(k) > offset+window) exit
+      crackj   = crack_list%cracks(crack_list%order(k))
       distance = abs(dot_product(unit_vect, crackj%coords-point))
       !if (distance < MIN_CRACK_SPACING) then
       !  ok = .false.
@@ -114,6 +190,7 @@ contains
         ok = .false.
         exit
       end if
+      k = k + 1
     end do
     
   end function newcrack_ok
@@ -123,18 +200,65 @@ contains
     type(ply_crack_list),     intent(inout) :: crack_list
     real(DP),                 intent(in)    :: coords(2)
     
-    integer :: i
+    integer  :: i, k, j
+    real(DP) :: offset
     i = 0
+    k = 0
+    j = 0
+    offset = ZERO
     
     ! make sure that it is OK to add new crack before calling this subroutine
     
+    if (cracklist_full(crack_list)) call grow_cracklist(crack_list)
+    
     crack_list%num_cracks = crack_list%num_cracks + 1
     
     i = crack_list%num_cracks
     
     crack_list%cracks(i)%coords = coords
+    
+    ! insert its offset in the sorted offsets, after the equal ones
+    offset = dot_product(crack_list%normal, coords)
+    k = lower_bound(crack_list%offsets, i-1, offset)
+    do while (k < i)
+      if (crack_list%offsets(k) > offset) exit
+      k = k + 1
+    end do
+    do j = i, k+1, -1
+      crack_list%offsets(j) = crack_list%offsets(j-1)
+      crack_list%order(j)   = crack_list%order(j-1)
+    end do
+    crack_list%offsets(k) = offset
+    crack_list%order(k)   = i
   
   end subroutine add_newcrack
   
+  
+  pure function lower_bound(a, n, x) result(k)
+  ! binary search of the first of the n sorted values of a not less than x;
+  ! n+1 if there is none
+    real(DP), intent(in) :: a(:)
+    integer,  intent(in) :: n
+    real(DP), intent(in) :: x
+    
+    integer :: k, lo, hi, mid
+    
+    lo  = 1
+    hi  = n + 1
+    mid = 0
+    
+    do while (lo < hi)
+      mid = (lo + hi) / 2
+      if (a(mid) < x) then
+        lo = mid + 1
+      else
+        hi = mid
+      end if
+    end do
+    
+    k = lo
+  
+  end function lower_bound
+  
 
 end module matrix_crack_module
\ No newline at end of file
@@ -0,0 +1,106 @@
+include 'globals/parameter_module.f90'
+include 'globals/global_clock_module.f90'
+include 'globals/global_toolkit_module.f90'
+include 'object_materials/lamina_material_module.f90'
+include 'object_materials/cohesive_material_module.f90'
+include 'object_node/fnode_module.f90'
+include 'object_edge/fedge_module.f90'
+include 'object_matrix_crack/matrix_crack_module.f90'
+include 'object_elements/base_elements/brickPly_elem_module.f90'
+include 'object_elements/base_elements/wedgePly_elem_module.f90'
+include 'object_elements/base_elements/coh8Crack_elem_module.f90'
+include 'object_elements/base_elements/coh6Delam_elem_module.f90'
+include 'object_elements/base_elements/coh8Delam_elem_module.f90'
+include 'object_elements/base_elements/abstPly_elem_module.f90'
+include 'object_elements/base_elements/abstDelam_elem_module.f90'
+include 'object_elements/fBrickPly_elem_module.f90'
+include 'object_elements/fCoh8Delam_subelem_module.f90'
+include 'object_elements/fCoh8Delam_elem_module.f90'
+include 'object_elements/fBrickLam_elem_module.f90'
+include 'datalists/material_list_module.f90'
+include 'datalists/node_list_module.f90'
+include 'datalists/edge_list_module.f90'
+include 'datalists/elem_list_module.f90'
+include 'datalists/predelam_list_module.f90'
+include 'datalists/matrix_crack_list_module.f90'
+include 'inputs/input_module.f90'
+include 'outputs/output_module.f90'
+
+program bench_output
+! Purpose:
+! to time the vtk output of output_module on a preprocessed model, outside of
+! Abaqus (see bench_output.py)
+! usage: bench_output <workdir> <ninc>
+! the fnm input files are read from <workdir>/inputs/ and the vtk files are
+! written in <workdir>/outputs/; the output settings are those of
+! fnm_output.txt, overridden by the environment variables FNM_OUTPUT_FORMAT,
+! FNM_OUTPUT_MESH and FNM_OUTPUT_WRITER as in the uel
+! the nodal displacements are set to arbitrary values at each increment
+!
+use parameter_module,    only: DP, DIRLENGTH, NDIM
+use global_clock_module, only: GLOBAL_CLOCK, set
+use fnode_module,        only: update, extract
+use node_list_module,    only: node_list
+use input_module,        only: indir, set_fnm_materials, &
+                         &     set_fnm_nodes, set_fnm_edges, &
+                         &     set_fnm_elems, set_fnm_predelam, &
+                         &     set_fnm_matrix_crack
+use output_module,       only: outdir, set_output_settings, set_output_format, output, &
+                         &     end_output
+
+implicit none
+
+character(len=DIRLENGTH) :: workdir, arg
+integer                  :: ninc, kinc, i
+integer(kind=8)          :: c0, c1, crate
+real(DP)                 :: x(NDIM), u(NDIM), tinc, ttot
+
+workdir = ''
+arg     = ''
+ninc    = 1
+
+call get_command_argument(1, workdir)
+call get_command_argument(2, arg)
+if (len_trim(arg) > 0) read(arg,*) ninc
+
+outdir = trim(workdir)//'/outputs/'
+indir  = trim(workdir)//'/inputs/'
+
+call set_output_settings(indir)
+call set_output_format
+call set(GLOBAL_CLOCK, curr_step=0, curr_inc=0)
+call set_fnm_materials
+call set_fnm_nodes
+call set_fnm_edges
+call set_fnm_elems
+call set_fnm_predelam
+call set_fnm_matrix_crack
+
+ttot = 0._DP
+do kinc = 1, ninc
+    call set(GLOBAL_CLOCK, curr_step=1, curr_inc=kinc)
+    do i = 1, size(node_list)
+        call extract(node_list(i), x=x)
+        u = kinc * 1.e-3_DP * (x + sin(real(i,DP)))
+        call update(node_list(i), u=u)
+    end do
+    call system_clock(c0, crate)
+    call output(1, kinc, outdir)
+    call system_clock(c1)
+    tinc = real(c1-c0,DP)/real(crate,DP)
+    ttot = ttot + tinc
+    write(*,'(a,i6,a,f10.4,a)') 'increment ', kinc, ': ', tinc, ' s'
+end do
+write(*,'(a,f10.4,a)') 'output time per increment: ', ttot/ninc, ' s'
+
+! end of the analysis, for the background writer
+call end_output
+
+end program bench_output
+
+
+subroutine xit()
+! exit of EXIT_FUNCTION, outside of Abaqus
+  write(*,*) 'error: see the messages above'
+  stop 1
+end subroutine xit
@@ -0,0 +1,150 @@
+################################################################
+############ Benchmark of the vtk output of the FNM ############
+################################################################
+##
+##  a synthetic laminate of nx x ny C3D8 elems (one elem through
+##  the thickness) is written as an abaqus input file, it is
+##  preprocessed (see inputs/preproc_batch), and the output of
+##  output_module is timed outside of Abaqus by the driver
+##  bench_output.f90, for each of the output formats
+##  the driver is compiled with gfortran (or the compiler of the
+##  environment variable FC); another version of output_module can
+##  be timed on the same model with --output-module, e.g. that of
+##  a previous commit:
+##    git show HEAD~1:outputs/output_module.f90 > old_output.f90
+##    python bench_output.py --nx 100 --ny 100 --output-module old_output.f90
+##  with --writer background, the vtk files are written by
+##  postproc_writer.py, run next to the driver; the time is then
+##  the time taken from the analysis
+##  e.g.:
+##    python bench_output.py --nx 200 --ny 100 --ninc 5 --formats ascii,binary
+################################################################
+
+import os, shutil, subprocess, sys, tempfile, time
+
+# root dir. of the repository
+rootdir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(rootdir, 'inputs'))
+
+from preproc_job import new_job
+from preproc_batch import run_job
+
+
+# define the writer of the abaqus input file of a laminate of nx x ny elems of
+# size h, of the thickness of the layup
+def write_laminate(fname, nx, ny, h, thick):
+    f = open(fname, 'w')
+    f.write('*Heading\n** Job name: bench Model name: bench\n')
+    f.write('*Preprint, echo=NO, model=NO, history=NO, contact=NO\n')
+    f.write('*Part, name=fnm\n*Node\n')
+    nlayer = (nx+1)*(ny+1)
+    for k in range(2):
+        for j in range(ny+1):
+            for i in range(nx+1):
+                f.write('%d, %.6g, %.6g, %.6g\n' % (1+i+j*(nx+1)+k*nlayer, i*h, j*h, k*thick))
+    f.write('*Element, type=C3D8\n')
+    for j in range(ny):
+        for i in range(nx):
+            n1 = 1+i+j*(nx+1)
+            n  = [n1, n1+1, n1+nx+2, n1+nx+1]
+            n  = n + [ v+nlayer for v in n ]
+            f.write('%d, %s\n' % (1+i+j*nx, ', '.join( str(v) for v in n )))
+    f.write('*Nset, nset=FIX, generate\n 1, %d, %d\n' % (1+ny*(nx+1), nx+1))
+    f.write('*End Part\n**\n*Assembly, name=Assembly\n')
+    f.write('*Instance, name=fnm-1, part=fnm\n*End Instance\n*End Assembly\n')
+    f.write('**\n** BOUNDARY CONDITIONS\n**\n*Boundary\nfnm-1.FIX, 1, 3\n')
+    f.write('** '+'-'*64+'\n**\n** STEP: tension\n**\n')
+    f.write('*Step, name=tension, inc=1000\n*Static\n0.01, 1., 1e-05, 0.01\n*End Step\n')
+    f.close()
+
+
+# define the build of the driver in builddir; the output_module file (if any)
+# is used instead of that of the repository
+def build_driver(builddir, output_module=None):
+    fc  = os.environ.get('FC', 'gfortran')
+    src = os.path.join(builddir, 'bench_output.f90')
+    shutil.copy(os.path.join(rootdir, 'outputs', 'bench_output.f90'), src)
+    incs = []
+    if output_module:
+        os.makedirs(os.path.join(builddir, 'outputs'))
+        shutil.copy(output_module, os.path.join(builddir, 'outputs', 'output_module.f90'))
+        incs.append('-I'+builddir)
+    incs.append('-I'+rootdir)
+    exe = os.path.join(builddir, 'bench_output')
+    subprocess.check_call([fc, '-O2', '-ffree-line-length-none'] + incs + \
+    ['-J', builddir, src, '-o', exe])
+    return exe
+
+
+# define the run of the driver for ninc increments in the output format fmt
+# returns the output time per increment (s), and the size of the files (MB)
+def run_driver(exe, workdir, ninc, fmt, mesh, writer='direct'):
+    outdir = os.path.join(workdir, 'outputs')
+    if os.path.isdir(outdir):
+        shutil.rmtree(outdir)
+    os.makedirs(outdir)
+    env = dict(os.environ)
+    env['FNM_OUTPUT_FORMAT'] = fmt
+    env['FNM_OUTPUT_MESH']   = mesh
+    env['FNM_OUTPUT_WRITER'] = writer
+    consumer = None
+    if writer == 'background':
+        consumer = subprocess.Popen([sys.executable, \
+        os.path.join(rootdir, 'outputs', 'postproc_writer.py'), outdir], stdout=subprocess.PIPE)
+    out = subprocess.check_output([exe, workdir, str(ninc)], env=env)
+    if consumer is not None:
+        consumer.communicate()
+    if not isinstance(out, str):
+        out = out.decode()
+    tinc = [ float(l.split(':')[1].split()[0]) for l in out.splitlines() \
+             if l.startswith('output time per increment') ][0]
+    size = sum( os.path.getsize(os.path.join(outdir, f)) for f in os.listdir(outdir) )
+    return tinc, size/2.0**20
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Benchmark of the FNM vtk output '+ \
+    'on a synthetic laminate')
+    parser.add_argument('--nx', type=int, default=100, help='no. of elems along x')
+    parser.add_argument('--ny', type=int, default=100, help='no. of elems along y')
+    parser.add_argument('--layup', default='0,45,-45,90,90,-45,45,0', \
+    help='fibre angles of the plies, e.g. 0,90,90,0')
+    parser.add_argument('--plythick', type=float, default=0.125, help='ply thickness')
+    parser.add_argument('--size', type=float, default=0.5, help='elem size')
+    parser.add_argument('--ninc', type=int, default=3, help='no. of increments')
+    parser.add_argument('--formats', default='ascii,binary', help='output formats')
+    parser.add_argument('--mesh', default='all', help='output of the mesh: all or changed')
+    parser.add_argument('--writer', default='direct', help='writer: direct or background')
+    parser.add_argument('--output-module', help='output_module file to be timed instead '+ \
+    'of that of the repository')
+    parser.add_argument('--workdir', help='working dir. (default: a temporary dir., removed '+ \
+    'at the end)')
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix='bench_output')
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+    try:
+        # synthetic laminate, preprocessed in workdir/inputs
+        layup = [ int(a) for a in args.layup.split(',') ]
+        write_laminate(os.path.join(workdir, 'bench.inp'), args.nx, args.ny, args.size, \
+        len(layup)*args.plythick)
+        jb = new_job({ 'jobname': 'bench', 'symmetric': False, 'layup': layup,
+                       'plythick': args.plythick,
+                       'minl': args.size, 'maxl': args.size*1.5 })
+        t0  = time.time()
+        res = run_job(jb, workdir, workdir)
+        if res.error:
+            print('ERROR: preprocessing failed: '+res.error)
+            sys.exit(1)
+        print('laminate: %d x %d elems, %d plies, preprocessed in %.1f s' \
+        % (args.nx, args.ny, len(layup), time.time()-t0))
+        exe = build_driver(tempfile.mkdtemp(dir=workdir), args.output_module)
+        print('%-8s %12s %12s' % ('format', 's/increment', 'MB/increment'))
+        for fmt in args.formats.split(','):
+            tinc, size = run_driver(exe, workdir, args.ninc, fmt, args.mesh, args.writer)
+            print('%-8s %12.3f %12.2f' % (fmt, tinc, size/args.ninc))
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir)
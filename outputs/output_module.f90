@@ -1,5 +1,19 @@
 module output_module
-use parameter_module, only: DIRLENGTH, ELTYPELENGTH, DP, NDIM, ZERO, MSG_FILE, EXIT_FUNCTION
+!
+!  Purpose:
+!   this module writes the vtk output files of the analysis, directly or
+!   through the background writer (see outwriter)
+!
+!  Platform requirements:
+!   the background writer sleeps between two checks of a busy snapshot slot
+!   through the POSIX usleep (see poll_sleep), from the C library of POSIX
+!   systems, or of MinGW for gfortran on Windows; with the Intel compiler on
+!   Windows (_WIN32 defined), usleep is not called, and the sleep is a wait on
+!   system_clock instead
+!
+use parameter_module, only: DIRLENGTH, ELTYPELENGTH, DP, NDIM, ZERO, MSG_FILE, EXIT_FUNCTION, &
+                      & INT_ALLOC_ARRAY, NST_STANDARD, NST_COHESIVE
+use, intrinsic :: iso_c_binding, only: C_INT
 
 implicit none
 private
@@ -7,18 +21,392 @@ private
 ! define global variable for output directory
 character(len=DIRLENGTH), save :: outdir
 
+! format of the vtk output files, set in the job file of the preprocessor (see
+! set_output_settings); the environment variable FNM_OUTPUT_FORMAT, if it is
+! set, overrides it (see set_output_format):
+! - 'ascii'  : ASCII legacy vtk files fnm-<kinc>.vtk (default)
+! - 'binary' : binary legacy vtk files fnm-<kinc>.vtk; data are big endian,
+!              4-byte ints and single precision floats
+! - 'both'   : ASCII fnm-<kinc>.vtk and binary fnm-<kinc>.bin.vtk files, to
+!              check the binary output against the ASCII one
+character(len=6), save :: outfmt = 'ascii'
 
-public :: outdir, output
+! output of the mesh (POINTS, CELLS & CELL_TYPES) in the vtk files, set in the
+! job file of the preprocessor; the environment variable FNM_OUTPUT_MESH, if it
+! is set, overrides it:
+! - 'all'     : the mesh is written in every file (default)
+! - 'changed' : the mesh is only written when the partition state of an elem
+!               has changed since its last output (and at the first output of
+!               a step); the other files only have the point & cell data, and
+!               their title line refers to the file of their mesh, e.g.
+!               'for Floating Node Method output, mesh in fnm-0000000012.vtk'
+!               (see postproc_mesh to rebuild the full files)
+character(len=7), save :: outmesh = 'all'
+
+! writer of the vtk files, set in the job file of the preprocessor; the
+! environment variables FNM_OUTPUT_WRITER, FNM_OUTPUT_SLOTS and FNM_OUTPUT_WAIT,
+! if they are set, override the writer, outslots and outwait:
+! - 'direct'     : the vtk files are written by output (default)
+! - 'background' : output only writes a snapshot of the output buffers (see
+!                  extract_output) in a ring of outslots slot files of the
+!                  outputs dir., snap-<slot>.bin, each marked as ready by an
+!                  empty file snap-<slot>.ready; the vtk files are written from
+!                  the snapshots by a separate process (see postproc_writer.py),
+!                  which removes the files of a slot once it is written, so
+!                  that the analysis goes on while the vtk files are written.
+!                  if the writer falls behind, output waits for the slot to be
+!                  free (outslots slots, default 4), checking it every OUTPOLL
+!                  seconds; after outwait seconds (default 600), the slot is
+!                  given up and the vtk files are written directly from then
+!                  on. the first wait is reported in the message file.
+!                  the end of the analysis is marked by the file snap.end
+character(len=10), save :: outwriter = 'direct'
+integer,           save :: outslots  = 4
+real(DP),          save :: outwait   = 600._DP
+integer,           save :: outseq    = 0    ! no. of snapshots written
+logical,           save :: outwaited = .false. ! .true. once a slot was waited for
+
+! output settings of the analysis, read from the file fnm_output.txt of the
+! inputs dir. (written by the preprocessor from the job file, see
+! set_output_settings); the defaults, if there is no such file, are an output
+! of all the fields of all the elems at every increment
+! - outfreq   : output every outfreq increments (0: no output by increment no.)
+! - outintv   : output when the total time has increased by outintv since the
+!               last output (0.: no output by time)
+! - outfields : fields written in the vtk files, in the order of FIELDNAMES
+! - outdamage : if >= 0., only the elems with a damage variable (df, dm or dd
+!               of any of its sub elems) above outdamage are written
+! the first increment of a step is always written
+integer,  parameter :: NFIELD = 9
+character(len=12), parameter :: FIELDNAMES(NFIELD) = [character(len=12) :: &
+& 'displacement', 'stress', 'strain', 'traction', 'separation', &
+& 'df', 'dm', 'dd', 'phi']
+integer,  save :: outfreq   = 1
+real(DP), save :: outintv   = ZERO
+logical,  save :: outfields(NFIELD) = .true.
+real(DP), save :: outdamage = -1._DP
+
+! total time of the last output, and elems of the last output (with outdamage)
+real(DP),             save :: lasttime = ZERO
+logical, allocatable, save :: outsel(:)
+logical,              save :: selchanged = .false.
+
+! partition state of the elems and increment no. of the last output of the
+! mesh, and increment no. of the last output
+type(INT_ALLOC_ARRAY), allocatable, save :: meshstat(:)
+character(len=DIRLENGTH), save :: meshnum   = ''
+integer,                  save :: lastkinc  = 0
+
+! buffers of the output of an increment: the nodes and the sub elems of all
+! the elems are extracted once per increment (see extract_output), and all the
+! sections of the vtk files are written from these buffers; the buffers are
+! kept between increments and only grow when the no. of sub elems grows
+type :: output_buffer
+  integer               :: nnode = 0, ncell = 0
+  real(DP), allocatable :: x(:,:), u(:,:)           ! (NDIM, nnode)
+  integer,  allocatable :: connec(:,:)              ! (8, ncell), 0 if no node
+  real(DP), allocatable :: stress(:,:), strain(:,:) ! (NST_STANDARD, ncell)
+  real(DP), allocatable :: tau(:,:), delta(:,:)     ! (NST_COHESIVE, ncell)
+  real(DP), allocatable :: df(:), dm(:), dd(:), phi(:)
+end type output_buffer
+
+type(output_buffer), save :: outbuf
+
+! kinds of the int and float data of the binary vtk files
+integer, parameter :: I4 = selected_int_kind(9)
+integer, parameter :: SP = selected_real_kind(6)
+
+! private parameter, length of format string
+integer, parameter :: FMTLENGTH = 10
+
+! private parameter, version of the snapshot files (see write_snapshot)
+integer, parameter :: SNAPVERSION = 1
+
+! private parameter, time between two checks of a busy slot, in seconds
+real(DP), parameter :: OUTPOLL = 0.05_DP
+
+! sleep of the calling thread (POSIX), between two checks of a busy slot; only
+! called where usleep exists (see poll_sleep)
+interface
+  integer(C_INT) function usleep(usec) bind(C, name='usleep')
+    import :: C_INT
+    integer(C_INT), value :: usec
+  end function usleep
+end interface
+
+
+public :: outdir, outfmt, outmesh, outwriter, outfreq, outintv, outfields, outdamage, &
+        & set_output_settings, set_output_format, output_due, output, end_output
 
 
 contains
 
 
+subroutine set_output_settings(indir)
+! read the output settings from the file fnm_output.txt of the inputs dir.:
+!   format mesh
+!   freq interval
+!   nfield
+!   field name (one per line, nfield lines)
+!   damage
+!   writer slots wait
+! the default settings are kept if there is no such file
+! (to be called before set_output_format)
+
+  character(len=*), intent(in) :: indir   ! inputs dir.
+
+  character(len=DIRLENGTH) :: fname, fmtname, meshname, writername
+  character(len=12)        :: fieldname
+  integer                  :: outunit, nname, i, k
+  logical                  :: isfile
+
+  fname      = trim(indir)//'fnm_output.txt'
+  fmtname    = ''
+  meshname   = ''
+  writername = ''
+  fieldname  = ''
+  outunit    = 0
+  nname      = 0
+  i          = 0
+  k          = 0
+  isfile     = .false.
+  
+  outfmt    = 'ascii'
+  outmesh   = 'all'
+  outfreq   = 1
+  outintv   = ZERO
+  outfields = .true.
+  outdamage = -1._DP
+  outwriter = 'direct'
+  outslots  = 4
+  outwait   = 600._DP
+  lasttime  = ZERO
+  
+  inquire(file=fname, exist=isfile)
+  if (.not.isfile) return
+  
+  open(newunit(outunit), file=fname, status='old', action='read')
+  
+  read(outunit, *) fmtname, meshname
+  
+  read(outunit, *) outfreq, outintv
+  
+  read(outunit, *) nname
+  if (nname > 0) outfields = .false.
+  do i = 1, nname
+      read(outunit, *) fieldname
+      do k = 1, NFIELD
+          if (trim(fieldname) == trim(FIELDNAMES(k))) exit
+      end do
+      if (k > NFIELD) then
+        write(MSG_FILE,*)'unsupported output field: ', trim(fieldname)
+        call EXIT_FUNCTION
+      end if
+      outfields(k) = .true.
+  end do
+  
+  read(outunit, *) outdamage
+  
+  read(outunit, *) writername, outslots, outwait
+  
+  close(outunit)
+  
+  select case (trim(fmtname))
+  case ('ascii', 'binary', 'both')
+      outfmt = trim(fmtname)
+  case default
+      write(MSG_FILE,*)'unsupported output format: ', trim(fmtname)
+      call EXIT_FUNCTION
+  end select
+  
+  select case (trim(meshname))
+  case ('all', 'changed')
+      outmesh = trim(meshname)
+  case default
+      write(MSG_FILE,*)'unsupported output of the mesh: ', trim(meshname)
+      call EXIT_FUNCTION
+  end select
+  
+  if (outfreq < 0 .or. outintv < ZERO) then
+    write(MSG_FILE,*)'invalid output frequency or interval: ', outfreq, outintv
+    call EXIT_FUNCTION
+  end if
+  
+  select case (trim(writername))
+  case ('direct', 'background')
+      outwriter = trim(writername)
+  case default
+      write(MSG_FILE,*)'unsupported output writer: ', trim(writername)
+      call EXIT_FUNCTION
+  end select
+  
+  if (outslots < 1 .or. outwait < ZERO) then
+    write(MSG_FILE,*)'invalid no. of output slots or wait: ', outslots, outwait
+    call EXIT_FUNCTION
+  end if
+
+end subroutine set_output_settings
+
+
+
+subroutine set_output_format()
+! override the output format, the output of the mesh and the writer read by
+! set_output_settings with the environment variables FNM_OUTPUT_FORMAT,
+! FNM_OUTPUT_MESH, FNM_OUTPUT_WRITER, FNM_OUTPUT_SLOTS and FNM_OUTPUT_WAIT,
+! if they are set
+! (outdir must be set: the slot files of a previous analysis are removed)
+
+  character(len=DIRLENGTH) :: envval
+  integer                  :: istat, i
+  
+  envval  = ''
+  istat   = 0
+  i       = 0
+  
+  outseq    = 0
+  outwaited = .false.
+  
+  call get_env('FNM_OUTPUT_FORMAT', envval)
+  
+  select case (trim(envval))
+  case ('')
+      ! not set
+  case ('ascii', 'binary', 'both')
+      outfmt = trim(envval)
+  case default
+      write(MSG_FILE,*)'unsupported FNM_OUTPUT_FORMAT: ', trim(envval)
+      call EXIT_FUNCTION
+  end select
+  
+  call get_env('FNM_OUTPUT_MESH', envval)
+  
+  select case (trim(envval))
+  case ('')
+      ! not set
+  case ('all', 'changed')
+      outmesh = trim(envval)
+  case default
+      write(MSG_FILE,*)'unsupported FNM_OUTPUT_MESH: ', trim(envval)
+      call EXIT_FUNCTION
+  end select
+  
+  call get_env('FNM_OUTPUT_WRITER', envval)
+  
+  select case (trim(envval))
+  case ('')
+      ! not set
+  case ('direct', 'background')
+      outwriter = trim(envval)
+  case default
+      write(MSG_FILE,*)'unsupported FNM_OUTPUT_WRITER: ', trim(envval)
+      call EXIT_FUNCTION
+  end select
+  
+  call get_env('FNM_OUTPUT_SLOTS', envval)
+  if (len_trim(envval) > 0) then
+    read(envval, *, iostat=istat) outslots
+    if (istat /= 0 .or. outslots < 1) then
+      write(MSG_FILE,*)'unsupported FNM_OUTPUT_SLOTS: ', trim(envval)
+      call EXIT_FUNCTION
+    end if
+  end if
+  
+  call get_env('FNM_OUTPUT_WAIT', envval)
+  if (len_trim(envval) > 0) then
+    read(envval, *, iostat=istat) outwait
+    if (istat /= 0 .or. outwait < ZERO) then
+      write(MSG_FILE,*)'unsupported FNM_OUTPUT_WAIT: ', trim(envval)
+      call EXIT_FUNCTION
+    end if
+  end if
+  
+  ! remove the slot files of a previous analysis
+  if (trim(outwriter) == 'background') then
+    call remove_file(trim(outdir)//'snap.end')
+    do i = 0, outslots - 1
+        call remove_file(slot_file(i, '.ready'))
+        call remove_file(slot_file(i, '.bin'))
+    end do
+  end if
+
+  contains
+  
+    subroutine get_env(name, val)
+      character(len=*), intent(in)  :: name
+      character(len=*), intent(out) :: val
+      integer :: istat
+      val   = ''
+      istat = 0
+      call get_environment_variable(name, val, status=istat)
+      if (istat /= 0) val = ''
+      val = adjustl(val)
+    end subroutine get_env
+
+end subroutine set_output_format
+
+
+
+logical function output_due(kinc, totaltime) result(due)
+! returns .true. if the increment kinc, ending at the total time totaltime, is
+! to be written: the first increment of a step, every outfreq increments, and
+! once the total time has increased by outintv since the last output
+
+  integer,  intent(in) :: kinc
+  real(DP), intent(in) :: totaltime
+  
+  due = ( kinc == 1 )
+  
+  if (outfreq > 0) then
+    if (mod(kinc, outfreq) == 0) due = .true.
+  end if
+  
+  ! (with a tolerance for the rounding of the time increments)
+  if (outintv > ZERO) then
+    if (totaltime >= lasttime + outintv * (1._DP - 1.e-6_DP)) due = .true.
+  end if
+  
+  if (due) lasttime = totaltime
+
+end function output_due
+
+
+
+logical function mesh_changed() result(changed)
+! update the partition state of the elems; returns .true. if it has changed
+! since the last call
+use elem_list_module,      only: elem_list
+use fBrickLam_elem_module, only: extract_partition
+
+  integer, allocatable :: partition(:)
+  integer :: nfLam, nfl
+  
+  nfLam   = size(elem_list)
+  changed = .false.
+  
+  if (.not.allocated(meshstat)) then
+    allocate(meshstat(nfLam))
+    changed = .true.
+  end if
+  
+  do nfl = 1, nfLam
+    call extract_partition(elem_list(nfl), partition)
+    if (allocated(meshstat(nfl)%array)) then
+      if (size(meshstat(nfl)%array) == size(partition)) then
+        if (all(meshstat(nfl)%array == partition)) cycle
+      end if
+      deallocate(meshstat(nfl)%array)
+    end if
+    ! new partition state of this elem
+    allocate(meshstat(nfl)%array(size(partition)))
+    meshstat(nfl)%array = partition
+    changed = .true.
+  end do
+
+end function mesh_changed
+
+
+
 subroutine output(kstep,kinc,outdir)
-use node_list_module, only: node_list
-use elem_list_module, only: elem_list, elem_node_connec
-use fnode_module,     only: extract
-use fBrickLam_elem_module, only: extract
    
   ! passed-in variables
   integer,                  intent(in)  :: kstep    ! current step number
@@ -26,16 +414,417 @@ use fBrickLam_elem_module, only: extract
   character(len=DIRLENGTH), intent(in)  :: outdir   ! output directory name
   
   ! local variables
+  character(len=DIRLENGTH)    :: outnum   ! output increment number (embedded in the outfile name)
+  character(len=FMTLENGTH)    :: FMATKINC
+  character(len=DIRLENGTH)    :: meshvtk, meshbin ! files of the mesh, if it is not written
+  integer                     :: meshkinc ! increment no. of the mesh, if it is not written
+  logical                     :: newmesh
+  
+  outnum   = ''
+  FMATKINC = ''
+  meshvtk  = ''
+  meshbin  = ''
+  meshkinc = 0
+  newmesh  = .true.
+  
+  ! format parameters
+  FMATKINC  = 'i10.10' ! for increment no.
+
+  ! write the increment number as a character and store in outnum
+  write(outnum,'('//trim(FMATKINC)//')') kinc
+  
+  ! extract the nodes & elems once, for all the output files
+  call extract_output()
+  
+  ! check if the mesh needs to be written; the increment no. restarts at
+  ! each step, so the mesh files of the previous steps may be overwritten;
+  ! with outdamage, the mesh also changes with the elems written
+  if (trim(outmesh) == 'changed') then
+    newmesh = mesh_changed()
+    if (selchanged) newmesh = .true.
+    if (kinc <= lastkinc) newmesh = .true.
+    if (newmesh) then
+      meshnum = outnum
+    else
+      meshvtk = 'fnm-'//trim(meshnum)//'.vtk'
+      meshbin = 'fnm-'//trim(meshnum)//'.bin.vtk'
+    end if
+    lastkinc = kinc
+  end if
+  
+  ! hand the buffers to the background writer; the output files are written
+  ! here if the writer does not free a slot in time
+  if (trim(outwriter) == 'background') then
+    meshkinc = 0
+    if (len_trim(meshvtk) > 0) read(meshnum,*) meshkinc
+    if (write_snapshot(kstep, kinc, meshkinc)) return
+  end if
+  
+  ! create the output file name(s) and write the output file(s)
+  !~outfile=trim(outdir)//'/outputs/'//trim(outnum)//'.vtk'
+  select case (trim(outfmt))
+  case ('binary')
+      call write_vtk(trim(outdir)//'fnm-'//trim(outnum)//'.vtk', .true., meshvtk)
+  case ('both')
+      call write_vtk(trim(outdir)//'fnm-'//trim(outnum)//'.vtk', .false., meshvtk)
+      call write_vtk(trim(outdir)//'fnm-'//trim(outnum)//'.bin.vtk', .true., meshbin)
+  case default
+      call write_vtk(trim(outdir)//'fnm-'//trim(outnum)//'.vtk', .false., meshvtk)
+  end select
+
+end subroutine output
+
+
+
+logical function write_snapshot(kstep, kinc, meshkinc) result(written)
+! write the output buffers in the next slot of the ring of snapshots, for the
+! background writer; if the slot is still in use, wait for the writer to free
+! it, checking it every OUTPOLL seconds, and give up after outwait seconds:
+! .false. is then returned, and the writer is set to 'direct'
+! the snapshot file is a stream of native ints (4 bytes) and reals (DP):
+!   header (80 bytes) : 'FNMS', version, seq. no., kstep, kinc, kinc of the
+!                       mesh file (0 if the mesh is written), nnode, ncell,
+!                       outfmt (8 chars), NDIM, outfields (9 ints, 0 or 1)
+!   x(NDIM,nnode), u(NDIM,nnode), connec(8,ncell) (ints), stress(6,ncell),
+!   strain(6,ncell), tau(3,ncell), delta(3,ncell), df, dm, dd, phi (ncell)
+
+  integer, intent(in) :: kstep, kinc, meshkinc
+  
+  character(len=DIRLENGTH) :: fbin, fready
+  integer                  :: slot, outunit, nnode, ncell
+  integer(kind=8)          :: c0, c1, crate
+  logical                  :: busy
+  
+  slot    = mod(outseq, outslots)
+  fbin    = slot_file(slot, '.bin')
+  fready  = slot_file(slot, '.ready')
+  outunit = 0
+  nnode   = outbuf%nnode
+  ncell   = outbuf%ncell
+  c0      = 0
+  c1      = 0
+  crate   = 1
+  busy    = .false.
+  written = .false.
+  
+  ! wait for the writer to free the slot
+  call system_clock(c0, crate)
+  inquire(file=fready, exist=busy)
+  if (busy .and. .not.outwaited) then
+    ! (reported once: a writer which is not running shows up at once)
+    write(MSG_FILE,*)'waiting for the background output writer to free ', trim(fready), &
+    & '; is postproc_writer.py running on the outputs dir.?'
+    flush(MSG_FILE)
+    outwaited = .true.
+  end if
+  do while (busy)
+      call system_clock(c1)
+      if (real(c1-c0,DP)/real(crate,DP) > outwait) then
+        write(MSG_FILE,*)'the background output writer has not freed ', trim(fready), &
+        & ' in ', outwait, ' s; the output files are now written directly'
+        outwriter = 'direct'
+        return
+      end if
+      call poll_sleep
+      inquire(file=fready, exist=busy)
+  end do
+  
+  open(newunit(outunit), file=fbin, status="replace", action="write", &
+  & access="stream", form="unformatted")
+  write(outunit) 'FNMS', int(SNAPVERSION,I4), int(outseq,I4), int(kstep,I4), int(kinc,I4), &
+  & int(meshkinc,I4), int(nnode,I4), int(ncell,I4), outfmt//'  ', int(NDIM,I4), &
+  & merge(1_I4, 0_I4, outfields)
+  write(outunit) outbuf%x(:,1:nnode), outbuf%u(:,1:nnode)
+  write(outunit) int(outbuf%connec(:,1:ncell), I4)
+  write(outunit) outbuf%stress(:,1:ncell), outbuf%strain(:,1:ncell), &
+  & outbuf%tau(:,1:ncell), outbuf%delta(:,1:ncell), &
+  & outbuf%df(1:ncell), outbuf%dm(1:ncell), outbuf%dd(1:ncell), outbuf%phi(1:ncell)
+  close(outunit)
+  
+  ! mark the slot as ready, once the snapshot is complete
+  open(newunit(outunit), file=fready, status="replace", action="write")
+  close(outunit)
+  
+  outseq  = outseq + 1
+  written = .true.
+
+end function write_snapshot
+
+
+
+subroutine poll_sleep()
+! sleep OUTPOLL seconds, between two checks of a busy snapshot slot: through
+! usleep, except with the Intel compiler on Windows, where it is a wait on
+! system_clock (see the platform requirements of the module)
+! (the !DEC$ directives are only read by the Intel compiler; other compilers
+!  call usleep)
+
+  integer(kind=8) :: c0, c1, crate
+  integer(C_INT)  :: istat
+  logical         :: slept
+  
+  c0    = 0
+  c1    = 0
+  crate = 1
+  istat = 0
+  slept = .false.
+  
+!DEC$ IF DEFINED(_WIN32)
+  ! no usleep: wait on system_clock below
+!DEC$ ELSE
+  istat = usleep(int(1.e6_DP*OUTPOLL, C_INT))
+  slept = .true.
+!DEC$ ENDIF
+  
+  if (slept) return
+  
+  call system_clock(c0, crate)
+  c1 = c0
+  do while (real(c1-c0,DP)/real(crate,DP) < OUTPOLL)
+      call system_clock(c1)
+  end do
+
+end subroutine poll_sleep
+
+
+
+subroutine end_output()
+! mark the end of the analysis for the background writer, if any snapshot was
+! written (also if the output files are now written directly)
+
+  integer :: outunit
+  
+  outunit = 0
+  
+  if (outseq == 0) return
+  
+  open(newunit(outunit), file=trim(outdir)//'snap.end', status="replace", action="write")
+  write(outunit,*) outseq
+  close(outunit)
+
+end subroutine end_output
+
+
+
+function slot_file(slot, ext) result(fname)
+! file of a slot of the ring of snapshots
+
+  integer,          intent(in) :: slot
+  character(len=*), intent(in) :: ext
+  character(len=DIRLENGTH)     :: fname
+  
+  character(len=FMTLENGTH) :: num
+  
+  num = ''
+  write(num,'(i0)') slot
+  fname = trim(outdir)//'snap-'//trim(num)//ext
+
+end function slot_file
+
+
+
+subroutine remove_file(fname)
+! remove the file fname, if it exists
+
+  character(len=*), intent(in) :: fname
+  
+  integer :: outunit
+  logical :: isfile
+  
+  outunit = 0
+  isfile  = .false.
+  
+  inquire(file=fname, exist=isfile)
+  if (.not.isfile) return
+  
+  open(newunit(outunit), file=fname, status='old')
+  close(outunit, status='delete')
+
+end subroutine remove_file
+
+
+
+subroutine extract_output()
+! extract the node coords & displacements and the sub elem connec & fields of
+! all the elems into the output buffers, in a single pass over the nodes and
+! the elems; the buffers are kept for the next outputs, and they are only
+! reallocated when they are too small
+! with outdamage, only the elems with a damage variable above outdamage are
+! kept in the buffers, and selchanged is set if they are not the elems of the
+! last output
+use node_list_module, only: node_list
+use elem_list_module, only: elem_list, elem_node_connec
+use fnode_module,     only: extract
+use fBrickLam_elem_module, only: extract
+
+  ! local variables
+  integer,  allocatable :: elnodes(:,:)
+  real(DP), allocatable :: stress(:,:)
+  real(DP), allocatable :: strain(:,:)
+  real(DP), allocatable :: tau(:,:)
+  real(DP), allocatable :: delta(:,:)
+  real(DP), allocatable :: df(:)
+  real(DP), allocatable :: dm(:)
+  real(DP), allocatable :: dd(:)
+  real(DP), allocatable :: phi(:)
+  
+  integer :: nnode, ncell, nfLam, nfl, nsub, nnd, i, j
+  logical :: sel
+  
+  nnode = size(node_list)
+  nfLam = size(elem_list)
+  ncell = 0
+  sel   = .true.
+  
+  selchanged = .false.
+  if (outdamage >= ZERO .and. .not.allocated(outsel)) then
+    allocate(outsel(nfLam))
+    outsel = .false.
+  end if
+  
+  ! -----------------------------------------------------------------!
+  !                     extract nodes
+  ! -----------------------------------------------------------------!
+  if (allocated(outbuf%x)) then
+    if (size(outbuf%x,2) /= nnode) deallocate(outbuf%x, outbuf%u)
+  end if
+  if (.not.allocated(outbuf%x)) allocate(outbuf%x(NDIM,nnode), outbuf%u(NDIM,nnode))
+  
+  do i = 1, nnode
+      call extract(node_list(i), x=outbuf%x(:,i), u=outbuf%u(:,i))
+  end do
+  
+  ! -----------------------------------------------------------------!
+  !                     extract sub elems
+  ! -----------------------------------------------------------------!
+  ! start with a capacity of one sub elem per elem
+  if (.not.allocated(outbuf%df)) call grow_cells(max(nfLam,1))
+  
+  do nfl = 1, nfLam
   
-  ! private parameter, length of format string
-  integer, parameter          :: FMTLENGTH = 10
+      call extract(elem_list(nfl), elnodes, stress, strain, tau, delta, df, dm, dd, phi)
+      
+      !*** debug check ***
+      if (.not.allocated(elnodes)) then
+        write(MSG_FILE,*)'elnodes is NOT allocated in output'
+        CALL EXIT_FUNCTION
+      end if
+      
+      nsub = size(elnodes(1,:))
+      
+      if (nsub < 1) then
+        write(MSG_FILE,*)'elnodes size is incorrect in output'
+        CALL EXIT_FUNCTION
+      end if
+      !***********
+      
+      ! skip the elems which are not damaged enough
+      if (outdamage >= ZERO) then
+        sel = ( max(maxval(df), maxval(dm), maxval(dd)) > outdamage )
+        if (sel .neqv. outsel(nfl)) selchanged = .true.
+        outsel(nfl) = sel
+        if (.not.sel) cycle
+      end if
+      
+      ! double the capacity of the buffers if they are full
+      if (ncell + nsub > size(outbuf%df)) &
+      & call grow_cells(max(ncell + nsub, 2 * size(outbuf%df)))
+      
+      do i = 1, nsub
+          nnd = count(elnodes(:,i)>0)
+          if (nnd /= 8 .and. nnd /= 6) then
+            write(MSG_FILE,*) 'unexpected no. of nodes in output!'
+            call EXIT_FUNCTION
+          end if
+          ! global node no. of the sub elem nodes
+          j = ncell + i
+          outbuf%connec(:,j)     = 0
+          outbuf%connec(1:nnd,j) = elem_node_connec( pack(elnodes(:,i),elnodes(:,i)>0) , nfl)
+      end do
+      
+      outbuf%stress(:, ncell+1:ncell+nsub) = stress
+      outbuf%strain(:, ncell+1:ncell+nsub) = strain
+      outbuf%tau(   :, ncell+1:ncell+nsub) = tau
+      outbuf%delta( :, ncell+1:ncell+nsub) = delta
+      outbuf%df(ncell+1:ncell+nsub)  = df
+      outbuf%dm(ncell+1:ncell+nsub)  = dm
+      outbuf%dd(ncell+1:ncell+nsub)  = dd
+      outbuf%phi(ncell+1:ncell+nsub) = phi
+      
+      ncell = ncell + nsub
+      
+  end do
+  
+  outbuf%nnode = nnode
+  outbuf%ncell = ncell
+  
+  
+  contains
+  
+  
+    subroutine grow_cells(n)
+    ! reallocate the sub elem buffers to a capacity of n sub elems, keeping the
+    ! sub elems extracted so far
+      integer, intent(in) :: n
+      call grow_int2 (outbuf%connec, 8,            n)
+      call grow_real2(outbuf%stress, NST_STANDARD, n)
+      call grow_real2(outbuf%strain, NST_STANDARD, n)
+      call grow_real2(outbuf%tau,    NST_COHESIVE, n)
+      call grow_real2(outbuf%delta,  NST_COHESIVE, n)
+      call grow_real1(outbuf%df,  n)
+      call grow_real1(outbuf%dm,  n)
+      call grow_real1(outbuf%dd,  n)
+      call grow_real1(outbuf%phi, n)
+    end subroutine grow_cells
+    
+    subroutine grow_int2(a, m, n)
+      integer, allocatable, intent(inout) :: a(:,:)
+      integer,              intent(in)    :: m, n
+      integer, allocatable :: tmp(:,:)
+      allocate(tmp(m,n))
+      tmp = 0
+      if (allocated(a)) tmp(:,1:ncell) = a(:,1:ncell)
+      call move_alloc(tmp, a)
+    end subroutine grow_int2
+    
+    subroutine grow_real2(a, m, n)
+      real(DP), allocatable, intent(inout) :: a(:,:)
+      integer,               intent(in)    :: m, n
+      real(DP), allocatable :: tmp(:,:)
+      allocate(tmp(m,n))
+      tmp = ZERO
+      if (allocated(a)) tmp(:,1:ncell) = a(:,1:ncell)
+      call move_alloc(tmp, a)
+    end subroutine grow_real2
+    
+    subroutine grow_real1(a, n)
+      real(DP), allocatable, intent(inout) :: a(:)
+      integer,               intent(in)    :: n
+      real(DP), allocatable :: tmp(:)
+      allocate(tmp(n))
+      tmp = ZERO
+      if (allocated(a)) tmp(1:ncell) = a(1:ncell)
+      call move_alloc(tmp, a)
+    end subroutine grow_real1
+
+end subroutine extract_output
+
+
 
+subroutine write_vtk(outfile,isbin,meshfile)
+! write the output buffers (see extract_output) in a vtk file
+   
+  ! passed-in variables
+  character(len=*),         intent(in)  :: outfile  ! output file name
+  logical,                  intent(in)  :: isbin    ! .true. for binary vtk output
+  character(len=*),         intent(in)  :: meshfile ! file of the mesh; '' to write the mesh
+  
+  ! local variables
   
   ! output file variables
   integer                     :: outunit  ! output file unit
-  character(len=DIRLENGTH)    :: outfile  ! output file name
-  character(len=DIRLENGTH)    :: outnum   ! output increment number (embedded in the outfile name)
-  character(len=FMTLENGTH)    :: FMATKINC, FMATNNODE, FMATNELEM, FMATFSTAT, FMATFLOAT
+  character(len=DIRLENGTH)    :: line     ! keyword line of the output file
+  character(len=FMTLENGTH)    :: FMATNNODE, FMATNELEM, FMATFSTAT, FMATFLOAT
 
   ! no. of nodes & elem in the mesh
   integer                     :: nnode, nelem
@@ -43,18 +832,9 @@ use fBrickLam_elem_module, only: extract
   ! no. of elems of each elem type
   integer                     :: nwedge, nbrick
   
-  ! sub element type variable
-  character(len=ELTYPELENGTH) :: eltype
-  
   ! nsize: size of vtk element output; elnode: no. nodes in each elem
   integer                     :: nsize
   
-  ! nodal coordinates
-  real(kind=DP)  :: x(NDIM)
-  
-  ! nodal displacements
-  real(kind=DP)  :: disp(NDIM)
-  
   ! counters
   integer  :: i
 
@@ -65,13 +845,10 @@ use fBrickLam_elem_module, only: extract
   ! -----------------------------------------------------------------!
   
   outunit   = 0
-  outfile   = ''
-  outnum    = ''
-  FMATKINC  = ''
+  line      = ''
   FMATNNODE = ''
   FMATNELEM = ''
   FMATFLOAT = ''
-  eltype    = ''
   nnode     = 0
   nwedge    = 0
   nbrick    = 0
@@ -81,206 +858,176 @@ use fBrickLam_elem_module, only: extract
   i=0
 
   ! format parameters
-  FMATKINC  = 'i10.10' ! for increment no.
   FMATNNODE = 'i10'  ! for node no.
   FMATNELEM = 'i10'  ! for elem no.
   FMATFSTAT = 'i2'   ! for fstat variable format (2 digits would suffice)
   FMATFLOAT = 'ES20.3E9' ! scientific notation, repeat=1, min. width=10, digits=3
 
-  ! write the increment number as a character and store in outnum
-  write(outnum,'('//trim(FMATKINC)//')') kinc
-  
-  ! create the output file name
-  !~outfile=trim(outdir)//'/outputs/'//trim(outnum)//'.vtk'
-  outfile = trim(outdir)//'fnm-'//trim(outnum)//'.vtk'
-  outfile = trim(outfile)
-  
-  ! open the outfile
-  open(newunit(outunit), file=outfile, status="replace", action="write")
+  ! no. of nodes & sub elems in the buffers
+  nnode = outbuf%nnode
+  nelem = outbuf%ncell
+
+  ! open the outfile; the binary file is a stream of bytes, in which the
+  ! keyword lines are written as characters, ended by a new line char.
+  if (isbin) then
+    open(newunit(outunit), file=outfile, status="replace", action="write", &
+    & access="stream", form="unformatted", convert="big_endian")
+  else
+    open(newunit(outunit), file=outfile, status="replace", action="write")
+  end if
   
   ! write header
-  write(outunit,'(a)')'# vtk DataFile Version 3.1'
-  write(outunit,'(a)')'for Floating Node Method output'
+  call wline('# vtk DataFile Version 3.1')
+  if (len_trim(meshfile) == 0) then
+    call wline('for Floating Node Method output')
+  else
+    call wline('for Floating Node Method output, mesh in '//trim(meshfile))
+  end if
   
   ! write vtk format
-  write(outunit,'(a)')'ASCII'      
+  if (isbin) then
+    call wline('BINARY')
+  else
+    call wline('ASCII')
+  end if
   
   ! write vtk data type
-  write(outunit,'(a)')'DATASET UNSTRUCTURED_GRID'
+  call wline('DATASET UNSTRUCTURED_GRID')
 
 
   ! -----------------------------------------------------------------!
-  !                     write nodes
+  !                     write the mesh
   ! -----------------------------------------------------------------!
-  ! obtain nnode value
-  nnode = size(node_list)
-  ! write node summary line
-  write(outunit,'(a, '//trim(FMATNNODE)//', a)')'POINTS ',nnode,' FLOAT'
-  ! write all nodes
-  do i = 1,nnode
-      ! extract nodal coords from lib_node
-      call extract(node_list(i),x=x)
-      ! write x3d array into output file
-      write(outunit,'(3'//trim(FMATFLOAT)//')') x(1),x(2),x(3)
-  end do            
-  write(outunit,'(a)')''
+  ! the mesh is not written if it is in meshfile
+  if (len_trim(meshfile) == 0) call wmesh
 
-  
-  ! -----------------------------------------------------------------!
-  !                     write element connecs
-  ! -----------------------------------------------------------------!  
-  ! wflag = 'nelem' would allow the wfLam subroutine to update
-  ! nwedge, nbrick, ncoh6 and ncoh8
-  call wfLam('nelem')
-
-  ! total no. of elems
-  nelem = nwedge + nbrick
-  
-  ! calculate total no. of nodes to print; each row has 1+elnode no. of indices to print
-  nsize = nwedge * 7 + nbrick * 9
-  
-  ! write a summary of output
-  write(outunit,'(a, 2'//trim(FMATNNODE)//')')'CELLS ', nelem, nsize
-  
-  ! wflag = 'connec' would allow the wfLam subroutine to write out all
-  ! the nodal connec of all sub elems in the mesh
-  call wfLam('connec')
 
 
   ! -----------------------------------------------------------------!
-  !                     write element types (order matters)
-  ! -----------------------------------------------------------------!  
-  write(outunit,'(a, '//trim(FMATNELEM)//')')'CELL_TYPES ', nelem
-  
-  ! wflag = 'eltype' would allow the wfLam subroutine to write out all
-  ! the elem type code (used by VTK) of all sub elems in the mesh
-  call wfLam('eltype')
-
-
-
-  ! -----------------------------------------------------------------!
-  ! BEGIN WRITE NODAL DATA
+  ! BEGIN WRITE NODAL DATA (only the fields of outfields are written)
   ! -----------------------------------------------------------------!
-  write(outunit,'(a, '//trim(FMATNNODE)//')')'POINT_DATA ', nnode
+  if (outfields(1)) then
+    write(line,'(a, '//trim(FMATNNODE)//')')'POINT_DATA ', nnode
+    call wline(line)
 
   
-  ! -----------------------------------------------------------------!
-  !                     write displacements
-  ! -----------------------------------------------------------------!
-  write(outunit,'(a)')'VECTORS displacement float'
+    ! -----------------------------------------------------------------!
+    !                     write displacements
+    ! -----------------------------------------------------------------!
+    call wline('VECTORS displacement float')
   
-  do i=1, nnode
-      call extract(node_list(i),u=disp)
-      write(outunit,'(3'//trim(FMATFLOAT)//')') disp(1),disp(2),disp(3)
-  end do  
+    call wvectors(outbuf%u(:,1:nnode))
           
-  write(outunit,'(a)')'' 
-  
-  
-  !~! -----------------------------------------------------------------!
-  !~!                     write node status
-  !~! -----------------------------------------------------------------!
-  !~write(outunit,'(a)')'SCALARS nstat int'
-  !~write(outunit,'(a)')'LOOKUP_TABLE default'
-  !~do i=1, nnode
-  !~    call extract(node_list(i),nstat=intvar)
-  !~    write(outunit,'('//trim(FMATFSTAT)//')') intvar
-  !~end do  
-  !~        
-  !~write(outunit,'(a)')''
+    call wline('')
+  end if
   
 
 
   ! -----------------------------------------------------------------!
   ! BEGIN WRITE CELL DATA
   ! -----------------------------------------------------------------!
-  write(outunit,'(a, '//trim(FMATNELEM)//')')'CELL_DATA ', nelem
+  if (any(outfields(2:NFIELD))) then
+    write(line,'(a, '//trim(FMATNELEM)//')')'CELL_DATA ', nelem
+    call wline(line)
+  end if
   
 
 
   ! -----------------------------------------------------------------!
   !                     write stress (order matters)
   ! -----------------------------------------------------------------!     
-  write(outunit,'(a)')'TENSORS stress float'
+  if (outfields(2)) then
+    call wline('TENSORS stress float')
   
-  ! wflag = 'stress' would allow the wfLam subroutine to write out all
-  ! stress tensors of all ply sub elems in the mesh
-  call wfLam('stress')
+    call wtensors(outbuf%stress(:,1:nelem))
+    call wline('')
+  end if
 
   
   ! -----------------------------------------------------------------!
   !                     write strain (order matters)
   ! -----------------------------------------------------------------!  
-  write(outunit,'(a)')'TENSORS strain float'
+  if (outfields(3)) then
+    call wline('TENSORS strain float')
   
-  ! wflag = 'strain' would allow the wfLam subroutine to write out all
-  ! strain tensors of all ply sub elems in the mesh
-  call wfLam('strain')
+    call wtensors(outbuf%strain(:,1:nelem))
+    call wline('')
+  end if
 
 
   
   ! -----------------------------------------------------------------!
-  !                     write stress (order matters)
+  !                     write traction (order matters)
   ! -----------------------------------------------------------------!     
-  write(outunit,'(a)')'VECTORS traction float'
+  if (outfields(4)) then
+    call wline('VECTORS traction float')
   
-  ! wflag = 'traction' would allow the wfLam subroutine to write out all
-  ! traction vectors of all coh elems in the mesh
-  call wfLam('traction')
+    call wvectors(outbuf%tau(:,1:nelem))
+    call wline('')
+  end if
 
   
   ! -----------------------------------------------------------------!
-  !                     write strain (order matters)
+  !                     write separation (order matters)
   ! -----------------------------------------------------------------!  
-  write(outunit,'(a)')'VECTORS separation float'
+  if (outfields(5)) then
+    call wline('VECTORS separation float')
   
-  ! wflag = 'strain' would allow the wfLam subroutine to write out all
-  ! separation vectors of all coh elems in the mesh
-  call wfLam('separation')
+    call wvectors(outbuf%delta(:,1:nelem))
+    call wline('')
+  end if
   
 
   ! -----------------------------------------------------------------!
   !                     write fibre damage variable
   ! -----------------------------------------------------------------!
-  write(outunit,'(a)')'SCALARS df float'
-  write(outunit,'(a)')'LOOKUP_TABLE default'
-  
-  ! wflag = 'df' would allow the wfLam subroutine to write out all
-  ! fibre degradation factors of all ply sub elems in the mesh
-  call wfLam('df')
+  if (outfields(6)) then
+    call wline('SCALARS df float')
+    call wline('LOOKUP_TABLE default')
+  
+    ! fibre degradation factors of all ply sub elems in the mesh
+    call wscalars(outbuf%df(1:nelem))
+    call wline('')
+  end if
 
 
   ! -----------------------------------------------------------------!
   !                     write matrix damage variable
   ! -----------------------------------------------------------------! 
-  write(outunit,'(a)')'SCALARS dm float'
-  write(outunit,'(a)')'LOOKUP_TABLE default'
+  if (outfields(7)) then
+    call wline('SCALARS dm float')
+    call wline('LOOKUP_TABLE default')
   
-  ! wflag = 'dm' would allow the wfLam subroutine to write out all 
-  ! cohesive degradation factors of all matrix crack coh elems in the mesh
-  call wfLam('dm')
+    ! cohesive degradation factors of all matrix crack coh elems in the mesh
+    call wscalars(outbuf%dm(1:nelem))
+    call wline('')
+  end if
   
   
   ! -----------------------------------------------------------------!
   !                     write delamination damage variable
   ! -----------------------------------------------------------------! 
-  write(outunit,'(a)')'SCALARS dd float'
-  write(outunit,'(a)')'LOOKUP_TABLE default'
+  if (outfields(8)) then
+    call wline('SCALARS dd float')
+    call wline('LOOKUP_TABLE default')
   
-  ! wflag = 'dd' would allow the wfLam subroutine to write out all 
-  ! cohesive degradation factors of all delamination coh elems in the mesh
-  call wfLam('dd')
+    ! cohesive degradation factors of all delamination coh elems in the mesh
+    call wscalars(outbuf%dd(1:nelem))
+    call wline('')
+  end if
   
   
   ! -----------------------------------------------------------------!
   !                     write matrix crack angle
   ! -----------------------------------------------------------------! 
-  write(outunit,'(a)')'SCALARS phi float'
-  write(outunit,'(a)')'LOOKUP_TABLE default'
+  if (outfields(9)) then
+    call wline('SCALARS phi float')
+    call wline('LOOKUP_TABLE default')
   
-  ! wflag = 'phi' would allow the wfLam subroutine to write out all 
-  ! matrix crack angles w.r.t vertical dir. of all matrix cracks
-  call wfLam('phi')
+    ! matrix crack angles w.r.t vertical dir. of all matrix cracks
+    call wscalars(outbuf%phi(1:nelem))
+    call wline('')
+  end if
   
   
   close(outunit)
@@ -292,133 +1039,82 @@ use fBrickLam_elem_module, only: extract
   contains
   
   
-    subroutine wfLam(wflag)
-      character(len=*), intent(in)  :: wflag
-      
-      integer,  allocatable :: elnodes(:,:)
-      real(DP), allocatable :: stress(:,:)
-      real(DP), allocatable :: strain(:,:)
-      real(DP), allocatable :: tau(:,:)
-      real(DP), allocatable :: delta(:,:)
-      real(DP), allocatable :: df(:)
-      real(DP), allocatable :: dm(:)
-      real(DP), allocatable :: dd(:)
-      real(DP), allocatable :: phi(:)
-      
-      integer :: nfLam, nfl, nsub, i
-      
-      nfLam = size(elem_list)
+    subroutine wmesh()
+    ! write the nodes, the connec & the types of the sub elems
     
-      do nfl = 1, nfLam
-    
-          call extract(elem_list(nfl), elnodes, stress, strain, tau, delta, df, dm, dd, phi)
-          
-          !*** debug check ***
-          if (.not.allocated(elnodes)) then
-            write(MSG_FILE,*)'elnodes is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(stress)) then
-            write(MSG_FILE,*)'stress is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(strain)) then
-            write(MSG_FILE,*)'strain is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(tau)) then
-            write(MSG_FILE,*)'tau is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(delta)) then
-            write(MSG_FILE,*)'delta is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(df)) then
-            write(MSG_FILE,*)'df is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(dm)) then
-            write(MSG_FILE,*)'dm is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(dd)) then
-            write(MSG_FILE,*)'dd is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          if (.not.allocated(phi)) then
-            write(MSG_FILE,*)'phi is NOT allocated in output'
-            CALL EXIT_FUNCTION
-          end if
-          
-          nsub = size(elnodes(1,:))
-          
-          if (nsub < 1) then
-            write(MSG_FILE,*)'elnodes size is incorrect in output'
-            CALL EXIT_FUNCTION
+      ! -----------------------------------------------------------------!
+      !                     write nodes
+      ! -----------------------------------------------------------------!
+      ! write node summary line
+      write(line,'(a, '//trim(FMATNNODE)//', a)')'POINTS ',nnode,' FLOAT'
+      call wline(line)
+      ! write all nodes
+      call wvectors(outbuf%x(:,1:nnode))
+      call wline('')
+      ! blank line of the count of the sub elems in the former outputs
+      call wline('')
+
+
+      ! -----------------------------------------------------------------!
+      !                     write element connecs
+      ! -----------------------------------------------------------------!  
+      ! no. of sub elems of each type
+      nbrick = count(outbuf%connec(8,1:nelem) > 0)
+      nwedge = nelem - nbrick
+
+      ! calculate total no. of nodes to print; each row has 1+elnode no. of indices to print
+      nsize = nwedge * 7 + nbrick * 9
+
+      ! write a summary of output
+      write(line,'(a, 2'//trim(FMATNNODE)//')')'CELLS ', nelem, nsize
+      call wline(line)
+
+      ! write out all the nodal connec of all sub elems in the mesh
+      do i = 1, nelem
+          call wconnec(outbuf%connec(:,i))
+      end do
+      call wline('')
+
+
+      ! -----------------------------------------------------------------!
+      !                     write element types (order matters)
+      ! -----------------------------------------------------------------!  
+      write(line,'(a, '//trim(FMATNELEM)//')')'CELL_TYPES ', nelem
+      call wline(line)
+
+      ! write out all the elem type code (used by VTK) of all sub elems in the mesh
+      do i = 1, nelem
+          if (outbuf%connec(8,i) > 0) then
+            call wtype(12) ! 12 for brick
+          else
+            call wtype(13) ! 13 for wedge
           end if
-          !***********
-          
-          do i = 1, nsub
-            select case(trim(adjustl(wflag)))
-            case('nelem')
-                if (count(elnodes(:,i)>0) == 8) then
-                  nbrick = nbrick + 1
-                else if (count(elnodes(:,i)>0) == 6) then
-                  nwedge = nwedge + 1
-                else
-                  write(MSG_FILE,*) 'unexpected no. of nodes in output!'
-                  call EXIT_FUNCTION
-                end if
-            case('connec')
-                call wconnec( elem_node_connec( pack(elnodes(:,i),elnodes(:,i)>0) , nfl) )
-            case('eltype')
-                if (count(elnodes(:,i)>0) == 8) then
-                  write(outunit,'(i2)') 12 ! 12 for brick
-                else if (count(elnodes(:,i)>0) == 6) then
-                  write(outunit,'(i2)') 13 ! 13 for wedge
-                else
-                  write(MSG_FILE,*) 'unexpected no. of nodes in output!'
-                  call EXIT_FUNCTION
-                end if
-            case('stress')
-                call wtensor(stress(:,i))
-            case('strain')
-                call wtensor(strain(:,i))
-            case('traction')
-                write(outunit,'(3'//trim(FMATFLOAT)//')') tau(1,i),tau(2,i),tau(3,i)
-            case('separation')
-                write(outunit,'(3'//trim(FMATFLOAT)//')') delta(1,i),delta(2,i),delta(3,i)
-            case('df')
-                call wscalar(df(i))
-            case('dm')
-                call wscalar(dm(i))
-            case('dd')
-                call wscalar(dd(i))
-            case('phi')
-                call wscalar(phi(i))
-            end select
-          end do
-          
       end do
-      
-      write(outunit,'(a)')''
+      call wline('')
     
-    end subroutine wfLam
+    end subroutine wmesh
   
 
+    subroutine wline(text)
+      character(len=*), intent(in) :: text
+      ! print a keyword line; in the binary file, data blocks are also ended
+      ! by a new line char.
+      if (isbin) then
+        write(outunit) trim(text)//achar(10)
+      else
+        write(outunit,'(a)') trim(text)
+      end if
+    end subroutine wline
+
+
     subroutine wconnec(connec)
       integer, intent(in) :: connec(:)
       integer :: j
       ! print connec in vtk; note that in vtk node no. starts from 0
+      if (isbin) then
+        write(outunit) int(count(connec>0), I4), int(pack(connec,connec>0)-1, I4)
+        return
+      end if
       write(outunit,'('//FMATNNODE//')',advance="no") count(connec>0)
       do j = 1, count(connec>0)
           write(outunit,'('//FMATNNODE//')',advance="no") connec(j)-1
@@ -427,42 +1123,66 @@ use fBrickLam_elem_module, only: extract
     end subroutine wconnec
     
    
-    subroutine wtensor(x)
-      real(DP), intent(in) :: x(6)
-      real(DP) :: tensor(3,3)
-      integer  :: l
-      tensor = ZERO
-      tensor(1,1)=x(1)
-      tensor(2,2)=x(2)
-      tensor(3,3)=x(3)
-      tensor(1,2)=x(4)
-      tensor(1,3)=x(5)
-      tensor(2,3)=x(6)
-      tensor(2,1)=x(4)
-      tensor(3,1)=x(5)
-      tensor(3,2)=x(6)
-      do l = 1, 3
-          write(outunit,'(3'//trim(FMATFLOAT)//')') tensor(1,l), tensor(2,l), tensor(3,l)
-      end do
-      write(outunit,'(a)')''
-    end subroutine wtensor
+    subroutine wtensors(x)
+      real(DP), intent(in) :: x(:,:)
+      real(DP), allocatable :: tensor(:,:,:)
+      ! print symmetric tensors of components 11, 22, 33, 12, 13, 23, in a
+      ! single write; in ASCII, each tensor is 3 lines and a blank line
+      if (size(x) == 0) return
+      allocate(tensor(3,3,size(x,2)))
+      tensor(1,1,:)=x(1,:)
+      tensor(2,2,:)=x(2,:)
+      tensor(3,3,:)=x(3,:)
+      tensor(1,2,:)=x(4,:)
+      tensor(1,3,:)=x(5,:)
+      tensor(2,3,:)=x(6,:)
+      tensor(2,1,:)=x(4,:)
+      tensor(3,1,:)=x(5,:)
+      tensor(3,2,:)=x(6,:)
+      if (isbin) then
+        write(outunit) real(tensor, SP)
+      else
+        write(outunit,'(3(3'//trim(FMATFLOAT)//',/))') tensor
+      end if
+    end subroutine wtensors
+
+
+    subroutine wvectors(x)
+      real(DP), intent(in) :: x(:,:)
+      ! print 3D vectors, one per line, in a single write
+      if (size(x) == 0) return
+      if (isbin) then
+        write(outunit) real(x, SP)
+      else
+        write(outunit,'(3'//trim(FMATFLOAT)//')') x
+      end if
+    end subroutine wvectors
+
+
+    subroutine wtype(code)
+      integer, intent(in) :: code
+      if (isbin) then
+        write(outunit) int(code, I4)
+      else
+        write(outunit,'(i2)') code
+      end if
+    end subroutine wtype
     
        
-    subroutine wscalar(x)
-      !~class(*), intent(in) :: x
-      !~select type(x)
-      !~type is (real(DP))
-      !~  write(outunit,'('//trim(FMATFLOAT)//')') x
-      !~type is (integer)
-      !~  write(outunit,'('//trim(FMATFSTAT)//')') x
-      !~end select
-      real(DP), intent(in) :: x
-      write(outunit,'('//trim(FMATFLOAT)//')') x
-    end subroutine wscalar
+    subroutine wscalars(x)
+      real(DP), intent(in) :: x(:)
+      ! print scalars, one per line, in a single write
+      if (size(x) == 0) return
+      if (isbin) then
+        write(outunit) real(x, SP)
+      else
+        write(outunit,'('//trim(FMATFLOAT)//')') x
+      end if
+    end subroutine wscalars
   
   
   
-end subroutine output
+end subroutine write_vtk
   
   
   
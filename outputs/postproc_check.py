@@ -0,0 +1,98 @@
+################################################################
+####### Check of the binary vtk outputs against the ASCII ######
+################################################################
+##
+##  the binary vtk output of an increment (see the output format
+##  in output_module) must hold the same mesh and fields as the
+##  ASCII output of the same increment:
+##  - the node connec and the cell types are the same
+##  - the floats agree within the precision of the ASCII output
+##    (4 significant digits, ES20.3) and of the binary output
+##    (single precision)
+##  with the output format both, the two outputs of an increment
+##  are fnm-<kinc>.vtk and fnm-<kinc>.bin.vtk in the outputs dir.;
+##  two analyses can also be compared dir. by dir.
+##  e.g.:
+##    python postproc_check.py outputs
+##    python postproc_check.py outputs-ascii outputs-binary
+##    python postproc_check.py fnm-0000000001.vtk fnm-0000000001.bin.vtk
+################################################################
+
+from postproc_vtk import read_vtk, vtkseries
+import numpy as np
+import os, sys
+
+
+# default relative tolerance: the half unit of the 4th digit of the ASCII
+# output, and the single precision rounding of the binary output
+rtol = 1.e-3
+# default absolute tolerance, for the floats too small for single precision
+atol = 1.e-30
+
+
+# define the comparison of two vtk output files
+# returns the list of the differences found; empty if the files agree
+def compare_vtk(fname1, fname2, rtol=rtol, atol=atol):
+    fr1  = read_vtk(fname1)
+    fr2  = read_vtk(fname2)
+    errs = []
+    if fr1.fields() != fr2.fields():
+        errs.append('fields differ: %s, %s' % (fr1.fields(), fr2.fields()))
+    for name in ['connec','offsets','types']:
+        a, b = getattr(fr1, name), getattr(fr2, name)
+        if a.shape != b.shape or (a != b).any():
+            errs.append(name+' differ')
+    names = ['points'] + [ f for f in fr1.fields() if f in fr2.fields() ]
+    for name in names:
+        a, b = getattr(fr1, name), getattr(fr2, name)
+        if a.shape != b.shape:
+            errs.append('%s shapes differ: %s, %s' % (name, a.shape, b.shape))
+            continue
+        tol = rtol * np.maximum(abs(a), abs(b)) + atol
+        bad = ~( abs(a-b) <= tol )
+        if bad.any():
+            i = np.argmax(np.where(bad, abs(a-b)-tol, -np.inf))
+            errs.append('%s differ at %d items, e.g. %.6e, %.6e' \
+            % (name, bad.sum(), a.flat[i], b.flat[i]))
+    return errs
+
+
+# define the pairs of files to be compared, for the command-line arguments:
+# one outputs dir. (fnm-<kinc>.vtk & fnm-<kinc>.bin.vtk), two dirs. (files of
+# the same increments) or two files
+def check_pairs(paths):
+    if len(paths) == 2 and os.path.isfile(paths[0]):
+        return [ tuple(paths) ]
+    if len(paths) == 1:
+        out = vtkseries(paths[0])
+        return [ (f, f[:-4]+'.bin.vtk') for f in out.fnames \
+                 if os.path.isfile(f[:-4]+'.bin.vtk') ]
+    out1, out2 = vtkseries(paths[0]), vtkseries(paths[1])
+    return [ (f, out2.fnames[out2.kincs.index(k)]) for k, f in zip(out1.kincs, out1.fnames) \
+             if k in out2.kincs ]
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Check of the binary FNM vtk outputs '+ \
+    'against the ASCII ones')
+    parser.add_argument('paths', nargs='+', help='outputs dir., two outputs dirs. or two files')
+    parser.add_argument('--rtol', type=float, default=rtol, help='relative tolerance')
+    parser.add_argument('--atol', type=float, default=atol, help='absolute tolerance')
+    args = parser.parse_args()
+    if len(args.paths) > 2:
+        parser.error('too many paths')
+    pairs = check_pairs(args.paths)
+    if len(pairs) == 0:
+        print('ERROR: no pair of outputs to compare!')
+        sys.exit(1)
+    nfail = 0
+    for f1, f2 in pairs:
+        errs = compare_vtk(f1, f2, args.rtol, args.atol)
+        print('  %-4s %s  %s' % ('ok' if not errs else 'FAIL', f1, f2))
+        for e in errs:
+            print('       '+e)
+        nfail = nfail + (1 if errs else 0)
+    print('%d pairs, %d differ' % (len(pairs), nfail))
+    if nfail > 0:
+        sys.exit(1)
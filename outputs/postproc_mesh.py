@@ -0,0 +1,94 @@
+################################################################
+######## Rebuild of the vtk output files without mesh ##########
+################################################################
+##
+##  with the output of the mesh changed (see output_module), the mesh
+##  (POINTS, CELLS & CELL_TYPES) is only written in the files of
+##  the increments where the partition of an elem has changed; the
+##  other files only have the point & cell data, and their title
+##  line refers to the file of their mesh
+##  a full file is rebuilt from the mesh sections of its mesh file
+##  and from its own data sections, copied as they are (ASCII or
+##  binary), so that it can be read by any vtk reader
+##  the files are rebuilt in place, or in another dir. (the full
+##  files are then copied)
+##  e.g.:
+##    python postproc_mesh.py outputs
+##    python postproc_mesh.py outputs --outdir outputs-full
+################################################################
+
+from postproc_vtk import map_bytes, vtk_header, vtk_index, vtk_mesh, NL, SPACE
+import numpy as np
+import glob, os, shutil
+
+
+# define the start of the first keyword line at or after pos
+def next_line(buf, pos):
+    while pos < buf.size and buf[pos] <= SPACE:
+        pos += 1
+    return pos
+
+
+# define the rebuild of a vtk output file without mesh into outfname
+# returns True if the file had no mesh; otherwise, it is only copied
+def rebuild_vtk(fname, outfname):
+    buf  = map_bytes(fname)
+    mesh = vtk_mesh(fname, buf)
+    if mesh is None:
+        if os.path.abspath(fname) != os.path.abspath(outfname):
+            shutil.copyfile(fname, outfname)
+        return False
+    mname = os.path.join(os.path.dirname(fname), mesh)
+    mbuf  = map_bytes(mname)
+    if vtk_mesh(mname, mbuf) is not None:
+        raise ValueError('the mesh file '+mname+' has no mesh')
+    fmt,  pos  = vtk_header(fname, buf)
+    mfmt, mpos = vtk_header(mname, mbuf)
+    if fmt != mfmt:
+        raise ValueError('the mesh file '+mname+' is not '+fmt)
+    # the data sections of the file follow its DATASET line
+    nl    = np.nonzero(buf[pos:pos+4096] == NL)[0]
+    start = next_line(buf, pos+nl[0]+1)
+    # the mesh sections of the mesh file end with its CELL_TYPES data
+    end   = next_line(mbuf, vtk_index(mname, mbuf)['types'][4])
+    for b, p in [(buf, start), (mbuf, end)]:
+        if not ( b[p:p+10].tobytes() == b'POINT_DATA' or b[p:p+9].tobytes() == b'CELL_DATA' ):
+            raise ValueError('unexpected sections in '+fname+' or '+mname)
+    data = mbuf[:end].tobytes() + buf[start:].tobytes()
+    del buf, mbuf
+    # written in a temporary file and renamed, as the file may be rebuilt in place
+    f = open(outfname+'.tmp', 'wb')
+    f.write(data)
+    f.close()
+    if os.path.exists(outfname):
+        os.remove(outfname)
+    os.rename(outfname+'.tmp', outfname)
+    return True
+
+
+# define the rebuild of all the vtk output files of outdir (ASCII and binary)
+# newdir : dir. of the rebuilt files; default: outdir (in place)
+# returns the no. of files rebuilt
+def rebuild_series(outdir, newdir=None):
+    if newdir is None:
+        newdir = outdir
+    if not os.path.isdir(newdir):
+        os.makedirs(newdir)
+    n = 0
+    for fname in sorted(glob.glob(os.path.join(outdir, 'fnm-*.vtk'))):
+        if rebuild_vtk(fname, os.path.join(newdir, os.path.basename(fname))):
+            n = n + 1
+    return n
+
+
+if __name__ == '__main__':
+    import argparse, time
+    parser = argparse.ArgumentParser(description='Rebuild of the FNM vtk output files '+ \
+    'written without mesh')
+    parser.add_argument('outdir', help='directory of the fnm-*.vtk files')
+    parser.add_argument('--outdir', dest='newdir', \
+    help='directory of the rebuilt files (default: rebuilt in place)')
+    args = parser.parse_args()
+    t0 = time.time()
+    n  = rebuild_series(args.outdir, args.newdir)
+    print('%d files rebuilt, %.2f s' % (n, time.time()-t0))
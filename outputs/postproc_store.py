@@ -0,0 +1,314 @@
+################################################################
+########## Compact store of a series of FNM vtk outputs ########
+################################################################
+##
+##  the fnm-<kinc>.vtk files of an outputs dir. (see postproc_vtk)
+##  are converted into a single store of compressed binary arrays:
+##  - topology : node coords, connec & types of the sub elems; it
+##               is stored once, and again only when it changes,
+##               i.e. when the sub elem partitioning changes
+##  - shards   : consecutive increments of the same topology (at
+##               most shardsize of them); each field of a shard is
+##               an array of all its increments, e.g. the (ninc,
+##               ncell,3,3) array of the stress
+##  - index    : increments, fields, shards and topologies
+##  floats are stored in single precision: the vtk files only have
+##  4 significant digits; the (symmetric) tensors are stored as
+##  their 6 components 11, 22, 33, 12, 13, 23
+##  the store is either a dir. of npz files (topo-<i>.npz, shard-
+##  <i>.npz and index.json), or a HDF5 file (.h5; needs h5py) with
+##  one group per topology and shard, chunked per increment
+##  a field of a shard is read without reading the other fields, so
+##  that the history of a field is read from its arrays only
+##  the conversion can be run again on the same outputs dir. while
+##  the analysis is running: only the new increments are added
+##  e.g.:
+##    python postproc_store.py outputs outputs.npzs
+##    st = vtkstore('outputs.npzs')
+##    kincs, dm = st.history('dm')
+##    fr = st.frame(st.kincs[-1])
+################################################################
+
+from postproc_vtk import vtkframe, vtkseries
+import numpy as np
+import hashlib, json, os
+# HDF5 stores are optional
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+
+# version of the store layout
+storeversion = 1
+# default max. no. of increments of a shard
+shardsize = 50
+
+
+# define the npz backend: a dir. of npz files, one per topology & shard
+class npzstore(object):
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        if mode != 'r' and not os.path.isdir(path):
+            os.makedirs(path)
+
+    def read_index(self):
+        fname = os.path.join(self.path, 'index.json')
+        if not os.path.isfile(fname):
+            return None
+        f = open(fname, 'r')
+        index = json.load(f)
+        f.close()
+        return index
+
+    def write_index(self, index):
+        # written in a temporary file and renamed, so that a reader never
+        # sees a partial index
+        fname = os.path.join(self.path, 'index.json')
+        f = open(fname+'.tmp', 'w')
+        json.dump(index, f)
+        f.close()
+        if os.path.exists(fname):
+            os.remove(fname)
+        os.rename(fname+'.tmp', fname)
+
+    def write(self, name, arrays):
+        np.savez_compressed(os.path.join(self.path, name+'.npz'), **arrays)
+
+    # read the arrays keys of the group name; only these arrays are unpacked
+    def read(self, name, keys):
+        f = np.load(os.path.join(self.path, name+'.npz'))
+        arrays = dict( (k, f[k]) for k in keys )
+        f.close()
+        return arrays
+
+    def close(self):
+        pass
+
+
+# define the HDF5 backend: a single file, one group per topology & shard
+class h5store(object):
+
+    def __init__(self, path, mode='r'):
+        if h5py is None:
+            raise ImportError('h5py is needed for the HDF5 store '+path)
+        self.path = path
+        self.file = h5py.File(path, 'r' if mode == 'r' else 'a')
+
+    def read_index(self):
+        if 'index' not in self.file.attrs:
+            return None
+        return json.loads(self.file.attrs['index'])
+
+    def write_index(self, index):
+        self.file.attrs['index'] = json.dumps(index)
+        self.file.flush()
+
+    def write(self, name, arrays):
+        g = self.file.create_group(name)
+        for k, a in arrays.items():
+            # fields of a shard are chunked per increment
+            chunks = (1,)+a.shape[1:] if name.startswith('shard') and a.ndim > 1 else None
+            g.create_dataset(k, data=a, chunks=chunks, compression='gzip', shuffle=True)
+
+    def read(self, name, keys):
+        g = self.file[name]
+        return dict( (k, g[k][...]) for k in keys )
+
+    def close(self):
+        self.file.close()
+
+
+# define the backend of a store path: HDF5 for .h5/.hdf5 files, npz otherwise
+def open_store(path, mode='r'):
+    if os.path.splitext(path)[1].lower() in ['.h5','.hdf5']:
+        return h5store(path, mode)
+    return npzstore(path, mode)
+
+
+# define the packing of the values of a field of item shape: the symmetric
+# tensors are packed into their 6 components 11, 22, 33, 12, 13, 23
+def pack_field(a, shape):
+    if list(shape) == [3,3]:
+        return a[..., [0,1,2,0,0,1], [0,1,2,1,2,2]]
+    return a
+
+
+# define the unpacking of the values of a field of item shape
+def unpack_field(a, shape):
+    if list(shape) == [3,3]:
+        return a[..., [0,3,4,3,1,5,4,5,2]].reshape(a.shape[:-1]+(3,3))
+    return a
+
+
+# define the topology arrays of a frame, and their fingerprint
+def frame_topology(fr):
+    topo = { 'points' : fr.points.astype(np.float32),
+             'connec' : fr.connec.astype(np.int32),
+             'offsets': fr.offsets.astype(np.int32),
+             'types'  : fr.types.astype(np.int8) }
+    h = hashlib.sha1()
+    for k in ['points','connec','types']:
+        h.update(np.ascontiguousarray(topo[k]).tobytes())
+    return topo, h.hexdigest()
+
+
+# define the conversion of the vtk outputs of outdir into the store path
+# fields    : fields to be stored; default: all the fields of the first file
+# shardsize : max. no. of increments of a shard
+# only the increments after the last one in the store are added
+# returns the no. of increments added
+def convert(outdir, path, fields=None, shardsize=shardsize):
+    st    = open_store(path, 'w')
+    index = st.read_index()
+    if index is None:
+        index = { 'version': storeversion, 'kincs': [], 'fields': {},
+                  'topologies': [], 'shards': [] }
+    elif index.get('version') != storeversion:
+        raise ValueError('store '+path+' has another version')
+    series = vtkseries(outdir)
+    kincs  = [ k for k in series.kincs if not index['kincs'] or k > index['kincs'][-1] ]
+    if len(kincs) == 0:
+        st.close()
+        return 0
+    # the fields are fixed by the first increment of the store
+    if not index['fields']:
+        fr = series.frame(kincs[0])
+        if fields is None:
+            fields = fr.fields()
+        for name in fields:
+            loc = 'point' if name in fr.point_data else 'cell'
+            index['fields'][name] = [loc, list(getattr(fr, name).shape[1:])]
+    fields = sorted(index['fields'].keys())
+    topos  = index['topologies']
+    buffer = []
+
+    # write the buffered increments as a shard
+    def flush():
+        if not buffer:
+            return
+        name   = 'shard-%06d' % len(index['shards'])
+        arrays = { 'kincs': np.array([ k for k, d in buffer ], dtype=np.int64) }
+        for f in fields:
+            arrays[f] = pack_field(np.array([ d[f] for k, d in buffer ], dtype=np.float32), \
+            index['fields'][f][1])
+        st.write(name, arrays)
+        index['shards'].append( { 'name': name, 'topology': len(topos)-1,
+                                  'kincs': [ k for k, d in buffer ] } )
+        index['kincs'].extend( [ k for k, d in buffer ] )
+        st.write_index(index)
+        del buffer[:]
+
+    for kinc in kincs:
+        fr = series.frame(kinc, ['points','cells']+fields)
+        topo, key = frame_topology(fr)
+        if not topos or topos[-1]['key'] != key:
+            flush()
+            name = 'topo-%06d' % len(topos)
+            st.write(name, topo)
+            topos.append( { 'name': name, 'key': key, 'kinc': kinc } )
+        elif len(buffer) == shardsize:
+            flush()
+        buffer.append( (kinc, dict( (f, getattr(fr, f)) for f in fields )) )
+    flush()
+    st.close()
+    return len(kincs)
+
+
+# define the reader of a store
+# kincs  : list of the increments in the store
+# fields : dict of the fields: name -> (location, shape of an item)
+class vtkstore(object):
+
+    def __init__(self, path):
+        self.path  = path
+        self.store = open_store(path, 'r')
+        self.index = self.store.read_index()
+        if self.index is None or self.index.get('version') != storeversion:
+            raise ValueError('not a valid store: '+path)
+        self.kincs  = self.index['kincs']
+        self.fields = self.index['fields']
+
+    def close(self):
+        self.store.close()
+
+    # shard of the increment kinc, and the position of kinc in the shard
+    def locate(self, kinc):
+        for sh in self.index['shards']:
+            if kinc in sh['kincs']:
+                return sh, sh['kincs'].index(kinc)
+        raise KeyError('no increment '+str(kinc)+' in '+self.path)
+
+    # topology arrays of a topology no.
+    def topology(self, i):
+        return self.store.read(self.index['topologies'][i]['name'], \
+        ['points','connec','offsets','types'])
+
+    # frame of the increment kinc, with the fields (default: all)
+    def frame(self, kinc, fields=None):
+        sh, i = self.locate(kinc)
+        fr = vtkframe(self.path, kinc)
+        topo = self.topology(sh['topology'])
+        fr.points  = topo['points']
+        fr.connec  = topo['connec'].astype(np.int64)
+        fr.offsets = topo['offsets'].astype(np.int64)
+        fr.types   = topo['types'].astype(np.int64)
+        if fields is None:
+            fields = sorted(self.fields.keys())
+        arrays = self.store.read(sh['name'], fields)
+        for f in fields:
+            a = unpack_field(arrays[f][i], self.fields[f][1])
+            if self.fields[f][0] == 'point':
+                fr.point_data[f] = a
+            else:
+                fr.cell_data[f]  = a
+        return fr
+
+    # history of a field over the increments from kmin to kmax
+    # returns the list of increments, and the array of the values of the field
+    # at these increments; if the no. of items changes with the topology, a
+    # list of the arrays of the increments is returned instead
+    def history(self, name, kmin=None, kmax=None):
+        if name not in self.fields:
+            raise KeyError('no field '+str(name)+' in '+self.path)
+        kincs  = []
+        values = []
+        for sh in self.index['shards']:
+            if ( kmin is not None and sh['kincs'][-1] < kmin ) or \
+               ( kmax is not None and sh['kincs'][0] > kmax ):
+                continue
+            a = unpack_field(self.store.read(sh['name'], [name])[name], self.fields[name][1])
+            for i, k in enumerate(sh['kincs']):
+                if ( kmin is None or k >= kmin ) and ( kmax is None or k <= kmax ):
+                    kincs.append(k)
+                    values.append(a[i])
+        if len(set( v.shape for v in values )) == 1:
+            values = np.array(values)
+        return kincs, values
+
+
+# define the disk size of a store, in bytes
+def store_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum( os.path.getsize(os.path.join(path, f)) for f in os.listdir(path) )
+
+
+if __name__ == '__main__':
+    import argparse, time
+    parser = argparse.ArgumentParser(description='Conversion of the FNM vtk outputs '+ \
+    'into a compact store')
+    parser.add_argument('outdir', help='directory of the fnm-*.vtk files')
+    parser.add_argument('store', help='store: a .h5 file (needs h5py) or a directory of npz files')
+    parser.add_argument('--fields', help='fields to be stored, e.g. displacement,dm (default: all)')
+    parser.add_argument('--shard-size', type=int, default=shardsize, \
+    help='max. no. of increments of a shard')
+    args = parser.parse_args()
+    t0 = time.time()
+    n  = convert(args.outdir, args.store, args.fields.split(',') if args.fields else None, \
+    args.shard_size)
+    vtksize = sum( os.path.getsize(f) for f in vtkseries(args.outdir).fnames )
+    print('%d increments added, %.2f s' % (n, time.time()-t0))
+    if n > 0:
+        print('vtk files: %.1f MB, store: %.1f MB' % (vtksize/2.0**20, store_size(args.store)/2.0**20))
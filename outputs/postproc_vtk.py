@@ -0,0 +1,375 @@
+################################################################
+############ Reader of the FNM vtk output files ################
+################################################################
+##
+##  output_module writes one legacy vtk file per increment,
+##  fnm-<kinc>.vtk (kinc: 10 digits), in the outputs dir., either
+##  ASCII or binary (see the output format in output_module):
+##  - POINTS     : node coords
+##  - CELLS      : node connec of the sub elems (bricks & wedges)
+##  - CELL_TYPES : vtk cell type of the sub elems (12 & 13)
+##  - POINT_DATA : displacement (VECTORS)
+##  - CELL_DATA  : stress, strain (TENSORS), traction, separation
+##                 (VECTORS), df, dm, dd, phi (SCALARS)
+##  the file is memory-mapped, its keyword lines are located in a
+##  single pass, and the data lines of a section are parsed into
+##  a numpy array by a single numpy call; only the sections of the
+##  requested fields are parsed
+##  in a binary file, the keyword lines are found one after the
+##  other, from the sizes of the data blocks between them
+##  fields are named as in the file; 'points' and 'cells' are the
+##  node coords and the connec & types of the sub elems
+##  a file written without the mesh (see the output of the mesh
+##  in output_module) refers to the file of its mesh in its title
+##  line; its points and cells are read from that file
+##  e.g.:
+##    fr  = read_vtk('outputs/fnm-0000000010.vtk', ['points','dm'])
+##    fr.points, fr.dm
+##    out = vtkseries('outputs', ['displacement'])
+##    for fr in out: print(fr.kinc, abs(fr.displacement).max())
+################################################################
+
+import numpy as np
+import glob, os, re
+
+
+# byte codes of the characters of the keyword lines
+NL    = ord('\n')
+SPACE = ord(' ')
+A     = ord('A')
+Z     = ord('Z')
+
+# no. of nodes of the vtk cell types
+vtk_nnodes = { 1: 1,  3: 2,  5: 3,  9: 4, 10: 4, 12: 8, 13: 6, 14: 5 }
+
+# no. of components of the vtk attributes
+vtk_ncomps = { 'SCALARS': 1, 'VECTORS': 3, 'TENSORS': 9 }
+
+# numpy types of the vtk data types of the binary files (big endian)
+vtk_btypes = { 'float': '>f4', 'double': '>f8', 'int': '>i4', 'long': '>i8' }
+
+# name of the vtk output file of an increment
+vtk_fname  = re.compile(r'^fnm-(\d+)\.vtk$')
+
+# reference to the mesh file in the title line of a file without mesh
+vtk_mref   = re.compile(r'mesh in (\S+)\s*$')
+
+
+# define the class of the arrays of a vtk output file
+# points   : float (nnode,3) array of node coords
+# connec   : int 1D array of the node connec (0-based) of all the cells
+# offsets  : int (ncell+1) array; the connec of cell i is
+#            connec[offsets[i]:offsets[i+1]]
+# types    : int (ncell) array of the vtk cell types
+# point_data, cell_data : dicts of the arrays of the nodal and cell fields;
+#            scalars are (n), vectors (n,3) and tensors (n,3,3) arrays
+# mesh     : name of the file of the mesh, if the file has no mesh
+# the fields are also attributes, e.g. fr.stress
+class vtkframe(object):
+
+    def __init__(self, fname='', kinc=None):
+        self.fname      = fname
+        self.kinc       = kinc
+        self.mesh       = None
+        self.points     = None
+        self.connec     = None
+        self.offsets    = None
+        self.types      = None
+        self.point_data = {}
+        self.cell_data  = {}
+
+    def __getattr__(self, name):
+        for data in (self.__dict__.get('point_data',{}), self.__dict__.get('cell_data',{})):
+            if name in data:
+                return data[name]
+        raise AttributeError(name)
+
+    def fields(self):
+        return sorted(self.point_data.keys()) + sorted(self.cell_data.keys())
+
+
+# define the memory map of a file as an array of bytes
+def map_bytes(fname):
+    if os.path.getsize(fname) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(fname, dtype=np.uint8, mode='r')
+
+
+# define the text of bytes a to b of the file
+def buf_text(buf, a, b):
+    text = buf[a:b].tobytes()
+    # str is already bytes in python 2
+    if not isinstance(text, str):
+        text = text.decode('ascii')
+    return text
+
+
+# define the reader of the header of a vtk output file
+# returns the format (ASCII or BINARY) and the start of the line after it
+def vtk_header(fname, buf):
+    nls = np.nonzero(buf[:4096] == NL)[0]
+    if len(nls) < 3:
+        raise ValueError('not a vtk file: '+fname)
+    return buf_text(buf, nls[1]+1, nls[2]).strip(), nls[2]+1
+
+
+# define the reader of the mesh file of a vtk output file, from its title line
+# returns the name of the mesh file, or None if the file has its mesh
+def vtk_mesh(fname, buf):
+    nls = np.nonzero(buf[:4096] == NL)[0]
+    if len(nls) < 2:
+        raise ValueError('not a vtk file: '+fname)
+    match = vtk_mref.search(buf_text(buf, nls[0]+1, nls[1]))
+    return match.group(1) if match else None
+
+
+# define the index of the sections of an ASCII vtk output file
+# buf : bytes of the file (see map_bytes)
+# returns the list of (keyword line tokens, data start, data end, binary type)
+# of the sections, in the order of the file; the data of a section are the
+# lines between its keyword line and the next keyword line; the binary type
+# is None for data lines
+def vtk_sections(buf):
+    nbuf = buf.size
+    nls  = np.nonzero(buf == NL)[0]
+    starts = np.concatenate(([0], nls+1))
+    starts = starts[starts < nbuf]
+    # the first two lines are the version and the (free) title lines
+    starts = starts[2:]
+    first  = buf[starts]
+    kws    = starts[ (first >= A) & (first <= Z) ]
+    # ends of the keyword lines, incl. a virtual end of the last line
+    kwends = np.append(nls, nbuf)[ np.searchsorted(nls, kws) ]
+    sections = []
+    for i in range(len(kws)):
+        tokens = buf_text(buf, kws[i], kwends[i]).split()
+        dend   = kws[i+1] if i+1 < len(kws) else nbuf
+        sections.append( (tokens, min(kwends[i]+1,nbuf), dend, None) )
+    return sections
+
+
+# define the index of the sections of a binary vtk output file
+# pos : start of the first keyword line after the header
+# returns the list of sections, as vtk_sections; the data of a section are the
+# block of bytes after its keyword line, of the size given by the keyword
+# lines, and the binary type is the numpy type of its numbers
+def vtk_binary_sections(fname, buf, pos):
+    nbuf = buf.size
+    sections = []
+    n    = 0
+    prev = None
+    while True:
+        # skip the new line chars. after a data block
+        while pos < nbuf and buf[pos] <= SPACE:
+            pos += 1
+        if pos >= nbuf:
+            break
+        nl  = np.nonzero(buf[pos:pos+4096] == NL)[0]
+        end = pos+nl[0] if nl.size else nbuf
+        tokens = buf_text(buf, pos, end).split()
+        pos = min(end+1, nbuf)
+        key   = tokens[0]
+        count = 0
+        vtype = None
+        if key == 'POINTS':
+            count, vtype = 3*int(tokens[1]), tokens[2]
+        elif key == 'CELLS':
+            count, vtype = int(tokens[2]), 'int'
+        elif key == 'CELL_TYPES':
+            count, vtype = int(tokens[1]), 'int'
+        elif key in ['POINT_DATA','CELL_DATA']:
+            n = int(tokens[1])
+        elif key in ['VECTORS','TENSORS']:
+            count, vtype = vtk_ncomps[key]*n, tokens[2]
+        elif key == 'LOOKUP_TABLE' and prev is not None and prev[0] == 'SCALARS':
+            # the scalars data follow the lookup table line
+            count, vtype = n, prev[2]
+        btype = None
+        b     = pos
+        if vtype is not None:
+            if vtype.lower() not in vtk_btypes:
+                raise ValueError('unsupported vtk data type '+vtype+' in '+fname)
+            btype = vtk_btypes[vtype.lower()]
+            b = pos + count*np.dtype(btype).itemsize
+            if b > nbuf:
+                raise ValueError('truncated '+' '.join(tokens)+' data in '+fname)
+        sections.append( (tokens, pos, b, btype) )
+        pos  = b
+        prev = tokens
+    return sections
+
+
+# define the index of the arrays of a vtk output file
+# returns a dict of the arrays of the file: name -> (location, ncomp, n,
+# data start, data end, binary type); location is 'points', 'cells', 'types',
+# 'point' or 'cell', and ncomp the no. of numbers of each of the n items (for
+# 'cells', the total no. of numbers of the section)
+def vtk_index(fname, buf):
+    fmt, pos = vtk_header(fname, buf)
+    if fmt == 'ASCII':
+        sections = vtk_sections(buf)
+    elif fmt == 'BINARY':
+        sections = vtk_binary_sections(fname, buf, pos)
+    else:
+        raise ValueError('unknown vtk file format '+fmt+' of '+fname)
+    index = {}
+    loc   = None
+    last  = None
+    for tokens, a, b, btype in sections:
+        key = tokens[0]
+        if key == 'POINTS':
+            index['points'] = ('points', 3, int(tokens[1]), a, b, btype)
+        elif key == 'CELLS':
+            index['cells']  = ('cells', int(tokens[2]), int(tokens[1]), a, b, btype)
+        elif key == 'CELL_TYPES':
+            index['types']  = ('types', 1, int(tokens[1]), a, b, btype)
+        elif key == 'POINT_DATA':
+            loc, n = 'point', int(tokens[1])
+        elif key == 'CELL_DATA':
+            loc, n = 'cell', int(tokens[1])
+        elif key in vtk_ncomps:
+            if loc is None:
+                raise ValueError(key+' '+tokens[1]+' before the POINT/CELL_DATA in '+fname)
+            last = tokens[1]
+            index[last] = (loc, vtk_ncomps[key], n, a, b, btype)
+        elif key == 'LOOKUP_TABLE' and last is not None:
+            # the scalars data follow the lookup table line
+            l, ncomp, n, a0, b0, bt0 = index[last]
+            index[last] = (l, ncomp, n, a, b, btype)
+    return index
+
+
+# define the parser of the data of a section into a 1D array of n numbers
+# btype : numpy type of the numbers of a binary data block; None for data lines
+def vtk_values(fname, buf, name, a, b, n, dtype, btype=None):
+    # (np.fromstring of blank data lines is not an empty array)
+    if n == 0 and not buf[a:b].tobytes().strip():
+        values = np.zeros(0, dtype=dtype)
+    elif btype is None:
+        values = np.fromstring(buf[a:b].tobytes(), dtype=dtype, sep=' ')
+    else:
+        values = np.frombuffer(buf[a:b].tobytes(), dtype=btype).astype(dtype)
+    if values.size != n:
+        raise ValueError('expected %d values of %s, found %d in %s' \
+        % (n, name, values.size, fname))
+    return values
+
+
+# define the parser of the cells: the connec and types sections
+def vtk_cells(fname, buf, index):
+    loc, size, ncell, a, b, btype = index['cells']
+    flat  = vtk_values(fname, buf, 'CELLS', a, b, size, np.int64, btype)
+    loc, ncomp, ntype, a, b, btype = index['types']
+    types = vtk_values(fname, buf, 'CELL_TYPES', a, b, ntype, np.int64, btype)
+    if ntype != ncell:
+        raise ValueError('no. of CELLS and CELL_TYPES differ in '+fname)
+    # each cell is written as its no. of nodes, then its nodes
+    nnds = np.zeros(ncell, dtype=np.int64)
+    for t in np.unique(types):
+        if t not in vtk_nnodes:
+            raise ValueError('unsupported vtk cell type %d in %s' % (t, fname))
+        nnds[types == t] = vtk_nnodes[t]
+    heads = np.cumsum(nnds+1) - (nnds+1)
+    if nnds.sum()+ncell != size or (flat[heads] != nnds).any():
+        raise ValueError('CELLS do not match the CELL_TYPES in '+fname)
+    connec  = np.delete(flat, heads)
+    offsets = np.concatenate(([0], np.cumsum(nnds))).astype(np.int64)
+    return connec, offsets, types
+
+
+# define the reader of a vtk output file
+# fields : list of the names of the fields to be parsed ('points', 'cells',
+#          and the names of the point & cell data); default: all
+# returns a vtkframe of the arrays of the file
+def read_vtk(fname, fields=None):
+    match = vtk_fname.match(os.path.basename(fname))
+    fr    = vtkframe(fname, int(match.group(1)) if match else None)
+    buf   = map_bytes(fname)
+    index = vtk_index(fname, buf)
+    fr.mesh = vtk_mesh(fname, buf)
+    if fields is None:
+        fields = [ k for k in index if k != 'types' ]
+        if fr.mesh is not None:
+            fields = ['points','cells'] + fields
+    # the mesh of a file without mesh is read from its mesh file
+    mfields = [ f for f in fields if f in ['points','cells'] and f not in index ]
+    if mfields and fr.mesh is not None:
+        mfr = read_vtk(os.path.join(os.path.dirname(fname), fr.mesh), mfields)
+        fr.points, fr.connec, fr.offsets, fr.types = mfr.points, mfr.connec, mfr.offsets, mfr.types
+        fields = [ f for f in fields if f not in mfields ]
+    for name in fields:
+        if name not in index or name == 'types':
+            raise ValueError('no field '+str(name)+' in '+fname)
+        loc, ncomp, n, a, b, btype = index[name]
+        if loc == 'points':
+            fr.points = vtk_values(fname, buf, name, a, b, n*3, np.float64, btype).reshape(n,3)
+        elif loc == 'cells':
+            fr.connec, fr.offsets, fr.types = vtk_cells(fname, buf, index)
+        else:
+            values = vtk_values(fname, buf, name, a, b, n*ncomp, np.float64, btype)
+            if ncomp == 3:
+                values = values.reshape(n,3)
+            elif ncomp == 9:
+                values = values.reshape(n,3,3)
+            if loc == 'point':
+                fr.point_data[name] = values
+            else:
+                fr.cell_data[name]  = values
+    return fr
+
+
+# define the lazy loader of the vtk output files of a dir.
+# the files are listed in the order of their increment no.; a file is only
+# read (and only its requested fields are parsed) when its frame is accessed
+# fields : default list of the fields to be parsed; default: all
+class vtkseries(object):
+
+    def __init__(self, outdir, fields=None):
+        self.outdir = outdir
+        self.fields = fields
+        files = []
+        for path in glob.glob(os.path.join(outdir, 'fnm-*.vtk')):
+            match = vtk_fname.match(os.path.basename(path))
+            if match:
+                files.append( (int(match.group(1)), path) )
+        files.sort()
+        self.kincs  = [ k for k, p in files ]
+        self.fnames = [ p for k, p in files ]
+
+    def __len__(self):
+        return len(self.fnames)
+
+    def __getitem__(self, i):
+        return read_vtk(self.fnames[i], self.fields)
+
+    def __iter__(self):
+        for fname in self.fnames:
+            yield read_vtk(fname, self.fields)
+
+    # frame of the increment kinc, with the fields (default: self.fields)
+    def frame(self, kinc, fields=None):
+        if kinc not in self.kincs:
+            raise KeyError('no output of increment '+str(kinc)+' in '+self.outdir)
+        return read_vtk(self.fnames[self.kincs.index(kinc)], \
+        self.fields if fields is None else fields)
+
+
+if __name__ == '__main__':
+    import argparse, time
+    parser = argparse.ArgumentParser(description='Summary of the FNM vtk outputs')
+    parser.add_argument('outdir', help='directory of the fnm-*.vtk files')
+    parser.add_argument('fields', nargs='*', help='fields to be read (default: all)')
+    args = parser.parse_args()
+    out = vtkseries(args.outdir, args.fields or None)
+    t0  = time.time()
+    for fr in out:
+        line = '%10d' % fr.kinc
+        if fr.points is not None:
+            line = line + '  %d nodes' % len(fr.points)
+        if fr.types is not None:
+            line = line + '  %d cells' % len(fr.types)
+        for name in fr.fields():
+            line = line + '  %s max %.3e' % (name, abs(getattr(fr, name)).max() \
+            if getattr(fr, name).size else 0.0)
+        print(line)
+    print('%d increments, %.2f s' % (len(out), time.time()-t0))
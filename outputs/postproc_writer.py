@@ -0,0 +1,292 @@
+################################################################
+########## Background writer of the FNM vtk outputs ############
+################################################################
+##
+##  with the background output writer (see output_module), the
+##  analysis does not write the vtk files: at each output, it
+##  writes a snapshot of the nodes and sub elems in a ring of slot
+##  files of the outputs dir., snap-<slot>.bin, each marked as
+##  ready by the file snap-<slot>.ready
+##  this writer, run as a separate process next to the analysis,
+##  memory-maps the ready snapshots in their order, writes their
+##  vtk files exactly as output_module would (same format, mesh and
+##  fields), and frees their slots by removing the slot files; if
+##  it falls behind, the analysis waits for a slot to be free
+##  the writer stops once the end of the analysis is marked by the
+##  file snap.end and all the snapshots are written, or, with
+##  --once, when no snapshot is ready
+##  e.g., for a job preprocessed with --output-writer background:
+##    abaqus job=... &
+##    python postproc_writer.py outputs
+################################################################
+
+import numpy as np
+import os, sys, time
+
+
+# version of the snapshot files
+snapversion = 1
+# size of the header of a snapshot file
+snapheader  = 80
+# fields of the vtk files, in the order of output_module
+fieldnames  = ['displacement', 'stress', 'strain', 'traction', 'separation', \
+               'df', 'dm', 'dd', 'phi']
+# name of a vtk output file of an increment
+vtk_fname   = 'fnm-%010d%s'
+# name of the end mark of the analysis
+end_fname   = 'snap.end'
+
+
+# define the reader of a snapshot file; the arrays are mapped, not read
+class snapshot(object):
+
+    def __init__(self, fname):
+        self.fname = fname
+        buf = np.memmap(fname, dtype=np.uint8, mode='r')
+        if buf.size < snapheader or buf[0:4].tobytes() != b'FNMS':
+            raise ValueError('not a snapshot file: '+fname)
+        ints = np.frombuffer(buf[4:32].tobytes(), dtype=np.int32)
+        if ints[0] != snapversion:
+            raise ValueError('unsupported snapshot version %d in %s' % (ints[0], fname))
+        self.seq, self.kstep, self.kinc, self.meshkinc, self.nnode, self.ncell = \
+        [ int(i) for i in ints[1:] ]
+        self.outfmt = buf[32:40].tobytes().decode().strip()
+        ints = np.frombuffer(buf[40:80].tobytes(), dtype=np.int32)
+        ndim = int(ints[0])
+        self.fields = [ f for f, on in zip(fieldnames, ints[1:]) if on ]
+        nnode, ncell = self.nnode, self.ncell
+        # arrays of the snapshot, in their order, and their shapes
+        pos = snapheader
+        def take(dtype, shape):
+            n = int(np.prod(shape))
+            a = np.ndarray(shape, dtype=dtype, buffer=buf, offset=pos)
+            return a, pos + n*np.dtype(dtype).itemsize
+        self.x,      pos = take(np.float64, (nnode,ndim))
+        self.u,      pos = take(np.float64, (nnode,ndim))
+        self.connec, pos = take(np.int32,   (ncell,8))
+        self.stress, pos = take(np.float64, (ncell,6))
+        self.strain, pos = take(np.float64, (ncell,6))
+        self.tau,    pos = take(np.float64, (ncell,3))
+        self.delta,  pos = take(np.float64, (ncell,3))
+        self.df,     pos = take(np.float64, (ncell,))
+        self.dm,     pos = take(np.float64, (ncell,))
+        self.dd,     pos = take(np.float64, (ncell,))
+        self.phi,    pos = take(np.float64, (ncell,))
+        if pos != buf.size:
+            raise ValueError('size of the snapshot file %s is not as expected' % fname)
+        self.buf = buf
+
+    def close(self):
+        self.x = self.u = self.connec = None
+        self.stress = self.strain = self.tau = self.delta = None
+        self.df = self.dm = self.dd = self.phi = None
+        self.buf = None
+
+
+# define the format ES20.3E9 of the floats of the ASCII vtk files
+def es(v):
+    if v != v:
+        return '%20s' % 'NaN'
+    if v in (np.inf, -np.inf):
+        return '%20s' % ('Infinity' if v > 0 else '-Infinity')
+    m, e = ('%.3E' % v).split('E')
+    return '%20s' % (m+'E%+010d' % int(e))
+
+
+# define the lines of floats, ncol per line, as an array of fixed-width lines
+# (each distinct value is only formatted once)
+def float_lines(a, ncol):
+    a = np.asarray(a, dtype=np.float64).ravel()
+    if a.size == 0:
+        return np.zeros(0, dtype='S%d' % (20*ncol))
+    u, inv = np.unique(a, return_inverse=True)
+    s = np.array([ es(v).encode() for v in u.tolist() ], dtype='S20')[inv.ravel()]
+    return np.ascontiguousarray(s).reshape(-1, ncol).view('S%d' % (20*ncol)).ravel()
+
+
+# define the text of lines, each ended by a new line char.
+def text_lines(lines):
+    if len(lines) == 0:
+        return b''
+    return b'\n'.join(lines.tolist()) + b'\n'
+
+
+# define the symmetric tensors of components 11, 22, 33, 12, 13, 23 as the 9
+# components of the vtk files, for each tensor
+def tensor_comps(a):
+    return a[:, [0,3,4,3,1,5,4,5,2]]
+
+
+# define the cells of the vtk files: the no. of nodes of each cell, followed by
+# its nodes (numbered from 0); returns the flat array and the no. of nodes
+def cell_values(connec):
+    nnds = (connec > 0).sum(axis=1)
+    flat = np.concatenate((nnds[:,None], connec-1), axis=1)
+    mask = np.concatenate((np.ones((len(connec),1), dtype=bool), connec > 0), axis=1)
+    return flat[mask], nnds
+
+
+# define the writer of a vtk file of a snapshot
+# isbin    : binary (True) or ASCII (False) vtk file
+# meshfile : file of the mesh; '' to write the mesh
+def write_vtk(fname, sn, isbin, meshfile):
+    out = []
+    nl  = b'\n'
+
+    def wline(text):
+        out.append(text.encode()+nl)
+
+    def wdata(a, btype, ncol):
+        if isbin:
+            out.append(np.asarray(a).astype(btype).tobytes())
+        else:
+            out.append(text_lines(float_lines(a, ncol)))
+
+    wline('# vtk DataFile Version 3.1')
+    if meshfile:
+        wline('for Floating Node Method output, mesh in '+meshfile)
+    else:
+        wline('for Floating Node Method output')
+    wline('BINARY' if isbin else 'ASCII')
+    wline('DATASET UNSTRUCTURED_GRID')
+    nnode, ncell = sn.nnode, sn.ncell
+
+    # mesh
+    if not meshfile:
+        wline('POINTS %10d FLOAT' % nnode)
+        wdata(sn.x, '>f4', 3)
+        wline('')
+        wline('')
+        flat, nnds = cell_values(sn.connec)
+        wline('CELLS %10d%10d' % (ncell, flat.size))
+        if isbin:
+            out.append(flat.astype('>i4').tobytes())
+        else:
+            s   = ( '%10d' * flat.size ) % tuple(flat.tolist())
+            pos = 0
+            for n in nnds.tolist():
+                out.append(s[pos:pos+10*(n+1)].encode()+nl)
+                pos = pos + 10*(n+1)
+        wline('')
+        wline('CELL_TYPES %10d' % ncell)
+        types = np.where(nnds == 8, 12, 13)
+        if isbin:
+            out.append(types.astype('>i4').tobytes())
+        else:
+            out.append(text_lines(np.where(types == 12, b'12', b'13')))
+        wline('')
+
+    # point data
+    if 'displacement' in sn.fields:
+        wline('POINT_DATA %10d' % nnode)
+        wline('VECTORS displacement float')
+        wdata(sn.u, '>f4', 3)
+        wline('')
+
+    # cell data
+    if [ f for f in sn.fields if f != 'displacement' ]:
+        wline('CELL_DATA %10d' % ncell)
+    for name in ['stress','strain']:
+        if name in sn.fields:
+            wline('TENSORS %s float' % name)
+            t = tensor_comps(getattr(sn, name))
+            if isbin:
+                out.append(t.astype('>f4').tobytes())
+            else:
+                # each tensor is 3 lines and a blank line
+                lines = float_lines(t, 3).reshape(-1, 3)
+                blank = np.zeros((len(lines),1), dtype=lines.dtype)
+                out.append(text_lines(np.concatenate((lines, blank), axis=1).ravel()))
+            wline('')
+    for name, attr in [('traction','tau'), ('separation','delta')]:
+        if name in sn.fields:
+            wline('VECTORS %s float' % name)
+            wdata(getattr(sn, attr), '>f4', 3)
+            wline('')
+    for name in ['df','dm','dd','phi']:
+        if name in sn.fields:
+            wline('SCALARS %s float' % name)
+            wline('LOOKUP_TABLE default')
+            wdata(getattr(sn, name), '>f4', 1)
+            wline('')
+
+    # written in a temporary file and renamed, so that a reader never sees a
+    # partial file
+    f = open(fname+'.tmp', 'wb')
+    f.write(b''.join(out))
+    f.close()
+    if os.path.exists(fname):
+        os.remove(fname)
+    os.rename(fname+'.tmp', fname)
+
+
+# define the writer of the vtk files of a snapshot, in its output format
+def write_snapshot(outdir, sn):
+    kinc = sn.kinc
+    mvtk = vtk_fname % (sn.meshkinc, '.vtk')     if sn.meshkinc > 0 else ''
+    mbin = vtk_fname % (sn.meshkinc, '.bin.vtk') if sn.meshkinc > 0 else ''
+    if sn.outfmt == 'binary':
+        write_vtk(os.path.join(outdir, vtk_fname % (kinc, '.vtk')), sn, True, mvtk)
+    elif sn.outfmt == 'both':
+        write_vtk(os.path.join(outdir, vtk_fname % (kinc, '.vtk')), sn, False, mvtk)
+        write_vtk(os.path.join(outdir, vtk_fname % (kinc, '.bin.vtk')), sn, True, mbin)
+    else:
+        write_vtk(os.path.join(outdir, vtk_fname % (kinc, '.vtk')), sn, False, mvtk)
+
+
+# define the ready slots of outdir, in the order of their snapshots
+# returns the list of (seq. no., slot file)
+def ready_slots(outdir):
+    slots = []
+    for f in os.listdir(outdir):
+        if f.startswith('snap-') and f.endswith('.ready'):
+            fbin = os.path.join(outdir, f[:-6]+'.bin')
+            ints = np.fromfile(fbin, dtype=np.int32, count=3)
+            slots.append( (int(ints[2]), fbin) )
+    return sorted(slots)
+
+
+# define the writer of the snapshots of outdir
+# follow : wait for the next snapshots until the end of the analysis
+# poll   : time between two checks of the ready slots, in seconds
+# returns the no. of snapshots written
+def drain(outdir, follow=True, poll=0.05):
+    nsnap = 0
+    while True:
+        slots = ready_slots(outdir)
+        if not slots:
+            fend = os.path.join(outdir, end_fname)
+            if not follow or os.path.exists(fend):
+                # (a last check, for a snapshot made ready before the end mark)
+                if ready_slots(outdir):
+                    continue
+                if os.path.exists(fend):
+                    os.remove(fend)
+                return nsnap
+            time.sleep(poll)
+            continue
+        seq, fbin = slots[0]
+        sn = snapshot(fbin)
+        write_snapshot(outdir, sn)
+        sn.close()
+        # free the slot: the snapshot file first, then the ready mark
+        os.remove(fbin)
+        os.remove(fbin[:-4]+'.ready')
+        nsnap = nsnap + 1
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Background writer of the FNM vtk outputs')
+    parser.add_argument('outdir', help='outputs dir. of the analysis')
+    parser.add_argument('--once', action='store_true', \
+    help='write the ready snapshots and stop, instead of following the analysis')
+    parser.add_argument('--poll', type=float, default=0.05, \
+    help='time between two checks of the slots, in seconds')
+    args = parser.parse_args()
+    if not os.path.isdir(args.outdir):
+        print('ERROR: no outputs dir. '+args.outdir)
+        sys.exit(1)
+    t0 = time.time()
+    n  = drain(args.outdir, not args.once, args.poll)
+    print('%d snapshots written, %.2f s' % (n, time.time()-t0))